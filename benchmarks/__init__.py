@@ -0,0 +1,24 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Offline benchmarks for the TriNetra agent tree.
+
+Scenarios from `sample_prompts.md` and rows of the sample dataset are replayed
+through the real agents and tools, with a deterministic stand-in for Gemini
+(`stub_llm.ScriptedLlm`) and the embedded SQLite store, so no credentials or
+network are needed and runs are comparable:
+
+    python main.py bench -o bench.json
+    python main.py bench --dataset-rows 200 --baseline bench.json
+"""
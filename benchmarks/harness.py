@@ -0,0 +1,344 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Replay scenarios through the agent tree and report throughput and latency.
+
+`run_benchmark()` swaps every LlmAgent's model for a `ScriptedLlm`, points the
+tools at a fresh embedded SQLite store, and replays each scenario in its own
+session through an `InMemoryRunner`. The report is a JSON-serializable dict:
+
+- totals: turns, decisions, errors, decisions/sec and turns/sec
+- per_decision: mean tool calls, model calls and (estimated) prompt tokens
+  per turn that ended in a decision
+- latency_ms: p50/p95/p99 per turn and per decision turn
+- tools / stages: per-tool and per-stage latency percentiles from the tracer
+- tiering: share of decisions escalated to the larger model
+- memory: peak RSS and, with `trace_memory`, the peak traced Python heap
+- accuracy: agreement of decisions with the scenario's expected label
+
+`compare_reports()` lines up the headline numbers of two reports.
+"""
+
+import asyncio
+import logging
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from orchestrator_agent.bigquery_client import set_credentials
+from orchestrator_agent.config import get_config
+from orchestrator_agent.store import create_transaction_store, set_transaction_store
+from orchestrator_agent.tiering import get_tier_stats
+from orchestrator_agent.tracing import get_tracer, summarize_durations
+from .scenarios import Scenario, normalize_decision
+from .stub_llm import ScriptedLlm
+
+try:
+  import resource
+except ImportError:  # Windows
+  resource = None
+
+logger = logging.getLogger('google_adk.' + __name__)
+
+REPORT_VERSION = 1
+
+_APP_NAME = "trinetra_bench"
+_DECISION_MARKER = "**Decision:**"
+
+# Headline metrics compared between reports, with whether higher is better.
+COMPARED_METRICS = (
+    ("totals.decisions_per_second", True),
+    ("totals.turns_per_second", True),
+    ("latency_ms.turn.p50_ms", False),
+    ("latency_ms.turn.p95_ms", False),
+    ("latency_ms.decision_turn.p50_ms", False),
+    ("latency_ms.decision_turn.p95_ms", False),
+    ("per_decision.tool_calls", False),
+    ("per_decision.model_calls", False),
+    ("per_decision.prompt_tokens", False),
+    ("tiering.escalation_rate", False),
+    ("memory.peak_rss_mb", False),
+    ("accuracy.agreement", True),
+)
+
+
+@dataclass
+class TurnResult:
+  """What one user turn cost and decided."""
+  scenario: str
+  turn: int
+  latency_ms: float = 0.0
+  tool_calls: List[str] = field(default_factory=list)
+  transfers: int = 0
+  model_calls: int = 0
+  prompt_tokens: int = 0
+  output_tokens: int = 0
+  decision: Optional[str] = None
+  expected: Optional[str] = None
+  error: Optional[str] = None
+
+
+def _use_model(agent: BaseAgent, model: ScriptedLlm) -> None:
+  if isinstance(agent, LlmAgent):
+    agent.model = model
+  for sub_agent in agent.sub_agents:
+    _use_model(sub_agent, model)
+
+
+def load_agent_tree(model: ScriptedLlm) -> BaseAgent:
+  """The real root agent with every LlmAgent running on `model`.
+
+  The agents are process-wide singletons, so this changes them for the rest
+  of the process. The scripted model never calls the BigQuery tools, so the
+  toolset is given anonymous credentials and the benchmark needs no Google
+  account.
+  """
+  from google.auth.credentials import AnonymousCredentials
+  from orchestrator_agent.agent import get_root_agent
+
+  set_credentials(AnonymousCredentials())
+  root_agent = get_root_agent()
+  _use_model(root_agent, model)
+  return root_agent
+
+
+def _decision(text: str) -> Optional[str]:
+  _, marker, rest = text.rpartition(_DECISION_MARKER)
+  return normalize_decision(rest.split("\n", 1)[0]) if marker else None
+
+
+async def _replay(runner: InMemoryRunner, scenario: Scenario, user_id: str) -> List[TurnResult]:
+  session = await runner.session_service.create_session(app_name=runner.app_name, user_id=user_id)
+  results = []
+  decided = False
+  for number, text in enumerate(scenario.turns):
+    result = TurnResult(scenario=scenario.name, turn=number)
+    message = types.Content(role="user", parts=[types.Part(text=text)])
+    start = time.perf_counter()
+    try:
+      async for event in runner.run_async(user_id=user_id, session_id=session.id, new_message=message):
+        for call in event.get_function_calls():
+          if call.name == "transfer_to_agent":
+            result.transfers += 1
+          else:
+            result.tool_calls.append(call.name)
+        if event.usage_metadata:
+          result.model_calls += 1
+          result.prompt_tokens += event.usage_metadata.prompt_token_count or 0
+          result.output_tokens += event.usage_metadata.candidates_token_count or 0
+        if event.content and event.content.role == "model":
+          for part in event.content.parts or ():
+            if part.text and _DECISION_MARKER in part.text:
+              result.decision = _decision(part.text)
+    except Exception as e:
+      logger.warning(f"Scenario '{scenario.name}' turn {number} failed: {e}")
+      result.error = f"{type(e).__name__}: {e}"
+    result.latency_ms = (time.perf_counter() - start) * 1000
+    if result.decision and not decided:
+      # The label describes the scenario's transaction, i.e. its first decision.
+      result.expected = scenario.expected
+      decided = True
+    results.append(result)
+    if result.error:
+      break
+  await runner.session_service.delete_session(app_name=runner.app_name, user_id=user_id, session_id=session.id)
+  return results
+
+
+def _mean(values: Sequence[float]) -> float:
+  return round(sum(values) / len(values), 2) if values else 0.0
+
+
+def _peak_rss_mb() -> Optional[float]:
+  if resource is None:
+    return None
+  # ru_maxrss is KiB on Linux and bytes on macOS.
+  scale = 1 if platform.system() == "Darwin" else 1024
+  return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 2**20, 1)
+
+
+def _git_commit() -> Optional[str]:
+  try:
+    return subprocess.run(
+        ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    ).stdout.strip() or None
+  except (OSError, subprocess.SubprocessError):
+    return None
+
+
+def _accuracy(turns: Sequence[TurnResult]) -> Dict[str, Any]:
+  labelled = [t for t in turns if t.expected and t.decision]
+  confusion: Dict[str, Counter] = defaultdict(Counter)
+  for t in labelled:
+    confusion[t.expected][t.decision] += 1
+  agreed = sum(t.expected == t.decision for t in labelled)
+  return {
+      "labelled": len(labelled),
+      "agreement": round(agreed / len(labelled), 4) if labelled else None,
+      "confusion": {expected: dict(counts) for expected, counts in confusion.items()},
+  }
+
+
+def build_report(
+    turns: Sequence[TurnResult],
+    elapsed_seconds: float,
+    parameters: Dict[str, Any],
+    python_peak_bytes: Optional[int] = None,
+) -> Dict[str, Any]:
+  """Aggregate turn results and the tracer's stage latencies into a report."""
+  decided = [t for t in turns if t.decision]
+  stages = get_tracer().summary()
+  tool_calls = Counter(name for t in turns for name in t.tool_calls)
+  config = get_config()
+  return {
+      "version": REPORT_VERSION,
+      "environment": {
+          "started_at": datetime.now(timezone.utc).isoformat(),
+          "git_commit": _git_commit(),
+          "python": platform.python_version(),
+          "platform": platform.platform(),
+          "store": "sqlite",
+          "similarity_index": config.index_layout if config.similarity_index else None,
+          "response_format": config.response_format,
+          "tracing": get_tracer().enabled,
+      },
+      "parameters": parameters,
+      "totals": {
+          "scenarios": len({t.scenario for t in turns}),
+          "turns": len(turns),
+          "decisions": len(decided),
+          "errors": sum(1 for t in turns if t.error),
+          "elapsed_seconds": round(elapsed_seconds, 3),
+          "decisions_per_second": round(len(decided) / elapsed_seconds, 2) if elapsed_seconds else 0.0,
+          "turns_per_second": round(len(turns) / elapsed_seconds, 2) if elapsed_seconds else 0.0,
+      },
+      "per_decision": {
+          "tool_calls": _mean([len(t.tool_calls) for t in decided]),
+          "model_calls": _mean([t.model_calls for t in decided]),
+          "prompt_tokens": _mean([t.prompt_tokens for t in decided]),
+          "output_tokens": _mean([t.output_tokens for t in decided]),
+      },
+      "decisions": dict(Counter(t.decision for t in decided)),
+      "accuracy": _accuracy(turns),
+      "tool_calls": dict(tool_calls.most_common()),
+      "latency_ms": summarize_durations({
+          "turn": [t.latency_ms for t in turns],
+          "decision_turn": [t.latency_ms for t in decided],
+      }),
+      "tiering": get_tier_stats().as_dict(),
+      "tools": {stage[len("tool:"):]: stats for stage, stats in stages.items() if stage.startswith("tool:")},
+      "stages": {stage: stats for stage, stats in stages.items() if not stage.startswith("tool:")},
+      "memory": {
+          "peak_rss_mb": _peak_rss_mb(),
+          "python_peak_mb": round(python_peak_bytes / 2**20, 1) if python_peak_bytes is not None else None,
+      },
+      "turns": [asdict(t) for t in turns],
+  }
+
+
+async def run_benchmark(
+    scenarios: Sequence[Scenario],
+    concurrency: int = 1,
+    model_latency_ms: float = 0.0,
+    warmup: int = 1,
+    trace_memory: bool = False,
+) -> Dict[str, Any]:
+  """Replay scenarios through the agent tree and return the report.
+
+  Args:
+      scenarios: Sessions to replay; each runs in a fresh session.
+      concurrency: Scenarios in flight at once.
+      model_latency_ms: Simulated latency of every model call.
+      warmup: Leading scenarios replayed once, untimed, before measuring, so
+          store loading and index builds are not counted.
+      trace_memory: Also track the peak Python heap with tracemalloc (slows
+          the run; throughput is then not comparable with untraced runs).
+  """
+  set_transaction_store(create_transaction_store("sqlite"))
+  runner = InMemoryRunner(agent=load_agent_tree(ScriptedLlm(latency_ms=model_latency_ms)), app_name=_APP_NAME)
+  for position, scenario in enumerate(scenarios[:warmup]):
+    await _replay(runner, scenario, user_id=f"warmup-{position}")
+  get_tracer().reset()
+  get_tier_stats().reset()
+
+  queue: "asyncio.Queue[int]" = asyncio.Queue()
+  for position in range(len(scenarios)):
+    queue.put_nowait(position)
+  results: List[List[TurnResult]] = [[] for _ in scenarios]
+
+  async def worker() -> None:
+    while not queue.empty():
+      position = queue.get_nowait()
+      results[position] = await _replay(runner, scenarios[position], user_id=f"bench-{position}")
+
+  if trace_memory:
+    tracemalloc.start()
+  start = time.perf_counter()
+  await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+  elapsed = time.perf_counter() - start
+  python_peak = None
+  if trace_memory:
+    python_peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+  parameters = {
+      "scenarios": len(scenarios),
+      "concurrency": concurrency,
+      "model_latency_ms": model_latency_ms,
+      "warmup": warmup,
+      "trace_memory": trace_memory,
+  }
+  return build_report([t for turns in results for t in turns], elapsed, parameters, python_peak)
+
+
+def _lookup(report: Dict[str, Any], path: str) -> Any:
+  value: Any = report
+  for key in path.split("."):
+    if not isinstance(value, dict):
+      return None
+    value = value.get(key)
+  return value
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+  """Headline metrics and per-tool p50/p95 of two reports, with % change.
+
+  `better` is True/False when the change is an improvement/regression and
+  None when it is zero or either side is missing.
+  """
+  metrics = list(COMPARED_METRICS)
+  for tool in sorted(set(baseline.get("tools", {})) | set(current.get("tools", {}))):
+    metrics += [(f"tools.{tool}.p50_ms", False), (f"tools.{tool}.p95_ms", False)]
+  comparison = {}
+  for path, higher_is_better in metrics:
+    before, after = _lookup(baseline, path), _lookup(current, path)
+    entry: Dict[str, Any] = {"baseline": before, "current": after, "change_pct": None, "better": None}
+    if isinstance(before, (int, float)) and isinstance(after, (int, float)):
+      if before:
+        entry["change_pct"] = round((after - before) / before * 100, 1)
+      if after != before:
+        entry["better"] = (after > before) == higher_is_better
+    comparison[path] = entry
+  return comparison
@@ -0,0 +1,200 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmark scenarios: the sample prompts and rows of the sample dataset.
+
+Every fenced block in `sample_prompts.md` is one user turn. Blocks are
+replayed one per session, except in the feedback sections, which need a
+decision to respond to: "Feedback Scenarios" blocks follow the first sample
+transaction in a two-turn session, and the "Feedback Loop" and "Sequential"
+sections each run as one multi-turn session.
+"""
+
+import os
+import random
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+SAMPLE_PROMPTS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "sample_prompts.md"
+)
+
+# "Label" (lower case) in "- Label: value" lines -> transaction field.
+FIELD_LABELS = {
+    "transaction id": "transaction_id",
+    "payer": "payer_id",
+    "payer id": "payer_id",
+    "payee": "payee_id",
+    "payee id": "payee_id",
+    "amount": "payment_amount",
+    "payment amount": "payment_amount",
+    "currency": "payment_currency",
+    "payment currency": "payment_currency",
+    "method": "payment_method",
+    "payment method": "payment_method",
+    "purpose": "payment_purpose",
+    "payment purpose": "payment_purpose",
+    "vendor": "vendor_id",
+    "vendor id": "vendor_id",
+    "payee country": "payee_country",
+    "vendor country": "vendor_country",
+    "industry": "vendor_industry",
+    "vendor industry": "vendor_industry",
+    "countries": "countries",
+}
+
+_FIELD = re.compile(r"([A-Za-z][A-Za-z ]*?):\s*([^,]+)")
+_AMOUNT = re.compile(r"([\d,]+(?:\.\d+)?)\s*([A-Z]{3})?")
+_EXPECTED = re.compile(r"\(Should be (APPROVED|REJECTED|MARKED FOR REVIEW)\)", re.IGNORECASE)
+
+
+@dataclass
+class Scenario:
+  """One session: user turns replayed in order."""
+  name: str
+  turns: List[str]
+  expected: Optional[str] = None  # Approve / Reject / Review, for the first decision
+
+
+def normalize_decision(value: Any) -> Optional[str]:
+  """Map APPROVE/APPROVED/REJECTED/MARKED FOR REVIEW etc. to Approve/Reject/Review."""
+  text = str(value or "").upper()
+  if "REVIEW" in text:
+    return "Review"
+  if "REJECT" in text:
+    return "Reject"
+  if "APPROV" in text:
+    return "Approve"
+  return None
+
+
+def parse_transaction(text: str) -> Dict[str, Any]:
+  """Extract transaction fields from "- Label: value" lines of a prompt.
+
+  Understands both one field per line and the "Payer: X, Amount: 5000 USD,
+  Countries: UK-Canada" shorthand. A currency after the amount is used
+  unless a payment currency is given explicitly.
+  """
+  fields: Dict[str, Any] = {}
+  amount_currency = None
+  for line in text.splitlines():
+    line = line.strip()
+    if not line.startswith("-"):
+      continue
+    for label, value in _FIELD.findall(line.lstrip("- ")):
+      name = FIELD_LABELS.get(label.strip().lower())
+      value = value.strip()
+      if name is None or not value:
+        continue
+      if name == "payment_amount":
+        match = _AMOUNT.match(value)
+        if match:
+          fields[name] = float(match.group(1).replace(",", ""))
+          amount_currency = match.group(2)
+      elif name == "countries":
+        payee_country, _, vendor_country = value.partition("-")
+        fields["payee_country"] = payee_country.strip()
+        if vendor_country.strip():
+          fields["vendor_country"] = vendor_country.strip()
+      else:
+        fields[name] = value
+  if amount_currency and "payment_currency" not in fields:
+    fields["payment_currency"] = amount_currency
+  return fields
+
+
+def _sections(path: str) -> List[Dict[str, Any]]:
+  """Split the markdown into sections of (heading, fenced blocks)."""
+  sections: List[Dict[str, Any]] = []
+  section, heading, block = "", "", None
+  with open(path, encoding="utf-8") as f:
+    for line in f:
+      stripped = line.rstrip("\n")
+      if block is not None:
+        if stripped.strip() == "```":
+          sections[-1]["blocks"].append((heading, "\n".join(block).strip()))
+          block = None
+        else:
+          block.append(stripped)
+      elif stripped.strip().startswith("```"):
+        block = []
+      elif stripped.startswith("## "):
+        section = heading = stripped[3:].strip()
+        sections.append({"title": section, "blocks": []})
+      elif stripped.startswith("### "):
+        heading = stripped[4:].strip()
+  return [s for s in sections if s["blocks"]]
+
+
+def load_prompt_scenarios(path: str = SAMPLE_PROMPTS_PATH) -> List[Scenario]:
+  """Build scenarios from the fenced prompts in sample_prompts.md."""
+  sections = _sections(path)
+  seed = next(
+      (text for s in sections for _, text in s["blocks"] if parse_transaction(text)), None
+  )
+  scenarios: List[Scenario] = []
+  for section in sections:
+    title, blocks = section["title"], section["blocks"]
+    if "Feedback Loop" in title or "Sequential" in title:
+      scenarios.append(Scenario(name=title, turns=[text for _, text in blocks]))
+      continue
+    counts: Dict[str, int] = {}
+    for heading, text in blocks:
+      counts[heading] = counts.get(heading, 0) + 1
+      name = heading if counts[heading] == 1 else f"{heading} ({counts[heading]})"
+      if "Feedback Scenarios" in title and seed is not None:
+        scenarios.append(Scenario(name=name, turns=[seed, text]))
+      else:
+        match = _EXPECTED.search(heading)
+        expected = normalize_decision(match.group(1)) if match else None
+        scenarios.append(Scenario(name=name, turns=[text], expected=expected))
+  return scenarios
+
+
+def render_transaction(row: Mapping[str, Any]) -> str:
+  """Write a dataset row as the kind of prompt an analyst would type."""
+  lines = ["Please evaluate this transaction:"]
+  for label, column in (
+      ("Transaction ID", "transaction_id"),
+      ("Payer", "payer_id"),
+      ("Payee", "payee_id"),
+      ("Payment method", "payment_method"),
+      ("Payment purpose", "payment_purpose"),
+      ("Vendor ID", "vendor_id"),
+      ("Payee country", "payee_country"),
+      ("Vendor country", "vendor_country"),
+      ("Vendor industry", "vendor_industry"),
+  ):
+    if row.get(column):
+      lines.append(f"- {label}: {row[column]}")
+    if column == "payee_id" and row.get("payment_amount") is not None:
+      lines.append(f"- Amount: {row['payment_amount']:.2f} {row.get('payment_currency') or ''}".rstrip())
+  lines.append("")
+  lines.append("Should this transaction be approved?")
+  return "\n".join(lines)
+
+
+def dataset_scenarios(rows: Iterable[Mapping[str, Any]], limit: int, seed: int = 0) -> List[Scenario]:
+  """A fixed random sample of `limit` labelled rows, one single-turn scenario each."""
+  rows = [row for row in rows if row.get("approval_status")]
+  sample = random.Random(seed).sample(rows, min(limit, len(rows)))
+  return [
+      Scenario(
+          name=f"dataset:{row.get('transaction_id')}",
+          turns=[render_transaction(row)],
+          expected=normalize_decision(row["approval_status"]),
+      )
+      for row in sample
+  ]
@@ -0,0 +1,136 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Import-time profile of the package entry points.
+
+Each target is imported in a fresh interpreter with `-X importtime`, so
+nothing is already cached. A target is a module, optionally with an
+attribute to read after importing it (`orchestrator_agent.agent:app` is what
+`adk web` loads). Credential discovery is made to fail by pointing
+GOOGLE_APPLICATION_CREDENTIALS at a missing file: a target that looks up
+credentials while starting reports the error instead of a time.
+
+For each target the profile reports the wall time of the import (and
+attribute read), and the slowest third-party modules imported directly by
+the package's own modules, by cumulative import time per package.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List, Optional, Sequence
+
+DEFAULT_TARGETS = (
+    "orchestrator_agent",
+    "orchestrator_agent.config",
+    "orchestrator_agent.tools",
+    "orchestrator_agent.batch",
+    "orchestrator_agent.agent",
+    "orchestrator_agent.agent:app",
+)
+
+# Packages whose direct imports are attributed in the profile.
+_OWN_PACKAGES = ("orchestrator_agent", "data_models", "benchmarks")
+
+# An import statement, not importlib.import_module(), so that -X importtime
+# reports the target itself with its imports nested under it.
+_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import {module} as module
+if {attribute!r}:
+  getattr(module, {attribute!r})
+print(json.dumps({{"seconds": time.perf_counter() - start}}))
+"""
+
+
+class _Import:
+  """One line of `-X importtime` output with the imports it triggered."""
+
+  def __init__(self, name: str, depth: int, cumulative_us: int):
+    self.name = name
+    self.depth = depth
+    self.cumulative_us = cumulative_us
+    self.children: List["_Import"] = []
+
+
+def _parse_importtime(stderr: str) -> List[_Import]:
+  # Lines come children first: "import time: self | cumulative | <indent>name".
+  stack: List[_Import] = []
+  for line in stderr.splitlines():
+    if not line.startswith("import time:") or "|" not in line:
+      continue
+    _, cumulative, label = line.split("|", 2)
+    if not cumulative.strip().isdigit():
+      continue  # the header line
+    name = label.strip()
+    node = _Import(name, (len(label) - len(label.lstrip()) - 1) // 2, int(cumulative))
+    while stack and stack[-1].depth > node.depth:
+      node.children.insert(0, stack.pop())
+    stack.append(node)
+  return stack
+
+
+def _is_own(name: str) -> bool:
+  return name.split(".")[0] in _OWN_PACKAGES
+
+
+def _package(name: str) -> str:
+  """The distribution-level package of a module, e.g. google.cloud.bigquery for its submodules."""
+  parts = name.split(".")
+  depth = 3 if parts[:2] == ["google", "cloud"] else 2 if parts[0] == "google" else 1
+  return ".".join(parts[:depth])
+
+
+def _slowest_dependencies(roots: Sequence[_Import], limit: int) -> List[Dict[str, Any]]:
+  found: Dict[str, int] = {}
+  pending = list(roots)
+  while pending:
+    node = pending.pop()
+    if _is_own(node.name):
+      for child in node.children:
+        if _is_own(child.name):
+          pending.append(child)
+        else:
+          package = _package(child.name)
+          found[package] = max(found.get(package, 0), child.cumulative_us)
+  slowest = sorted(found.items(), key=lambda item: item[1], reverse=True)[:limit]
+  return [{"package": name, "ms": round(us / 1000, 1)} for name, us in slowest]
+
+
+def profile_target(target: str, limit: int = 8, cwd: Optional[str] = None) -> Dict[str, Any]:
+  """Import `target` ("module" or "module:attribute") in a fresh interpreter."""
+  module, _, attribute = target.partition(":")
+  env = dict(os.environ, GOOGLE_APPLICATION_CREDENTIALS=os.path.join(os.sep, "nonexistent", "adc.json"))
+  result = subprocess.run(
+      [sys.executable, "-X", "importtime", "-c", _SCRIPT.format(module=module, attribute=attribute)],
+      capture_output=True, text=True, env=env, cwd=cwd,
+  )
+  profile: Dict[str, Any] = {"target": target}
+  if result.returncode:
+    errors = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+    profile["error"] = errors[-1] if errors else f"exit status {result.returncode}"
+    return profile
+  profile["seconds"] = round(json.loads(result.stdout.strip().splitlines()[-1])["seconds"], 3)
+  roots = _parse_importtime(result.stderr)
+  profile["modules_imported"] = sum(1 for line in result.stderr.splitlines() if line.startswith("import time:")) - 1
+  profile["slowest_dependencies"] = _slowest_dependencies(roots, limit)
+  return profile
+
+
+def profile_startup(targets: Sequence[str] = DEFAULT_TARGETS, limit: int = 8) -> List[Dict[str, Any]]:
+  """profile_target() for each target, run from the repository root."""
+  root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+  return [profile_target(target, limit=limit, cwd=root) for target in targets]
@@ -0,0 +1,299 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A deterministic stand-in for Gemini that follows the agents' instructions.
+
+`ScriptedLlm` serves every LlmAgent in the tree. It works out which agent it
+is speaking for from the request alone (the tools offered and the response
+schema) and scripts that agent's documented workflow:
+
+- root: transfer transactions and feedback to transaction_approval_agent and
+  data questions to analysis_agent; answer greetings itself.
+- transaction_approval_agent: screen_transaction; if not decisive, the three
+  summarize_similar_transactions queries of the query strategy plus
+  get_entity_profile, check_payee and get_payment_velocity in one parallel
+  turn, find_nearest_transactions when those match little; then a decision
+  in the documented format. Feedback is stored with insert_transaction_feedback.
+- analysis_agent: get_approval_status, then a summary.
+- transaction_extractor / llm_reviewer: schema-valid JSON.
+
+The same conversation therefore always produces the same tool calls, so runs
+differ only in how fast the tools and the framework are. Prompt and output
+token counts are estimated from the request size, at
+`encoding.CHARS_PER_TOKEN` characters per token, and reported in
+`usage_metadata` like a real model's.
+"""
+
+import asyncio
+import json
+import re
+from typing import Any, AsyncGenerator, Dict, List, Optional, Tuple
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from orchestrator_agent.encoding import estimate_tokens
+from orchestrator_agent.prompts.assembly import user_message_indices
+from .scenarios import normalize_decision, parse_transaction
+
+APPROVAL_AGENT = "transaction_approval_agent"
+ANALYSIS_AGENT = "analysis_agent"
+
+# Below this many matches across the summaries, ask for nearest neighbours.
+MIN_SUPPORT = 20
+
+_FEEDBACK = re.compile(r"\b(agree|correct|approve|approved|reject|rejected|review)\b", re.IGNORECASE)
+_ANALYSIS = re.compile(r"\b(show|tell me about|how many|which|most common|statistics|rates?)\b", re.IGNORECASE)
+_DECISION = re.compile(r"\*\*Decision:\*\*\s*(APPROVE|REJECT|MARKED FOR REVIEW)")
+
+_TRANSACTION_FIELDS = (
+    "payer_id", "payee_id", "payment_amount", "payment_currency", "payment_method",
+    "payment_purpose", "vendor_id", "payee_country", "vendor_country", "vendor_industry",
+)
+_SEARCH_FIELDS = tuple(f for f in _TRANSACTION_FIELDS if f != "payment_purpose")
+_QUERY_STRATEGY = (
+    ("payer_id", "payment_currency", "payment_method"),
+    ("payee_country", "vendor_country", "payment_currency"),
+    ("vendor_industry", "payment_currency"),
+)
+_LABELS = {"Approve": "APPROVE", "Reject": "REJECT", "Review": "MARKED FOR REVIEW"}
+
+
+def _text(content: types.Content) -> str:
+  return "\n".join(part.text for part in content.parts or () if part.text)
+
+
+def _parse_result(response: Any) -> Dict[str, Any]:
+  if isinstance(response, dict) and isinstance(response.get("result"), str):
+    response = response["result"]
+  if isinstance(response, str):
+    try:
+      response = json.loads(response)
+    except ValueError:
+      return {}
+  return response if isinstance(response, dict) else {}
+
+
+class _Conversation:
+  """The parts of an LlmRequest the script reacts to."""
+
+  def __init__(self, llm_request: LlmRequest):
+    contents = llm_request.contents or []
+    turns = user_message_indices(contents)
+    last = turns[-1] if turns else -1
+    self.message = _text(contents[last]) if turns else ""
+    self.earlier = [_text(contents[i]) for i in turns[:-1]]
+    self.history = "\n".join(_text(content) for content in contents[:last])
+    # Tool results since the user's message, by tool name (repeated calls in order).
+    self.results: Dict[str, List[Dict[str, Any]]] = {}
+    for content in contents[last + 1:]:
+      for part in content.parts or ():
+        if part.function_response:
+          self.results.setdefault(part.function_response.name, []).append(
+              _parse_result(part.function_response.response)
+          )
+    self.tools = set(llm_request.tools_dict)
+    schema = llm_request.config.response_schema if llm_request.config else None
+    self.schema = getattr(schema, "__name__", None)
+
+
+def _call(name: str, **args: Any) -> types.Part:
+  return types.Part(function_call=types.FunctionCall(name=name, args=args))
+
+
+def _say(text: str) -> List[types.Part]:
+  return [types.Part(text=text)]
+
+
+def _route(message: str) -> Optional[str]:
+  if parse_transaction(message):
+    return APPROVAL_AGENT
+  if _ANALYSIS.search(message):
+    return ANALYSIS_AGENT
+  if _FEEDBACK.search(message):
+    return APPROVAL_AGENT
+  return None
+
+
+def _pick(fields: Dict[str, Any], names: Tuple[str, ...]) -> Dict[str, Any]:
+  return {name: fields[name] for name in names if fields.get(name) is not None}
+
+
+def decide(screen: Dict[str, Any], summaries: List[Dict[str, Any]], nearest: Optional[Dict[str, Any]]) -> Tuple[str, float, str]:
+  """(decision, confidence, reason) from the screen and the historical statistics."""
+  counts = {"Approve": 0.0, "Reject": 0.0, "Review": 0.0}
+  for summary in summaries:
+    counts["Approve"] += summary.get("approved") or 0
+    counts["Reject"] += summary.get("rejected") or 0
+    counts["Review"] += summary.get("marked_for_review") or 0
+  if nearest and sum(counts.values()) < MIN_SUPPORT:
+    for decision, weight in (nearest.get("decision_distribution") or {}).items():
+      label = normalize_decision(decision)
+      if label:
+        counts[label] += weight
+  total = sum(counts.values())
+  screened = screen.get("decision") or "Review"
+  if not total:
+    return "Review" if screened == "Approve" else screened, 0.5, "No comparable history"
+  majority = max(counts, key=counts.get)
+  share = counts[majority] / total
+  if screened == "Reject" and counts["Reject"] / total < 0.5:
+    # A triggered rule that history does not back up goes to a human.
+    return "Review", 0.6, f"{screen.get('reason')}; history {counts['Reject'] / total:.0%} rejected"
+  if screened != "Approve" and majority == "Approve":
+    return "Review", 0.6, f"{screen.get('reason')}; history {share:.0%} approved"
+  return majority, round(share, 2), f"{share:.0%} of {total:.0f} similar transactions were {_LABELS[majority]}"
+
+
+def _decision_text(decision: str, confidence: float, reason: str, queries: int) -> str:
+  level = "High" if confidence >= 0.85 else "Medium" if confidence >= 0.6 else "Low"
+  return (
+      f"**Decision:** {_LABELS[decision]}\n\n"
+      "**Reasoning:**\n"
+      f"1. Similar transaction analysis:\n   - {queries} queries run\n"
+      f"2. Risk factors identified:\n   - {reason}\n"
+      f"3. Final rationale:\n   - Confidence level: {level}\n\n"
+      "Would you like to provide feedback on this decision?"
+  )
+
+
+class ScriptedLlm(BaseLlm):
+  """Deterministic model for benchmarking the agent tree offline.
+
+  Attributes:
+      latency_ms: Simulated model latency per call; 0 measures the tools and
+          the framework alone.
+  """
+
+  model: str = "scripted"
+  latency_ms: float = 0.0
+
+  async def generate_content_async(
+      self, llm_request: LlmRequest, stream: bool = False
+  ) -> AsyncGenerator[LlmResponse, None]:
+    if self.latency_ms:
+      await asyncio.sleep(self.latency_ms / 1000)
+    conversation = _Conversation(llm_request)
+    parts = self._respond(conversation)
+    prompt = (llm_request.config.system_instruction or "") if llm_request.config else ""
+    prompt_tokens = estimate_tokens(str(prompt)) + sum(
+        estimate_tokens(content.model_dump_json(exclude_none=True)) for content in llm_request.contents or ()
+    )
+    if llm_request.config and llm_request.config.tools:
+      prompt_tokens += sum(estimate_tokens(tool.model_dump_json(exclude_none=True)) for tool in llm_request.config.tools)
+    output_tokens = sum(estimate_tokens(part.model_dump_json(exclude_none=True)) for part in parts)
+    yield LlmResponse(
+        content=types.Content(role="model", parts=parts),
+        usage_metadata=types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=output_tokens,
+            total_token_count=prompt_tokens + output_tokens,
+        ),
+    )
+
+  def _respond(self, conversation: _Conversation) -> List[types.Part]:
+    if conversation.schema == "TransactionDetails":
+      fields = parse_transaction(conversation.message)
+      return _say(json.dumps(_pick(fields, _TRANSACTION_FIELDS)))
+    if conversation.schema == "AnalysisResult":
+      return _say(json.dumps({
+          "agent_name": "llm_reviewer", "decision": "Review",
+          "reason": "Scripted reviewer", "confidence_score": 0.5,
+      }))
+    if "screen_transaction" in conversation.tools:
+      return self._approval(conversation)
+    if "get_approval_status" in conversation.tools:
+      return self._analysis(conversation)
+    return self._root(conversation)
+
+  def _transfer(self, conversation: _Conversation, own: Optional[str]) -> Optional[List[types.Part]]:
+    target = _route(conversation.message)
+    if target and target != own and "transfer_to_agent" in conversation.tools and not conversation.results:
+      return [_call("transfer_to_agent", agent_name=target)]
+    return None
+
+  def _root(self, conversation: _Conversation) -> List[types.Part]:
+    return self._transfer(conversation, None) or _say(
+        "I'm TriNetra. I can evaluate transactions for approval, record your feedback "
+        "on my decisions and answer questions about historical transactions."
+    )
+
+  def _analysis(self, conversation: _Conversation) -> List[types.Part]:
+    transfer = self._transfer(conversation, ANALYSIS_AGENT)
+    if transfer:
+      return transfer
+    if "get_approval_status" not in conversation.results:
+      return [_call("get_approval_status")]
+    result = conversation.results["get_approval_status"][-1]
+    return _say(f"Here is what the data shows:\n{json.dumps(result)[:500]}")
+
+  def _approval(self, conversation: _Conversation) -> List[types.Part]:
+    transfer = self._transfer(conversation, APPROVAL_AGENT)
+    if transfer:
+      return transfer
+    fields = parse_transaction(conversation.message)
+    if not fields:
+      return self._feedback(conversation)
+    results = conversation.results
+    if "screen_transaction" not in results:
+      return [_call("screen_transaction", **_pick(fields, _TRANSACTION_FIELDS))]
+    screen = results["screen_transaction"][-1]
+    if screen.get("decisive"):
+      return _say(_decision_text(screen["decision"], screen.get("confidence_score", 0), screen.get("reason", ""), 1))
+    summaries = results.get("summarize_similar_transactions")
+    if summaries is None:
+      calls = []
+      for names in _QUERY_STRATEGY:
+        query = _pick(fields, names)
+        if query:
+          calls.append(_call("summarize_similar_transactions", **query))
+      if fields.get("payer_id"):
+        calls.append(_call(
+            "get_entity_profile", entity_id=fields["payer_id"], entity_type="payer",
+            **_pick(fields, ("payment_amount", "payment_currency")),
+        ))
+        calls.append(_call("get_payment_velocity", **_pick(fields, ("payer_id", "payee_id"))))
+      if fields.get("payee_id"):
+        calls.append(_call("check_payee", **_pick(fields, ("payee_id", "payer_id"))))
+      if calls:
+        return calls
+      summaries = []
+    support = sum(summary.get("total_similar_transactions") or 0 for summary in summaries)
+    nearest = results.get("find_nearest_transactions")
+    if support < MIN_SUPPORT and nearest is None:
+      return [_call("find_nearest_transactions", **_pick(fields, _SEARCH_FIELDS))]
+    decision, confidence, reason = decide(screen, summaries, nearest[-1] if nearest else None)
+    queries = sum(len(values) for values in results.values())
+    return _say(_decision_text(decision, confidence, reason, queries))
+
+  def _feedback(self, conversation: _Conversation) -> List[types.Part]:
+    decisions = _DECISION.findall(conversation.history)
+    transaction = next(
+        (fields for fields in map(parse_transaction, reversed(conversation.earlier)) if fields), None
+    )
+    user_decision = normalize_decision(conversation.message)
+    if not decisions or transaction is None or not _FEEDBACK.search(conversation.message):
+      return _say("Please share the transaction details you'd like me to evaluate.")
+    agent_decision = _LABELS[normalize_decision(decisions[-1])]
+    if "insert_transaction_feedback" not in conversation.results:
+      return [_call(
+          "insert_transaction_feedback",
+          agent_decision=agent_decision,
+          user_decision=_LABELS[user_decision] if user_decision else agent_decision,
+          feedback_notes=conversation.message,
+          **_pick(transaction, _TRANSACTION_FIELDS),
+      )]
+    return _say("Thank you for your feedback! I've recorded your assessment.")
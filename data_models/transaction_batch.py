@@ -0,0 +1,301 @@
+"""Columnar batches of transactions and analysis results.
+
+`Transaction` and `AnalysisResult` validate one object at a time, so large
+batches spend most of their time on per-object overhead. The batch types
+here hold one NumPy array per field and validate each column as a whole:
+numeric and timestamp parsing, required fields, the currency and decision
+enums and the confidence_score range. Convert to and from the row models
+only at API boundaries.
+"""
+
+import warnings
+from dataclasses import dataclass
+from datetime import timezone
+from typing import Any, ClassVar, Dict, Iterable, List, Mapping, Optional, Sequence, Type
+
+import numpy as np
+from pydantic import BaseModel
+
+from .transaction_models import AnalysisResult, Transaction
+
+SUPPORTED_CURRENCIES = frozenset({"USD", "EUR", "GBP", "JPY", "CAD", "AUD", "BRL", "CNY", "INR"})
+
+DECISIONS = frozenset({"Approve", "Reject", "Review"})
+
+# Row indices listed per error in messages; `count` always covers all of them.
+_MAX_LISTED_ROWS = 10
+
+
+@dataclass(frozen=True)
+class ColumnError:
+    """A validation failure shared by some rows of one column."""
+    field: str
+    type: str
+    rows: np.ndarray
+
+    @property
+    def count(self) -> int:
+        return len(self.rows)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "field": self.field,
+            "type": self.type,
+            "count": self.count,
+            "rows": self.rows[:_MAX_LISTED_ROWS].tolist(),
+        }
+
+
+class BatchValidationError(ValueError):
+    """Raised by `validate()` when any column fails validation."""
+
+    def __init__(self, errors: Sequence[ColumnError]):
+        self.errors = list(errors)
+        summary = "; ".join(f"{e.field}: {e.type} ({e.count} rows)" for e in self.errors)
+        super().__init__(f"Batch validation failed: {summary}")
+
+
+def _object_column(values: Any, size: int) -> np.ndarray:
+    if values is None:
+        return np.full(size, None, dtype=object)
+    column = np.empty(len(values), dtype=object)
+    column[:] = list(values) if not isinstance(values, np.ndarray) else values
+    return column
+
+
+def _string_column(values: Any, size: int) -> np.ndarray:
+    """Object array of str/None; non-null non-str values are converted with str()."""
+    column = _object_column(values, size)
+    # map(type, ...) runs in C; only the (usually zero) non-str values are converted.
+    types = np.fromiter(map(type, column), dtype=object, count=len(column))
+    convert = (types != str) & (column != None)  # noqa: E711 -- elementwise comparison
+    if convert.any():
+        column[convert] = column[convert].astype(str)
+    return column
+
+
+def _float_column(values: Any, size: int) -> tuple:
+    """Return (float array with NaN for nulls, rows that failed to parse)."""
+    if values is None:
+        return np.full(size, np.nan), np.empty(0, dtype=np.intp)
+    try:
+        return np.asarray(values, dtype=float), np.empty(0, dtype=np.intp)
+    except (TypeError, ValueError):
+        pass
+    # Slow path, only for columns holding something unparseable.
+    column = np.full(len(values), np.nan)
+    bad = []
+    for position, value in enumerate(values):
+        try:
+            column[position] = np.nan if value is None else float(value)
+        except (TypeError, ValueError):
+            bad.append(position)
+    return column, np.asarray(bad, dtype=np.intp)
+
+
+def _datetime_column(values: Any, size: int) -> tuple:
+    """Return (UTC datetime64[ms] array with NaT for nulls, rows that failed to parse)."""
+    if values is None:
+        return np.full(size, np.datetime64("NaT"), dtype="datetime64[ms]"), np.empty(0, dtype=np.intp)
+    with warnings.catch_warnings():
+        # NumPy converts UTC offsets but warns that datetime64 has no timezone.
+        warnings.simplefilter("ignore", UserWarning)
+        try:
+            return np.asarray(values, dtype="datetime64[ms]"), np.empty(0, dtype=np.intp)
+        except (TypeError, ValueError):
+            pass
+        column = np.full(len(values), np.datetime64("NaT"), dtype="datetime64[ms]")
+        bad = []
+        for position, value in enumerate(values):
+            try:
+                column[position] = np.datetime64("NaT") if value is None else np.datetime64(value, "ms")
+            except (TypeError, ValueError):
+                bad.append(position)
+    return column, np.asarray(bad, dtype=np.intp)
+
+
+def _missing(column: np.ndarray) -> np.ndarray:
+    if column.dtype.kind == "f":
+        return np.isnan(column)
+    if column.dtype.kind == "M":
+        return np.isnat(column)
+    return column == None  # noqa: E711 -- elementwise comparison
+
+
+class _ColumnarBatch:
+    """Column storage, validation and row-model conversion shared by the batch types."""
+
+    model: ClassVar[Type[BaseModel]]
+    float_fields: ClassVar[frozenset] = frozenset()
+    datetime_fields: ClassVar[frozenset] = frozenset()
+
+    def __init__(self, columns: Mapping[str, Any]):
+        sizes = {len(values) for values in columns.values() if values is not None}
+        if len(sizes) > 1:
+            raise ValueError(f"Columns have different lengths: {sorted(sizes)}")
+        self.size = sizes.pop() if sizes else 0
+        self.columns: Dict[str, np.ndarray] = {}
+        self.errors: List[ColumnError] = []
+        for name in self.model.model_fields:
+            values = columns.get(name)
+            if name in self.float_fields:
+                self.columns[name], bad = _float_column(values, self.size)
+                self._add_error(name, "float_parsing", bad)
+            elif name in self.datetime_fields:
+                self.columns[name], bad = _datetime_column(values, self.size)
+                self._add_error(name, "datetime_parsing", bad)
+            else:
+                self.columns[name] = _string_column(values, self.size)
+        self._check_columns()
+
+    def _add_error(self, field: str, kind: str, rows: np.ndarray) -> None:
+        if len(rows):
+            self.errors.append(ColumnError(field, kind, rows))
+
+    def _check_columns(self) -> None:
+        for name, info in self.model.model_fields.items():
+            if info.is_required():
+                self._add_error(name, "missing", np.flatnonzero(_missing(self.columns[name])))
+        self._check()
+
+    def _check(self) -> None:
+        """Subclass hook for column-level business rules."""
+
+    def _check_enum(self, field: str, allowed: Iterable[str]) -> None:
+        column = self.columns[field]
+        # One vectorized comparison per allowed value; the enums are small.
+        valid = _missing(column)
+        for value in allowed:
+            valid |= column == value
+        self._add_error(field, "enum", np.flatnonzero(~valid))
+
+    def __len__(self) -> int:
+        return self.size
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Mapping[str, Any]], **kwargs: Any) -> "_ColumnarBatch":
+        """Build a batch from dicts keyed by field name."""
+        return cls({name: [row.get(name) for row in rows] for name in cls.model.model_fields}, **kwargs)
+
+    @classmethod
+    def from_models(cls, models: Sequence[BaseModel], **kwargs: Any) -> "_ColumnarBatch":
+        """Build a batch from row models."""
+        return cls({name: [getattr(model, name) for model in models] for name in cls.model.model_fields}, **kwargs)
+
+    @classmethod
+    def from_arrow(cls, table: Any, **kwargs: Any) -> "_ColumnarBatch":
+        """Build a batch from a pyarrow Table (or RecordBatch) with matching column names."""
+        return cls(
+            {name: table.column(name).to_numpy(zero_copy_only=False)
+             for name in cls.model.model_fields if name in table.column_names},
+            **kwargs,
+        )
+
+    def valid_mask(self) -> np.ndarray:
+        """Boolean array, True for rows that passed every check."""
+        mask = np.ones(self.size, dtype=bool)
+        for error in self.errors:
+            mask[error.rows] = False
+        return mask
+
+    def validate(self) -> "_ColumnarBatch":
+        """Return the batch itself, or raise BatchValidationError."""
+        if self.errors:
+            raise BatchValidationError(self.errors)
+        return self
+
+    def filter(self, mask: np.ndarray) -> "_ColumnarBatch":
+        """Return a new batch of the rows selected by a boolean mask or index array.
+
+        The selected columns are re-checked; values that failed to parse are
+        already null and are reported as missing if the field is required.
+        """
+        batch = object.__new__(type(self))
+        batch.__dict__.update(self.__dict__)
+        batch.columns = {name: column[mask] for name, column in self.columns.items()}
+        batch.size = len(next(iter(batch.columns.values()), ()))
+        batch.errors = []
+        batch._check_columns()
+        return batch
+
+    def _python_column(self, name: str, iso_times: bool) -> List[Any]:
+        column = self.columns[name]
+        if column.dtype.kind == "f":
+            return np.where(np.isnan(column), None, column).tolist()
+        if column.dtype.kind == "M":
+            if iso_times:
+                text = np.datetime_as_string(column, unit="ms", timezone="UTC")
+                return np.where(np.isnat(column), None, text).tolist()
+            # datetime64 is naive; the values are UTC, as Transaction.model_validate would parse them.
+            return [
+                None if value is None else value.replace(tzinfo=timezone.utc)
+                for value in column.astype("datetime64[us]").tolist()
+            ]
+        return column.tolist()
+
+    def to_rows(self) -> List[Dict[str, Any]]:
+        """Dict rows with Python values; timestamps as ISO 8601 UTC strings."""
+        names = list(self.columns)
+        values = [self._python_column(name, iso_times=True) for name in names]
+        return [dict(zip(names, row)) for row in zip(*values)]
+
+    def to_models(self) -> List[BaseModel]:
+        """Row models; raises BatchValidationError if the batch is invalid.
+
+        The batch is already validated, so models are built without
+        re-running pydantic validation.
+        """
+        self.validate()
+        names = list(self.columns)
+        values = [self._python_column(name, iso_times=False) for name in names]
+        return [self.model.model_construct(**dict(zip(names, row))) for row in zip(*values)]
+
+    def to_arrow(self) -> Any:
+        """Return the batch as a pyarrow Table (requires pyarrow)."""
+        try:
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("Converting batches to Arrow requires pyarrow (pip install pyarrow)") from e
+        arrays = {}
+        for name, column in self.columns.items():
+            if column.dtype.kind == "M":
+                arrays[name] = pa.array(column, from_pandas=True).cast(pa.timestamp("ms", tz="UTC"))
+            elif column.dtype.kind == "f":
+                arrays[name] = pa.array(column, from_pandas=True)
+            else:
+                arrays[name] = pa.array(column, type=pa.string())
+        return pa.table(arrays)
+
+
+class TransactionBatch(_ColumnarBatch):
+    """Columnar batch of `Transaction`s.
+
+    payment_amount is float64 (NaN for null), payment_time is UTC
+    datetime64[ms] (NaT for null) and every other field is an object array
+    of str or None.
+    """
+
+    model = Transaction
+    float_fields = frozenset({"payment_amount"})
+    datetime_fields = frozenset({"payment_time"})
+
+    def __init__(self, columns: Mapping[str, Any], currencies: Optional[Iterable[str]] = None):
+        self.currencies = frozenset(currencies) if currencies is not None else SUPPORTED_CURRENCIES
+        super().__init__(columns)
+
+    def _check(self) -> None:
+        self._check_enum("payment_currency", self.currencies)
+
+
+class AnalysisResultBatch(_ColumnarBatch):
+    """Columnar batch of `AnalysisResult`s."""
+
+    model = AnalysisResult
+    float_fields = frozenset({"confidence_score"})
+
+    def _check(self) -> None:
+        self._check_enum("decision", DECISIONS)
+        score = self.columns["confidence_score"]
+        with np.errstate(invalid="ignore"):
+            out_of_range = (score < 0) | (score > 1)
+        self._add_error("confidence_score", "range", np.flatnonzero(out_of_range))
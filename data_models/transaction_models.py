@@ -21,6 +21,20 @@ class Transaction(BaseModel):
     reject_reason: Optional[str] = Field(None, description="The reason for rejection, if applicable.")
 
 
+class TransactionDetails(BaseModel):
+    """Transaction fields as described by a user; every field is optional."""
+    payer_id: Optional[str] = Field(None, description="The ID of the entity making the payment.")
+    payee_id: Optional[str] = Field(None, description="The ID of the entity receiving the payment.")
+    payment_amount: Optional[float] = Field(None, description="The amount of the payment.")
+    payment_currency: Optional[str] = Field(None, description="The currency of the payment (e.g., USD, EUR).")
+    payment_method: Optional[str] = Field(None, description="The method used for the payment (e.g., Credit Card, Bank Transfer).")
+    payment_purpose: Optional[str] = Field(None, description="The stated purpose of the payment.")
+    vendor_id: Optional[str] = Field(None, description="The ID of the vendor involved in the transaction.")
+    payee_country: Optional[str] = Field(None, description="The country of the payee.")
+    vendor_country: Optional[str] = Field(None, description="The country of the vendor.")
+    vendor_industry: Optional[str] = Field(None, description="The industry of the vendor.")
+
+
 class AnalysisResult(BaseModel):
     """A model for the result of a single analysis agent."""
     agent_name: str = Field(..., description="The name of the agent that produced this result.")
@@ -0,0 +1,179 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Command-line entry points for TriNetra.
+
+    python main.py batch Dataset/transactions.csv -o decisions.jsonl --concurrency 32 --llm
+    python main.py ingest Dataset/transactions.csv --time-reference Dataset/transactions.xlsx
+    python main.py traces traces.jsonl
+    python main.py bench -o bench.json --dataset-rows 200 --baseline previous.json
+    python main.py prompts
+    python main.py startup
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+
+
+def _batch(args: argparse.Namespace) -> None:
+  from orchestrator_agent.batch import LlmReviewer, default_evaluator, run_batch
+
+  evaluator = default_evaluator(
+      llm_reviewer=LlmReviewer() if args.llm else None,
+      escalation_threshold=args.escalation_threshold,
+  )
+  report = asyncio.run(
+      run_batch(
+          args.input,
+          args.output,
+          evaluator=evaluator,
+          concurrency=args.concurrency,
+          max_retries=args.max_retries,
+      )
+  )
+  print(json.dumps({**report.as_dict(), "tiering": evaluator.stats.as_dict()}, indent=2))
+
+
+def _ingest(args: argparse.Namespace) -> None:
+  from orchestrator_agent.ingest import ingest
+
+  report = ingest(
+      args.sources,
+      chunk_size=args.chunk_size,
+      time_reference=args.time_reference,
+      skip_existing=not args.no_skip_existing,
+      rejects_path=args.rejects,
+  )
+  print(json.dumps(report.as_dict(), indent=2))
+
+
+def _traces(args: argparse.Namespace) -> None:
+  from orchestrator_agent.tracing import summarize_trace_file
+
+  print(json.dumps(summarize_trace_file(args.path), indent=2))
+
+
+def _bench(args: argparse.Namespace) -> None:
+  from benchmarks.harness import compare_reports, run_benchmark
+  from benchmarks.scenarios import dataset_scenarios, load_prompt_scenarios
+  from orchestrator_agent.config import get_config
+  from orchestrator_agent.store.dataset import read_dataset
+
+  # Per-call INFO logging would dominate the timings.
+  logging.getLogger().setLevel(logging.WARNING)
+  scenarios = [] if args.no_prompts else load_prompt_scenarios()
+  if args.dataset_rows:
+    rows = (row for path in get_config().local_dataset_paths for row in read_dataset(path))
+    scenarios += dataset_scenarios(rows, args.dataset_rows, seed=args.seed)
+  report = asyncio.run(
+      run_benchmark(
+          scenarios * args.repeat,
+          concurrency=args.concurrency,
+          model_latency_ms=args.model_latency_ms,
+          warmup=args.warmup,
+          trace_memory=args.trace_memory,
+      )
+  )
+  with open(args.output, "w", encoding="utf-8") as f:
+    json.dump(report, f, indent=2, default=str)
+  summary = {key: value for key, value in report.items() if key != "turns"}
+  if args.baseline:
+    with open(args.baseline, encoding="utf-8") as f:
+      summary["comparison"] = compare_reports(json.load(f), report)
+  print(json.dumps(summary, indent=2, default=str))
+
+
+def _prompts(args: argparse.Namespace) -> None:
+  from orchestrator_agent.prompts.assembly import prompt_token_sizes
+
+  print(json.dumps(prompt_token_sizes(), indent=2))
+
+
+def _startup(args: argparse.Namespace) -> None:
+  from benchmarks.startup import DEFAULT_TARGETS, profile_startup
+
+  print(json.dumps(profile_startup(args.targets or DEFAULT_TARGETS, limit=args.top), indent=2))
+
+
+def main() -> None:
+  parser = argparse.ArgumentParser(description="TriNetra transaction approval")
+  subcommands = parser.add_subparsers(dest="command", required=True)
+
+  batch = subcommands.add_parser("batch", help="Evaluate a CSV/XLSX/Parquet file of transactions")
+  batch.add_argument("input", help="Path to the transactions file")
+  batch.add_argument("-o", "--output", default="decisions.jsonl",
+                     help="JSON Lines output; rerunning resumes from it")
+  batch.add_argument("--concurrency", type=int, default=16)
+  batch.add_argument("--max-retries", type=int, default=5)
+  batch.add_argument("--llm", action="store_true",
+                     help="Also consult the LLM reviewer on low-confidence transactions")
+  batch.add_argument("--escalation-threshold", type=float,
+                     help="Rules + history confidence below which the LLM reviewer is consulted")
+  batch.set_defaults(handler=_batch)
+
+  ingest = subcommands.add_parser("ingest", help="Load CSV/XLSX files into the configured store")
+  ingest.add_argument("sources", nargs="+", help="Dataset files, loaded in order")
+  ingest.add_argument("--chunk-size", type=int, default=5000)
+  ingest.add_argument("--time-reference", action="append",
+                      help="File with full payment_times to repair truncated ones (repeatable; "
+                           "defaults to TRINETRA_TIME_REFERENCE_PATHS)")
+  ingest.add_argument("--no-skip-existing", action="store_true",
+                      help="Do not skip transaction_ids already in the store")
+  ingest.add_argument("--rejects", help="Append rejected rows to this JSON Lines file")
+  ingest.set_defaults(handler=_ingest)
+
+  traces = subcommands.add_parser("traces", help="Summarize p50/p95/p99 latency per stage from a trace file")
+  traces.add_argument("path", help="OTLP/JSON Lines file written via TRINETRA_TRACE_FILE")
+  traces.set_defaults(handler=_traces)
+
+  bench = subcommands.add_parser(
+      "bench", help="Replay sample prompts and dataset rows through the agents with a scripted model"
+  )
+  bench.add_argument("-o", "--output", default="bench.json", help="JSON report, including every turn")
+  bench.add_argument("--dataset-rows", type=int, default=100,
+                     help="Labelled rows of the local dataset to replay as prompts")
+  bench.add_argument("--no-prompts", action="store_true", help="Skip the sample_prompts.md scenarios")
+  bench.add_argument("--seed", type=int, default=0, help="Seed for the dataset row sample")
+  bench.add_argument("--repeat", type=int, default=1)
+  bench.add_argument("--concurrency", type=int, default=1)
+  bench.add_argument("--model-latency-ms", type=float, default=0.0,
+                     help="Simulated latency of every model call")
+  bench.add_argument("--warmup", type=int, default=1, help="Scenarios replayed untimed first")
+  bench.add_argument("--trace-memory", action="store_true",
+                     help="Also report the peak Python heap (slower)")
+  bench.add_argument("--baseline", help="Earlier report to compare against")
+  bench.set_defaults(handler=_bench)
+
+  prompts = subcommands.add_parser(
+      "prompts", help="Estimate the token size of each agent's instruction, static prefix and sections"
+  )
+  prompts.set_defaults(handler=_prompts)
+
+  startup = subcommands.add_parser(
+      "startup", help="Profile the import time of the package entry points, without credentials"
+  )
+  startup.add_argument("targets", nargs="*",
+                       help="Modules to import, optionally module:attribute (default: the entry points)")
+  startup.add_argument("--top", type=int, default=8, help="Slowest dependencies listed per target")
+  startup.set_defaults(handler=_startup)
+
+  args = parser.parse_args()
+  logging.basicConfig(level=logging.INFO)
+  args.handler(args)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,27 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""TriNetra orchestrator agent.
+
+Importing the package loads nothing else; `app` and `root_agent` are built
+from `agent.py` on first access, which is when ADK's loader asks for them.
+Batch jobs and tools import their own modules without loading ADK agents.
+"""
+
+
+def __getattr__(name):
+  if name in ("app", "root_agent"):
+    from . import agent
+    return getattr(agent, name)
+  raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
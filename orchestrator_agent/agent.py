@@ -12,187 +12,164 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+"""The TriNetra agent tree, built on first access.
+
+ADK's loader reads `app` (or `root_agent`) from this module. Both are
+provided by the module `__getattr__`, so importing the module builds no
+agents, and the BigQuery toolset (and with it credential discovery) is only
+built when an agent first lists its tools (see toolsets.py).
+"""
+
 import logging
-import google.auth
+import threading
+from typing import Optional
 
 from google.adk.agents import Agent
+from google.adk.agents.context_cache_config import ContextCacheConfig
+from google.adk.apps import App
 from google.adk.tools import FunctionTool
-from google.adk.tools.bigquery import BigQueryCredentialsConfig, BigQueryToolset
-from google.adk.tools.bigquery.config import BigQueryToolConfig, WriteMode
 
-from .prompts.prompts import (
-    ROOT_AGENT_INSTRUCTION,
-    ANALYSIS_AGENT_INSTRUCTION,
-    TRANSACTION_APPROVAL_AGENT_INSTRUCTION
+from .prompts.assembly import (
+    ROOT_PROMPT,
+    ANALYSIS_PROMPT,
+    APPROVAL_PROMPT,
+    feedback_callbacks,
 )
-from .tools import get_approval_status, get_similar_transactions, insert_transaction_feedback
+from .async_tools import (
+    check_payee,
+    find_nearest_transactions,
+    get_approval_status,
+    get_entity_profile,
+    get_payment_velocity,
+    get_similar_transactions,
+    insert_transaction_feedback,
+    screen_transaction,
+    summarize_similar_transactions,
+    warm_derived_state,
+)
+from .config import get_config
+from .reviewers import build_review_panel
+from .tiering import tiered_callbacks
+from .toolsets import LazyToolset, build_bigquery_toolset
+from .tracing import adk_callbacks, combine_callbacks
 
 logger = logging.getLogger('google_adk.' + __name__)
 
-# email_drafting_agent = SequentialAgent(
-#     name="email_drafting_agent",
-#     description="Drafts and sends an email announcement.",
-#     sub_agents=[
-#         Agent(
-#             name="email_drafter",
-#             model="gemini-2.5-flash",
-#             instruction=EMAIL_DRAFTER_INSTRUCTION,
-#             output_key="drafted_email"
-#         ),
-#         Agent(
-#             name="email_publisher",
-#             model="gemini-2.5-flash",
-#             instruction=EMAIL_PUBLISHER_INSTRUCTION,
-#             output_key="email_publication_result",
-#             tools=[
-#                 publish_email_announcement,
-#                 # The gmail_mcp_tool shows an example MCP setup.
-#                 # MCP Tools can be used to integrate with email providers that have MCP servers.
-#                 # Users can uncomment if they connect their own MCP credentials and configs.
-#                 # gmail_mcp_tool,
-#             ]
-#         )
-#     ]
-# )
-#
-# slack_drafting_agent = SequentialAgent(
-#     name="slack_drafting_agent",
-#     description="Drafts and sends a Slack message to multiple channels.",
-#     sub_agents=[
-#         Agent(
-#             name="slack_drafter",
-#             model="gemini-2.5-flash",
-#             instruction=SLACK_DRAFTER_INSTRUCTION,
-#             output_key="drafted_slack_message"
-#         ),
-#         Agent(
-#             name="slack_publisher",
-#             model="gemini-2.5-flash",
-#             instruction=SLACK_PUBLISHER_INSTRUCTION,
-#             output_key="slack_publication_result",
-#             tools=[
-#                 publish_slack_message,
-#                 # The slack_mcp_tool shows an example MCP setup.
-#                 # MCP Tools can be used to integrate with Slack.
-#                 # Users can uncomment if they connect their own MCP credentials and configs.
-#                 # slack_mcp_tool,
-#             ]
-#         )
-#     ]
-# )
-#
-# calendar_creation_agent = SequentialAgent(
-#     name="calendar_creation_agent",
-#     description="Creates a Google Calendar event.",
-#     sub_agents=[
-#         Agent(
-#             name="event_details_extractor",
-#             model="gemini-2.5-flash",
-#             instruction=EVENT_DETAILS_EXTRACTOR_INSTRUCTION,
-#             output_key="event_details"
-#         ),
-#         Agent(
-#             name="calendar_publisher",
-#             model="gemini-2.5-flash",
-#             instruction=CALENDAR_PUBLISHER_INSTRUCTION,
-#             output_key="calendar_creation_result",
-#             tools=[
-#                 create_calendar_event,
-#                 # The calendar_mcp_tool shows an example MCP setup.
-#                 # MCP Tools can be used to integrate with calendar services.
-#                 # Users can uncomment if they connect their own MCP credentials and configs.
-#                 # calendar_mcp_tool,
-#             ]
-#         )
-#     ]
-# )
-#
-# broadcast_agent = ParallelAgent(
-#     name="broadcast_agent",
-#     description="Broadcasts the announcement to email, Slack, and Google Calendar simultaneously.",
-#     sub_agents=[
-#         email_drafting_agent,
-#         slack_drafting_agent,
-#         calendar_creation_agent
-#     ]
-# )
-#
-# summary_agent = LlmAgent(
-#     name="summary_agent",
-#     model="gemini-2.5-flash",
-#     instruction=SUMMARY_AGENT_INSTRUCTION,
-#     description="Summarizes the results of the broadcast.",
-# )
-#
-#
-# main_flow_agent = SequentialAgent(
-#     name="main_flow_agent",
-#     description="Handles the main flow of enhancing the message and broadcasting it.",
-#     sub_agents=[
-#         Agent(
-#             name="message_enhancer",
-#             description="Enhances the user's message to make it more detailed and informative.",
-#             model="gemini-2.5-flash",
-#             instruction=MESSAGE_ENHANCER_INSTRUCTION,
-#             tools=[google_search],
-#             output_key="enhanced_message"
-#         ),
-#         broadcast_agent,
-#         summary_agent
-#     ]
-# )
-
-# Configure BigQuery toolset with read-only access
-tool_config = BigQueryToolConfig(write_mode=WriteMode.BLOCKED)
-
-application_default_credentials, _ = google.auth.default()
-credentials_config = BigQueryCredentialsConfig(
-    credentials=application_default_credentials
-)
 
-bigquery_toolset = BigQueryToolset(
-    credentials_config=credentials_config, bigquery_tool_config=tool_config
-)
+def build_root_agent() -> Agent:
+  """Build the root orchestrator agent and its sub-agents."""
+  config = get_config()
 
-# Wrap the custom functions in FunctionTool
-get_approval_status_tool = FunctionTool(get_approval_status)
-get_similar_transactions_tool = FunctionTool(get_similar_transactions)
-insert_transaction_feedback_tool = FunctionTool(insert_transaction_feedback)
-
-# Analysis agent with BigQuery access
-analysis_agent = Agent(
-    model="gemini-2.5-pro",
-    name="analysis_agent",
-    description="Agent to answer questions about BigQuery and SQL queries",
-    instruction=ANALYSIS_AGENT_INSTRUCTION,
-    tools=[
-        get_approval_status_tool,
-        bigquery_toolset
-    ],
-)
+  # BigQuery toolset with read-only access, shared by both agents
+  bigquery_toolset = LazyToolset(build_bigquery_toolset)
 
-# Transaction approval agent
-transaction_approval_agent = Agent(
-    model="gemini-2.5-pro",
-    name="transaction_approval_agent",
-    description="Agent to evaluate transactions and determine if they should be approved or rejected, and collect user feedback",
-    instruction=TRANSACTION_APPROVAL_AGENT_INSTRUCTION,
-    tools=[
-        get_similar_transactions_tool,
-        insert_transaction_feedback_tool,
-        bigquery_toolset
-    ],
-)
+  # Wrap the custom functions in FunctionTool (store-backed tools are async)
+  get_approval_status_tool = FunctionTool(get_approval_status)
+  get_similar_transactions_tool = FunctionTool(get_similar_transactions)
+  summarize_similar_transactions_tool = FunctionTool(summarize_similar_transactions)
+  get_entity_profile_tool = FunctionTool(get_entity_profile)
+  get_payment_velocity_tool = FunctionTool(get_payment_velocity)
+  check_payee_tool = FunctionTool(check_payee)
+  find_nearest_transactions_tool = FunctionTool(find_nearest_transactions)
+  insert_transaction_feedback_tool = FunctionTool(insert_transaction_feedback)
+  screen_transaction_tool = FunctionTool(screen_transaction)
+
+  # Analysis agent with BigQuery access; escalates to the larger model after a tool error
+  analysis_agent = Agent(
+      model=config.cheap_model,
+      name="analysis_agent",
+      description="Agent to answer questions about BigQuery and SQL queries",
+      **ANALYSIS_PROMPT.agent_kwargs(),
+      tools=[
+          get_approval_status_tool,
+          bigquery_toolset
+      ],
+      **tiered_callbacks("analysis"),
+  )
+
+  # Transaction approval agent; decisions the rules and history do not settle
+  # with confidence escalate to the larger model (see tiering.py). Its feedback
+  # instructions are only sent while a decision awaits feedback (see prompts/assembly.py)
+  transaction_approval_agent = Agent(
+      model=config.cheap_model,
+      name="transaction_approval_agent",
+      description="Agent to evaluate transactions and determine if they should be approved or rejected, and collect user feedback",
+      **APPROVAL_PROMPT.agent_kwargs(),
+      tools=[
+          screen_transaction_tool,
+          summarize_similar_transactions_tool,
+          get_entity_profile_tool,
+          get_payment_velocity_tool,
+          check_payee_tool,
+          find_nearest_transactions_tool,
+          get_similar_transactions_tool,
+          insert_transaction_feedback_tool,
+          bigquery_toolset
+      ],
+      **combine_callbacks(tiered_callbacks("decision"), feedback_callbacks()),
+  )
+
+  # Parallel synthetic review panel (rules, history and LLM reviewers)
+  parallel_review_agent = build_review_panel()
+
+  # Root orchestrator agent
+  return Agent(
+      name="orchestrator_root_agent",
+      description="TriNetra: Your Agent",
+      model="gemini-2.5-flash",
+      **ROOT_PROMPT.agent_kwargs(),
+      sub_agents=[
+          analysis_agent,
+          transaction_approval_agent,
+          parallel_review_agent
+      ],
+      **adk_callbacks(),
+  )
+
+
+def build_app() -> App:
+  """Wrap a new agent tree in an App with the configured context cache."""
+  config = get_config()
+  # The static instructions are sent first, so together with the tool
+  # declarations they form a prefix that can be cached across turns
+  return App(
+      name="orchestrator_agent",
+      root_agent=build_root_agent(),
+      context_cache_config=ContextCacheConfig(
+          ttl_seconds=config.context_cache_ttl,
+          min_tokens=config.context_cache_min_tokens,
+      ) if config.context_cache else None,
+  )
+
+
+_app: Optional[App] = None
+_app_lock = threading.Lock()
+
+
+def get_app() -> App:
+  """Return the process-wide App, building the agent tree on first use.
+
+  Building it also starts warm_derived_state() in the background (unless
+  TRINETRA_WARM_START is off).
+  """
+  global _app
+  if _app is None:
+    with _app_lock:
+      if _app is None:
+        _app = build_app()
+        if get_config().warm_start:
+          warm_derived_state()
+  return _app
+
+
+def get_root_agent() -> Agent:
+  """Return the process-wide root agent."""
+  return get_app().root_agent
 
-# Root orchestrator agent
-root_agent = Agent(
-    name="orchestrator_root_agent",
-    description="TriNetra: Your Agent",
-    model="gemini-2.5-flash",
-    instruction=ROOT_AGENT_INSTRUCTION,
-    sub_agents=[
-        analysis_agent,
-        transaction_approval_agent
-    ]
-)
 
+def __getattr__(name):
+  if name == "app":
+    return get_app()
+  if name == "root_agent":
+    return get_root_agent()
+  raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
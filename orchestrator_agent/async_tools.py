@@ -0,0 +1,137 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Asyncio versions of the store-backed tools.
+
+ADK calls synchronous tools directly on the event loop, so a BigQuery round
+trip in one tool stalls every other session and agent in the process. The
+coroutines here run the blocking work on a bounded thread pool instead. They
+keep the names, signatures and docstrings of the functions in `tools.py`, so
+the function declarations the model sees are unchanged.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from . import tools
+from .config import get_config
+from .knn import get_neighbour_index
+from .payee_registry import get_payee_registry
+from .profiles import get_profile_store
+from .store import TRANSACTION_COLUMNS, TransactionStore, get_transaction_store
+from .velocity import get_velocity_tracker
+
+logger = logging.getLogger('google_adk.' + __name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_tool_executor() -> ThreadPoolExecutor:
+  """Return the shared executor, sized to the BigQuery connection pool by default."""
+  global _executor
+  if _executor is None:
+    with _executor_lock:
+      if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=max(1, get_config().tool_workers), thread_name_prefix="trinetra-tool"
+        )
+  return _executor
+
+
+async def run_blocking(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+  """Run `func` on the tool executor and await its result.
+
+  The caller's context variables (e.g. the current tracing span) are visible to `func`.
+  """
+  loop = asyncio.get_running_loop()
+  context = contextvars.copy_context()
+  return await loop.run_in_executor(
+      get_tool_executor(), functools.partial(context.run, func, *args, **kwargs)
+  )
+
+
+def to_async_tool(func: Callable[..., str]) -> Callable[..., Awaitable[str]]:
+  """Wrap a blocking tool as a coroutine with the same name, signature and docstring."""
+
+  @functools.wraps(func)
+  async def wrapper(*args: Any, **kwargs: Any) -> str:
+    return await run_blocking(func, *args, **kwargs)
+
+  return wrapper
+
+
+get_approval_status = to_async_tool(tools.get_approval_status)
+check_payee = to_async_tool(tools.check_payee)
+find_nearest_transactions = to_async_tool(tools.find_nearest_transactions)
+get_entity_profile = to_async_tool(tools.get_entity_profile)
+get_payment_velocity = to_async_tool(tools.get_payment_velocity)
+get_similar_transactions = to_async_tool(tools.get_similar_transactions)
+insert_transaction_feedback = to_async_tool(tools.insert_transaction_feedback)
+screen_transaction = to_async_tool(tools.screen_transaction)
+summarize_similar_transactions = to_async_tool(tools.summarize_similar_transactions)
+
+
+def _warm() -> None:
+  for build in (get_payee_registry, get_profile_store, get_velocity_tracker, get_neighbour_index):
+    try:
+      build()
+    except Exception as e:
+      # The tool that needs it retries on first use and reports the error there.
+      logger.warning(f"Could not build {build.__name__.removeprefix('get_')} at startup: {e}")
+
+
+def warm_derived_state() -> Future:
+  """Start building the payee registry, profiles, velocity tracker and neighbour index.
+
+  Each reads the Transactions table once when first used; doing that on
+  the tool executor at startup keeps the scans off the event loop and out
+  of the first screened transaction's latency.
+  """
+  return get_tool_executor().submit(_warm)
+
+
+async def find_similar_many(
+    probes: Sequence[Dict[str, Any]],
+    store: Optional[TransactionStore] = None,
+    limit: int = 100,
+    columns: Sequence[str] = TRANSACTION_COLUMNS,
+) -> List[List[Dict[str, Any]]]:
+  """Issue several similarity lookups concurrently.
+
+  Args:
+      probes: Dicts with "filters" and an optional "payment_amount".
+      store: Store to query; defaults to the shared store.
+      limit: Maximum rows per probe.
+      columns: Columns to select.
+
+  Returns:
+      One result list per probe, in probe order.
+  """
+  store = store or get_transaction_store()
+  return list(await asyncio.gather(*(
+      run_blocking(
+          store.find_similar_transactions,
+          probe["filters"],
+          payment_amount=probe.get("payment_amount"),
+          limit=limit,
+          columns=columns,
+      )
+      for probe in probes
+  )))
@@ -0,0 +1,281 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Bulk evaluation of transactions without the chat loop.
+
+Transactions are read lazily from a CSV/XLSX/Parquet file (or taken from a
+list of `Transaction` models), evaluated by a bounded pool of workers and
+streamed to a JSON Lines output file as each decision completes. The output
+file doubles as the checkpoint: rerunning with the same output skips every
+transaction_id already written.
+
+Each transaction is first screened by the rule engine. Decisive verdicts are
+written directly; the rest are scored against history and aggregated as in
+the review panel. With an LLM reviewer, only transactions whose aggregate
+confidence is below the escalation threshold are sent to it (see `tiering`).
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, Iterable, Iterator, Optional, Sequence, Union
+
+from data_models.transaction_models import AnalysisResult, Transaction, TransactionDetails
+from .rules import RuleEngine, default_engine
+from .store import TransactionStore
+from .store.dataset import read_dataset
+from .tiering import TieredEvaluator
+
+if TYPE_CHECKING:
+  from google.adk.runners import InMemoryRunner
+
+logger = logging.getLogger('google_adk.' + __name__)
+
+Evaluator = Callable[[Dict[str, Any]], Awaitable[AnalysisResult]]
+
+_APP_NAME = "trinetra_batch"
+
+
+def read_parquet(path: str, batch_size: int = 10000) -> Iterator[Dict[str, Any]]:
+  """Yield rows from a Parquet file in record batches."""
+  try:
+    import pyarrow.parquet as pq
+  except ImportError as e:
+    raise ImportError("Reading Parquet requires pyarrow (pip install pyarrow)") from e
+  for record_batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+    yield from record_batch.to_pylist()
+
+
+def iter_records(source: Union[str, Iterable[Union[Transaction, Dict[str, Any]]]]) -> Iterator[Dict[str, Any]]:
+  """Yield transaction dicts from a dataset path or an iterable of models/dicts."""
+  if isinstance(source, str):
+    if source.lower().endswith(".parquet"):
+      yield from read_parquet(source)
+    else:
+      yield from read_dataset(source)
+    return
+  for record in source:
+    yield record.model_dump() if isinstance(record, Transaction) else dict(record)
+
+
+def is_rate_limited(error: BaseException) -> bool:
+  """Return True for quota / rate-limit errors from Gemini or Google APIs."""
+  code = getattr(error, "code", None)
+  if code in (429, "429", "RESOURCE_EXHAUSTED"):
+    return True
+  message = str(error)
+  return "429" in message or "RESOURCE_EXHAUSTED" in message or "Too Many Requests" in message
+
+
+class LlmReviewer:
+  """Runs the LLM reviewer on a structured transaction, with no extraction turn."""
+
+  def __init__(self, runner: Optional["InMemoryRunner"] = None):
+    # ADK is imported here so rules-only batches start without loading it.
+    from google.adk.runners import InMemoryRunner
+    from .reviewers import build_llm_reviewer
+
+    self.runner = runner or InMemoryRunner(agent=build_llm_reviewer(), app_name=_APP_NAME)
+
+  async def __call__(self, record: Dict[str, Any]) -> AnalysisResult:
+    from google.genai import types
+    from .reviewers import TRANSACTION_STATE_KEY
+
+    details = TransactionDetails.model_validate(
+        {k: v for k, v in record.items() if k in TransactionDetails.model_fields}
+    )
+    session = await self.runner.session_service.create_session(
+        app_name=self.runner.app_name,
+        user_id="batch",
+        state={TRANSACTION_STATE_KEY: details.model_dump(exclude_none=True)},
+    )
+    message = types.Content(role="user", parts=[types.Part(text="Review the transaction.")])
+    async for _ in self.runner.run_async(user_id="batch", session_id=session.id, new_message=message):
+      pass
+    session = await self.runner.session_service.get_session(
+        app_name=self.runner.app_name, user_id="batch", session_id=session.id
+    )
+    await self.runner.session_service.delete_session(
+        app_name=self.runner.app_name, user_id="batch", session_id=session.id
+    )
+    return AnalysisResult.model_validate(session.state[self.runner.agent.output_key])
+
+
+def default_evaluator(
+    engine: RuleEngine = default_engine,
+    store: Optional[TransactionStore] = None,
+    llm_reviewer: Optional[Evaluator] = None,
+    escalation_threshold: Optional[float] = None,
+) -> TieredEvaluator:
+  """Build the rules -> history (-> LLM) evaluator used by run_batch.
+
+  The LLM reviewer is only consulted for transactions whose rules + history
+  confidence is below `escalation_threshold` (default
+  `config.escalation_threshold`); the returned evaluator's `stats` report
+  how many were escalated.
+  """
+  return TieredEvaluator(engine, store, escalate=llm_reviewer, threshold=escalation_threshold)
+
+
+@dataclass
+class BatchReport:
+  """Outcome counters for one run_batch call."""
+  evaluated: int = 0
+  resumed: int = 0
+  failed: int = 0
+  retries: int = 0
+  decisions: Counter = field(default_factory=Counter)
+  elapsed_seconds: float = 0.0
+
+  @property
+  def throughput(self) -> float:
+    """Evaluated transactions per second."""
+    return self.evaluated / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+  def as_dict(self) -> Dict[str, Any]:
+    return {
+        "evaluated": self.evaluated,
+        "resumed": self.resumed,
+        "failed": self.failed,
+        "retries": self.retries,
+        "decisions": dict(self.decisions),
+        "elapsed_seconds": round(self.elapsed_seconds, 3),
+        "transactions_per_second": round(self.throughput, 2),
+    }
+
+
+def _completed_ids(output_path: str) -> set:
+  done = set()
+  if not os.path.exists(output_path):
+    return done
+  with open(output_path, encoding="utf-8") as f:
+    for line in f:
+      try:
+        done.add(json.loads(line)["transaction_id"])
+      except (ValueError, KeyError):
+        # A torn final line from an interrupted run; that record is redone.
+        continue
+  return done
+
+
+async def run_batch(
+    source: Union[str, Iterable[Union[Transaction, Dict[str, Any]]]],
+    output_path: str,
+    evaluator: Optional[Evaluator] = None,
+    concurrency: int = 16,
+    max_retries: int = 5,
+    backoff_seconds: float = 1.0,
+    max_backoff_seconds: float = 60.0,
+) -> BatchReport:
+  """Evaluate transactions and stream decisions to a JSON Lines file.
+
+  Args:
+      source: Path to a CSV/XLSX/Parquet file, or an iterable of Transaction
+          models / row dicts.
+      output_path: JSON Lines output; also used as the resume checkpoint.
+      evaluator: Async callable returning an AnalysisResult for a row dict.
+          Defaults to default_evaluator().
+      concurrency: Maximum number of transactions evaluated at once.
+      max_retries: Retries per transaction for rate-limit errors.
+      backoff_seconds: Initial retry delay, doubled (with jitter) per attempt.
+      max_backoff_seconds: Upper bound on a single retry delay.
+
+  Returns:
+      A BatchReport with counts, decision totals and throughput.
+  """
+  evaluator = evaluator or default_evaluator()
+  report = BatchReport()
+  done = _completed_ids(output_path)
+  queue: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue(maxsize=concurrency * 2)
+  write_lock = asyncio.Lock()
+  start = time.perf_counter()
+
+  with open(output_path, "a", encoding="utf-8") as output:
+
+    async def evaluate_with_retries(record: Dict[str, Any]) -> Dict[str, Any]:
+      attempt = 0
+      while True:
+        started = time.perf_counter()
+        try:
+          result = await evaluator(record)
+          return {
+              **result.model_dump(),
+              "latency_ms": round((time.perf_counter() - started) * 1000, 3),
+              "attempts": attempt + 1,
+          }
+        except Exception as e:
+          if attempt >= max_retries or not is_rate_limited(e):
+            raise
+          delay = min(max_backoff_seconds, backoff_seconds * 2 ** attempt)
+          delay *= random.uniform(0.5, 1.0)
+          attempt += 1
+          report.retries += 1
+          logger.info(f"Rate limited; retrying in {delay:.1f}s (attempt {attempt})")
+          await asyncio.sleep(delay)
+
+    async def worker() -> None:
+      while True:
+        record = await queue.get()
+        if record is None:
+          return
+        line = {"transaction_id": record["transaction_id"]}
+        if record.get("approval_status"):
+          # Keep the labelled outcome alongside the decision for evaluation.
+          line["expected_status"] = record["approval_status"]
+        try:
+          line.update(await evaluate_with_retries(record))
+          report.evaluated += 1
+          report.decisions[line["decision"]] += 1
+        except Exception as e:
+          logger.warning(f"Failed to evaluate {record['transaction_id']}: {e}")
+          report.failed += 1
+          continue
+        async with write_lock:
+          output.write(json.dumps(line, default=str) + "\n")
+          output.flush()
+
+    workers = [asyncio.create_task(worker()) for _ in range(max(1, concurrency))]
+    try:
+      for position, record in enumerate(iter_records(source)):
+        # Positional ids keep resume working for inputs without ids.
+        if not record.get("transaction_id"):
+          record["transaction_id"] = f"row-{position}"
+        if record["transaction_id"] in done:
+          report.resumed += 1
+          continue
+        await queue.put(record)
+      for _ in workers:
+        await queue.put(None)
+      await asyncio.gather(*workers)
+    finally:
+      for task in workers:
+        task.cancel()
+
+  report.elapsed_seconds = time.perf_counter() - start
+  logger.info(f"Batch evaluation finished: {report.as_dict()}")
+  return report
+
+
+def evaluate_transactions(
+    transactions: Sequence[Transaction],
+    output_path: str,
+    **kwargs: Any,
+) -> BatchReport:
+  """Synchronous wrapper around run_batch for a list of Transaction models."""
+  return asyncio.run(run_batch(transactions, output_path, **kwargs))
@@ -0,0 +1,266 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Process-wide BigQuery client shared by all tool calls.
+
+Building a `bigquery.Client` resolves credentials and opens a new HTTP
+session, which is far more expensive than the queries the tools run. The
+manager below builds one client on first use, backs it with a pooled
+`AuthorizedSession` (credentials refresh lazily on the first request after
+expiry) and records how much time goes to setup versus query execution.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import google.auth
+from google.auth.credentials import Credentials
+from google.auth.transport.requests import AuthorizedSession
+from google.cloud import bigquery
+from requests.adapters import HTTPAdapter
+
+from .config import get_config
+from .tracing import get_tracer
+
+logger = logging.getLogger('google_adk.' + __name__)
+
+_BIGQUERY_SCOPES = ("https://www.googleapis.com/auth/cloud-platform",)
+
+_credentials: Optional[Tuple[Credentials, Optional[str]]] = None
+_credentials_lock = threading.Lock()
+
+
+def get_credentials() -> Tuple[Credentials, Optional[str]]:
+  """Return the process-wide application default credentials and their project.
+
+  Looked up on the first call, never at import: discovery can take seconds
+  and fails on machines without credentials.
+  """
+  global _credentials
+  if _credentials is None:
+    with _credentials_lock:
+      if _credentials is None:
+        get_config()  # loads .env, which may set GOOGLE_APPLICATION_CREDENTIALS
+        start = time.perf_counter()
+        _credentials = google.auth.default(scopes=_BIGQUERY_SCOPES)
+        logger.info(f"Resolved application default credentials in {time.perf_counter() - start:.3f}s")
+  return _credentials
+
+
+def set_credentials(credentials: Optional[Credentials], project: Optional[str] = None) -> None:
+  """Replace the process-wide credentials (None resets to application default credentials)."""
+  global _credentials
+  with _credentials_lock:
+    _credentials = (credentials, project) if credentials is not None else None
+
+
+class ClientStats:
+  """Thread-safe counters for client setup, query, insert and load job time."""
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self.setup_count = 0
+    self.setup_seconds = 0.0
+    self.query_count = 0
+    self.query_seconds = 0.0
+    self.insert_count = 0
+    self.insert_seconds = 0.0
+    self.load_count = 0
+    self.load_seconds = 0.0
+    self.error_count = 0
+
+  def record(self, kind: str, seconds: float, error: bool = False) -> None:
+    with self._lock:
+      setattr(self, f"{kind}_count", getattr(self, f"{kind}_count") + 1)
+      setattr(self, f"{kind}_seconds", getattr(self, f"{kind}_seconds") + seconds)
+      if error:
+        self.error_count += 1
+
+  def as_dict(self) -> Dict[str, Any]:
+    with self._lock:
+      return {
+          "setup_count": self.setup_count,
+          "setup_seconds": round(self.setup_seconds, 6),
+          "query_count": self.query_count,
+          "query_seconds": round(self.query_seconds, 6),
+          "insert_count": self.insert_count,
+          "insert_seconds": round(self.insert_seconds, 6),
+          "load_count": self.load_count,
+          "load_seconds": round(self.load_seconds, 6),
+          "error_count": self.error_count,
+      }
+
+
+class BigQueryClientManager:
+  """Owns a single lazily-built BigQuery client with a pooled HTTP session."""
+
+  def __init__(
+      self,
+      project: Optional[str] = None,
+      pool_size: int = 10,
+      timeout: Optional[float] = 30.0,
+  ):
+    self.project = project
+    self.pool_size = pool_size
+    self.timeout = timeout
+    self.stats = ClientStats()
+    self._lock = threading.Lock()
+    self._client: Optional[bigquery.Client] = None
+
+  @property
+  def client(self) -> bigquery.Client:
+    """Return the shared client, building it on first access."""
+    client = self._client
+    if client is not None:
+      return client
+    with self._lock:
+      if self._client is None:
+        self._client = self._build_client()
+      return self._client
+
+  def _build_client(self) -> bigquery.Client:
+    start = time.perf_counter()
+    try:
+      # Credentials are only resolved here; AuthorizedSession refreshes the
+      # token on demand so there is no eager refresh round trip.
+      credentials, default_project = get_credentials()
+      session = AuthorizedSession(credentials)
+      adapter = HTTPAdapter(
+          pool_connections=self.pool_size, pool_maxsize=self.pool_size
+      )
+      session.mount("https://", adapter)
+      client = bigquery.Client(
+          project=self.project or default_project,
+          credentials=credentials,
+          _http=session,
+      )
+    except Exception:
+      self.stats.record("setup", time.perf_counter() - start, error=True)
+      raise
+    elapsed = time.perf_counter() - start
+    self.stats.record("setup", elapsed)
+    logger.info(f"Created shared BigQuery client in {elapsed:.3f}s")
+    return client
+
+  def run_query(
+      self,
+      query: str,
+      job_config: Optional[bigquery.QueryJobConfig] = None,
+      timeout: Optional[float] = None,
+  ) -> bigquery.table.RowIterator:
+    """Run a query on the shared client and wait for its results.
+
+    Args:
+        query: SQL text to execute.
+        job_config: Optional job configuration (e.g. query parameters).
+        timeout: Seconds to wait for each API call; defaults to the manager timeout.
+
+    Returns:
+        The completed query's row iterator.
+    """
+    client = self.client
+    timeout = self.timeout if timeout is None else timeout
+    start = time.perf_counter()
+    with get_tracer().span("bigquery.query", "query") as span:
+      try:
+        query_job = client.query(query, job_config=job_config, timeout=timeout)
+        span.set(job_id=query_job.job_id)
+        results = query_job.result(timeout=timeout)
+      except Exception:
+        self.stats.record("query", time.perf_counter() - start, error=True)
+        raise
+      span.set(
+          rows=results.total_rows,
+          bytes_processed=query_job.total_bytes_processed,
+          bytes_billed=query_job.total_bytes_billed,
+          cache_hit=query_job.cache_hit,
+          slot_millis=query_job.slot_millis,
+      )
+    self.stats.record("query", time.perf_counter() - start)
+    return results
+
+  def insert_rows_json(
+      self,
+      table_id: str,
+      rows: List[Dict[str, Any]],
+      timeout: Optional[float] = None,
+      **kwargs: Any,
+  ) -> List[Dict[str, Any]]:
+    """Stream rows into a table on the shared client, returning any row errors."""
+    client = self.client
+    timeout = self.timeout if timeout is None else timeout
+    start = time.perf_counter()
+    try:
+      with get_tracer().span("bigquery.insert", "query", rows=len(rows)):
+        errors = client.insert_rows_json(table_id, rows, timeout=timeout, **kwargs)
+    except Exception:
+      self.stats.record("insert", time.perf_counter() - start, error=True)
+      raise
+    self.stats.record("insert", time.perf_counter() - start, error=bool(errors))
+    return errors
+
+  def load_rows_json(
+      self,
+      table_id: str,
+      rows: List[Dict[str, Any]],
+      job_config: Optional[bigquery.LoadJobConfig] = None,
+      timeout: Optional[float] = None,
+  ) -> bigquery.LoadJob:
+    """Append rows to a table with a load job on the shared client and wait for it."""
+    client = self.client
+    timeout = self.timeout if timeout is None else timeout
+    start = time.perf_counter()
+    try:
+      with get_tracer().span("bigquery.load", "query", rows=len(rows)) as span:
+        load_job = client.load_table_from_json(rows, table_id, job_config=job_config, timeout=timeout)
+        span.set(job_id=load_job.job_id)
+        load_job.result(timeout=timeout)
+    except Exception:
+      self.stats.record("load", time.perf_counter() - start, error=True)
+      raise
+    self.stats.record("load", time.perf_counter() - start)
+    return load_job
+
+  def close(self) -> None:
+    """Close the pooled session; the next call builds a fresh client."""
+    with self._lock:
+      if self._client is not None:
+        self._client.close()
+        self._client = None
+
+
+_manager: Optional[BigQueryClientManager] = None
+_manager_lock = threading.Lock()
+
+
+def get_client_manager() -> BigQueryClientManager:
+  """Return the process-wide BigQuery client manager."""
+  global _manager
+  if _manager is None:
+    with _manager_lock:
+      if _manager is None:
+        config = get_config()
+        _manager = BigQueryClientManager(
+            project=config.project_id,
+            pool_size=config.bigquery_pool_size,
+            timeout=config.bigquery_query_timeout,
+        )
+  return _manager
+
+
+def get_client_stats() -> Dict[str, Any]:
+  """Return setup versus query timing counters for the shared client."""
+  return get_client_manager().stats.as_dict()
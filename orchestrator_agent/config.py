@@ -14,12 +14,37 @@
 
 import os
 import logging
-from dotenv import load_dotenv
+import threading
+from typing import Optional
 
-load_dotenv()
+from dotenv import load_dotenv
 
 logger = logging.getLogger('google_adk.' + __name__)
 
+DEFAULT_DATASET_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'Dataset',
+    'datasets_uc6-tri-netra_Tri-Netra Sample-DataSet-transactions_data[51][10].csv',
+)
+
+# The same transactions as the CSV, with the full payment_times the CSV lost.
+DEFAULT_TIME_REFERENCE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'Dataset',
+    'datasets_uc6-tri-netra_Tri-Netra_Sample_Dataset_Payer_25pct_Above_Currency_Avg.xlsx',
+)
+
+# Runtime state written by the service, under the repository root whatever the working directory.
+DEFAULT_DEAD_LETTER_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    'var',
+    'feedback_dead_letter.jsonl',
+)
+
+DEFAULT_FX_RATES_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), 'data', 'fx_rates.csv'
+)
+
 
 class Config:
     """Configuration class for orchestrator agent."""
@@ -29,12 +54,107 @@ class Config:
         self.location = os.getenv('GOOGLE_CLOUD_LOCATION', 'us-central1')
         self.use_vertexai = os.getenv('GOOGLE_GENAI_USE_VERTEXAI', 'True').lower() == 'true'
 
-        if not self.project_id:
+        # BigQuery client pooling and timeouts
+        self.bigquery_pool_size = int(os.getenv('BIGQUERY_POOL_SIZE', '10'))
+        self.bigquery_query_timeout = float(os.getenv('BIGQUERY_QUERY_TIMEOUT', '30'))
+
+        # Transaction storage backend: 'bigquery' or 'sqlite' (local, in-process)
+        self.store_backend = os.getenv('TRINETRA_STORE', 'bigquery').lower()
+        self.transactions_table = os.getenv(
+            'TRINETRA_TRANSACTIONS_TABLE', 'ccibt-hack25ww7-746.Tri_Netra.Transactions'
+        )
+        self.feedback_table = os.getenv(
+            'TRINETRA_FEEDBACK_TABLE', 'ccibt-hack25ww7-746.Tri_Netra.Transaction_Feedback'
+        )
+        self.sqlite_path = os.getenv('TRINETRA_SQLITE_PATH', ':memory:')
+        self.local_dataset_paths = [
+            path for path in os.getenv('TRINETRA_DATASET_PATHS', DEFAULT_DATASET_PATH).split(os.pathsep)
+            if path
+        ]
+        # Files whose full payment_times repair truncated ones on ingest and local seeding
+        self.time_reference_paths = [
+            path for path in os.getenv('TRINETRA_TIME_REFERENCE_PATHS', DEFAULT_TIME_REFERENCE_PATH).split(os.pathsep)
+            if path
+        ]
+        self.similarity_index = os.getenv('TRINETRA_SIMILARITY_INDEX', 'False').lower() == 'true'
+        # Similarity index layout: 'bitmap' (fastest lookups) or 'compact' (fixed bytes per row)
+        self.index_layout = os.getenv('TRINETRA_INDEX_LAYOUT', 'bitmap').lower()
+
+        # Result cache for similarity/rejection reads (size 0 disables it)
+        self.cache_size = int(os.getenv('TRINETRA_CACHE_SIZE', '1024'))
+        self.cache_ttl = float(os.getenv('TRINETRA_CACHE_TTL', '300'))
+
+        # Feedback is queued and written in background batches unless disabled
+        self.feedback_buffered = os.getenv('TRINETRA_FEEDBACK_BUFFERED', 'True').lower() == 'true'
+        self.feedback_batch_size = int(os.getenv('TRINETRA_FEEDBACK_BATCH_SIZE', '50'))
+        self.feedback_flush_interval = float(os.getenv('TRINETRA_FEEDBACK_FLUSH_SECONDS', '2'))
+        # Feedback writes that keep failing are saved here and replayed (empty drops them)
+        self.feedback_dead_letter_path = os.getenv('TRINETRA_FEEDBACK_DEAD_LETTER', DEFAULT_DEAD_LETTER_PATH)
+
+        # Tool response encoding: 'compact' (tabular, minified) or 'json' (pretty-printed)
+        self.response_format = os.getenv('TRINETRA_RESPONSE_FORMAT', 'compact').lower()
+        self.response_max_text = int(os.getenv('TRINETRA_RESPONSE_MAX_TEXT', '120'))
+
+        # Worker threads running blocking store calls for the async tools
+        self.tool_workers = int(os.getenv('TRINETRA_TOOL_WORKERS', str(self.bigquery_pool_size)))
+        # Build the payee registry, profiles, velocity and neighbour index on those threads
+        # as soon as the app is loaded, instead of in the first tool call that needs them
+        self.warm_start = os.getenv('TRINETRA_WARM_START', 'True').lower() == 'true'
+
+        # Currency -> USD rate table used for USD-equivalent amount checks
+        self.fx_rates_path = os.getenv('TRINETRA_FX_RATES', DEFAULT_FX_RATES_PATH)
+
+        # Known-payee registry: 'set' (exact) or 'bloom' (fixed memory, rare false "known")
+        self.payee_registry_mode = os.getenv('TRINETRA_PAYEE_REGISTRY', 'set').lower()
+        self.payee_registry_capacity = int(os.getenv('TRINETRA_PAYEE_REGISTRY_CAPACITY', '1000000'))
+
+        # Nearest-neighbour index: IVF lists (0 = sqrt(rows)), lists scanned per query,
+        # and the store size below which every query is an exact scan
+        self.knn_lists = int(os.getenv('TRINETRA_KNN_LISTS', '0'))
+        self.knn_probes = int(os.getenv('TRINETRA_KNN_PROBES', '16'))
+        self.knn_exact_below = int(os.getenv('TRINETRA_KNN_EXACT_BELOW', '50000'))
+
+        # Latency tracing: spans per agent turn, model call, tool call, query and serialization,
+        # exported as OTLP/JSON to a JSONL file and/or an OTLP/HTTP collector when set
+        self.tracing = os.getenv('TRINETRA_TRACING', 'True').lower() == 'true'
+        self.trace_file = os.getenv('TRINETRA_TRACE_FILE', '')
+        self.otlp_endpoint = os.getenv('TRINETRA_OTLP_ENDPOINT', '')
+
+        # Model tiering: decisions run on the cheap model and are escalated to the
+        # escalation model only when the cheap assessment's confidence is below the threshold
+        self.cheap_model = os.getenv('TRINETRA_CHEAP_MODEL', 'gemini-2.5-flash')
+        self.escalation_model = os.getenv('TRINETRA_ESCALATION_MODEL', 'gemini-2.5-pro')
+        self.escalation_threshold = float(os.getenv('TRINETRA_ESCALATION_THRESHOLD', '0.8'))
+
+        # Context caching of each agent's static instruction prefix, tools and early turns
+        self.context_cache = os.getenv('TRINETRA_CONTEXT_CACHE', 'True').lower() == 'true'
+        self.context_cache_ttl = int(os.getenv('TRINETRA_CONTEXT_CACHE_TTL', '1800'))
+        self.context_cache_min_tokens = int(os.getenv('TRINETRA_CONTEXT_CACHE_MIN_TOKENS', '2048'))
+
+        if not self.project_id and self.store_backend == 'bigquery':
             logger.warning(
                 "GOOGLE_CLOUD_PROJECT environment variable not set. "
                 "BigQuery operations may fail."
             )
 
 
-# Create singleton config instance
-config = Config()
+_config: Optional[Config] = None
+_config_lock = threading.Lock()
+
+
+def get_config() -> Config:
+    """Return the process-wide config, reading .env into the environment on first use."""
+    global _config
+    if _config is None:
+        with _config_lock:
+            if _config is None:
+                load_dotenv()
+                _config = Config()
+    return _config
+
+
+def __getattr__(name):
+    # `from .config import config` still works; it builds the config on access.
+    if name == 'config':
+        return get_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
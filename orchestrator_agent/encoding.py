@@ -0,0 +1,133 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Encoding of tool responses for the model's context window.
+
+Tool results are read by the model, so their size is prompt tokens on every
+later turn. The "compact" format writes JSON without whitespace, turns every
+list of row dicts into a table (`{"columns": [...], "rows": [[...], ...]}`)
+so each key appears once instead of once per row, and truncates long text.
+The "json" format reproduces the original pretty-printed output. Both add a
+`response_tokens` estimate to dict responses and keep per-tool totals.
+"""
+
+import json
+import logging
+import math
+import threading
+from typing import Any, Dict, Optional
+
+from .config import get_config
+from .tracing import get_tracer
+
+logger = logging.getLogger('google_adk.' + __name__)
+
+FORMATS = ("compact", "json")
+
+# Rough characters per token for JSON-heavy text with Gemini tokenizers.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+  """Approximate token count of `text`."""
+  return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+class ResponseEncoder:
+  """Serializes tool payloads in the configured format and tracks their size.
+
+  Attributes:
+      format: "compact" or "json".
+      max_text_length: Strings longer than this are truncated in compact
+          output (0 disables truncation).
+  """
+
+  def __init__(self, format: str = "compact", max_text_length: int = 120):
+    if format not in FORMATS:
+      raise ValueError(f"Unknown response format: {format}")
+    self.format = format
+    self.max_text_length = max_text_length
+    self._lock = threading.Lock()
+    self._stats: Dict[str, Dict[str, int]] = {}
+
+  def _compact(self, value: Any) -> Any:
+    if isinstance(value, list):
+      if value and all(isinstance(item, dict) for item in value):
+        columns = list(dict.fromkeys(key for row in value for key in row))
+        return {
+            "columns": columns,
+            "rows": [[self._compact(row.get(column)) for column in columns] for row in value],
+        }
+      return [self._compact(item) for item in value]
+    if isinstance(value, dict):
+      return {key: self._compact(item) for key, item in value.items()}
+    if isinstance(value, str) and self.max_text_length and len(value) > self.max_text_length:
+      return value[:self.max_text_length - 1] + "…"
+    return value
+
+  def _dumps(self, payload: Any) -> str:
+    if self.format == "json":
+      return json.dumps(payload, indent=2, default=str)
+    return json.dumps(payload, separators=(",", ":"), default=str, ensure_ascii=False)
+
+  def encode(self, payload: Any, tool: Optional[str] = None) -> str:
+    """Serialize a tool payload, adding `response_tokens` when it is a dict."""
+    with get_tracer().span("encode_response", "serialization", tool=tool, format=self.format) as span:
+      if self.format == "compact":
+        payload = self._compact(payload)
+      text = self._dumps(payload)
+      tokens = estimate_tokens(text)
+      if isinstance(payload, dict):
+        payload = dict(payload, response_tokens=tokens)
+        text = self._dumps(payload)
+      span.set(chars=len(text), response_tokens=tokens)
+    self._record(tool or "unknown", len(text), tokens)
+    return text
+
+  def _record(self, tool: str, chars: int, tokens: int) -> None:
+    with self._lock:
+      stats = self._stats.setdefault(tool, {"responses": 0, "chars": 0, "tokens": 0, "max_tokens": 0})
+      stats["responses"] += 1
+      stats["chars"] += chars
+      stats["tokens"] += tokens
+      stats["max_tokens"] = max(stats["max_tokens"], tokens)
+    logger.debug(f"{tool} response: {chars} chars, ~{tokens} tokens ({self.format})")
+
+  def stats(self) -> Dict[str, Dict[str, Any]]:
+    """Per-tool response counts and character/token totals."""
+    with self._lock:
+      return {
+          tool: dict(stats, mean_tokens=round(stats["tokens"] / stats["responses"], 1))
+          for tool, stats in self._stats.items()
+      }
+
+
+_default_encoder: Optional[ResponseEncoder] = None
+_default_encoder_lock = threading.Lock()
+
+
+def get_default_encoder() -> ResponseEncoder:
+  """Return the process-wide encoder, with the format from the config."""
+  global _default_encoder
+  if _default_encoder is None:
+    with _default_encoder_lock:
+      if _default_encoder is None:
+        config = get_config()
+        _default_encoder = ResponseEncoder(config.response_format, config.response_max_text)
+  return _default_encoder
+
+
+def encode_response(payload: Any, tool: Optional[str] = None) -> str:
+  """Encode a tool payload with the configured default encoder."""
+  return get_default_encoder().encode(payload, tool)
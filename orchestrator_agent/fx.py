@@ -0,0 +1,102 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Normalization of payment amounts to their USD equivalent.
+
+Rates come from a local CSV table (`config.fx_rates_path`, TRINETRA_FX_RATES)
+with `currency,usd_per_unit` rows. Converting a batch is vectorized: the
+currency column is factorized with numpy, the handful of distinct currencies
+are looked up once, and the amounts are multiplied by the gathered rates, so
+no Python code runs per row. Amounts in a currency without a rate, and NULL
+amounts, convert to NaN.
+"""
+
+import csv
+import logging
+import math
+import threading
+from typing import Any, Dict, Mapping, Optional, Sequence
+
+import numpy as np
+
+from .config import get_config
+
+logger = logging.getLogger('google_adk.' + __name__)
+
+BASE_CURRENCY = "USD"
+
+
+class FxTable:
+  """USD value of one unit of each currency."""
+
+  def __init__(self, rates: Mapping[str, float]):
+    self.rates: Dict[str, float] = {currency.upper(): float(rate) for currency, rate in rates.items()}
+    self.rates.setdefault(BASE_CURRENCY, 1.0)
+
+  @classmethod
+  def from_file(cls, path: str) -> "FxTable":
+    """Load a `currency,usd_per_unit` CSV; lines starting with '#' are ignored."""
+    with open(path, newline="", encoding="utf-8") as f:
+      lines = (line for line in f if not line.lstrip().startswith("#"))
+      rates = {
+          row["currency"].strip(): float(row["usd_per_unit"])
+          for row in csv.DictReader(lines)
+          if row.get("currency") and row.get("usd_per_unit")
+      }
+    return cls(rates)
+
+  def rate(self, currency: Optional[str]) -> float:
+    """USD per unit of `currency`, or NaN if it has no rate."""
+    if not currency:
+      return math.nan
+    return self.rates.get(currency.strip().upper(), math.nan)
+
+  def to_usd(self, amount: Optional[float], currency: Optional[str]) -> Optional[float]:
+    """Convert one amount; None if the amount is missing or the currency has no rate."""
+    if amount is None:
+      return None
+    usd = float(amount) * self.rate(currency)
+    return None if math.isnan(usd) else usd
+
+  def to_usd_array(self, amounts: Sequence[Any], currencies: Sequence[Any]) -> np.ndarray:
+    """Convert a column of amounts in a parallel column of currencies to USD."""
+    values = np.asarray(amounts, dtype=float)
+    if not len(values):
+      return values
+    names, codes = np.unique(np.asarray(currencies, dtype=object).astype(str), return_inverse=True)
+    rates = np.array([self.rate(name) for name in names], dtype=float)
+    return values * rates[codes.reshape(-1)]
+
+
+_table: Optional[FxTable] = None
+_table_lock = threading.Lock()
+
+
+def get_fx_table() -> FxTable:
+  """Return the process-wide rate table, loaded from `config.fx_rates_path` on first use."""
+  global _table
+  if _table is None:
+    with _table_lock:
+      if _table is None:
+        path = get_config().fx_rates_path
+        _table = FxTable.from_file(path)
+        logger.info(f"Loaded {len(_table.rates)} FX rates from {path}")
+  return _table
+
+
+def set_fx_table(table: Optional[FxTable]) -> None:
+  """Replace the process-wide rate table (None reloads it from the configured file)."""
+  global _table
+  with _table_lock:
+    _table = table
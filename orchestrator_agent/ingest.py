@@ -0,0 +1,247 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Streaming ingest of the CSV/XLSX transaction datasets into a store.
+
+Sources are read lazily and processed in chunks of `chunk_size` rows, so
+memory stays flat however large the files are. Each chunk is:
+
+1. Repaired: payment_time is rewritten as an ISO 8601 UTC timestamp. Excel
+   serials and epoch seconds are converted. Clock fragments such as "50:32.2"
+   (the CSV export lost the date and hour) are taken from a time reference
+   -- another source with full timestamps for the same transaction_id -- and
+   are otherwise unrecoverable.
+2. Validated column-wise as a `TransactionBatch` (currencies limited to those
+   with an FX rate); failing rows are counted by their first error and
+   optionally written to a rejects file.
+3. Deduplicated on transaction_id: the first valid occurrence wins, across
+   chunks and sources and, by default, against rows already in the store.
+4. Bulk-loaded with `store.load_rows()` (one SQLite transaction, or one
+   BigQuery load job per chunk) rather than row-by-row inserts.
+"""
+
+import itertools
+import json
+import logging
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from data_models.transaction_batch import TransactionBatch
+from .config import get_config
+from .fx import get_fx_table
+from .store import TransactionStore, get_transaction_store
+from .store.dataset import parse_timestamp, read_raw_dataset
+
+logger = logging.getLogger('google_adk.' + __name__)
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# "MM:SS" or "MM:SS.f": a timestamp whose date and hour were lost on export.
+_CLOCK_FRAGMENT = re.compile(r"^\d{1,2}:\d{2}(\.\d+)?$")
+
+
+@dataclass
+class IngestReport:
+  """Outcome counters for one ingest call."""
+  read: int = 0
+  loaded: int = 0
+  duplicates: int = 0
+  repaired_times: int = 0
+  rejected: Counter = field(default_factory=Counter)
+  chunks: int = 0
+  load_seconds: float = 0.0
+  elapsed_seconds: float = 0.0
+
+  @property
+  def throughput(self) -> float:
+    """Rows read per second, end to end."""
+    return self.read / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+  def as_dict(self) -> Dict[str, Any]:
+    return {
+        "read": self.read,
+        "loaded": self.loaded,
+        "duplicates": self.duplicates,
+        "repaired_times": self.repaired_times,
+        "rejected": dict(self.rejected),
+        "chunks": self.chunks,
+        "load_seconds": round(self.load_seconds, 3),
+        "elapsed_seconds": round(self.elapsed_seconds, 3),
+        "rows_per_second": round(self.throughput, 1),
+    }
+
+
+def _iso(timestamp: float) -> str:
+  # Millisecond precision hides float noise from Excel serial conversion.
+  return datetime.fromtimestamp(round(timestamp, 3), timezone.utc).isoformat()
+
+
+def repair_timestamp(value: Any, reference: Optional[str] = None) -> Tuple[Optional[str], bool]:
+  """Return (ISO 8601 UTC payment_time or None, whether it had to be repaired).
+
+  Args:
+      value: payment_time as read from the source.
+      reference: Known-good ISO timestamp for the same transaction, used when
+          `value` is missing or a clock fragment.
+  """
+  if isinstance(value, str):
+    value = value.strip() or None
+  timestamp = parse_timestamp(value)
+  if timestamp is not None:
+    is_iso = isinstance(value, datetime) or (isinstance(value, str) and "-" in value)
+    return _iso(timestamp), not is_iso
+  if reference is not None and (value is None or _CLOCK_FRAGMENT.match(str(value))):
+    return reference, True
+  return None, False
+
+
+def load_time_reference(paths: Iterable[str]) -> Dict[str, str]:
+  """Map transaction_id to a full ISO payment_time from sources that have one."""
+  reference: Dict[str, str] = {}
+  for path in paths:
+    for row in read_raw_dataset(path):
+      transaction_id = row.get("transaction_id")
+      timestamp = parse_timestamp(row.get("payment_time"))
+      if transaction_id and timestamp is not None:
+        reference.setdefault(str(transaction_id).strip(), _iso(timestamp))
+  return reference
+
+
+def _clean(row: Dict[str, Any]) -> Dict[str, Any]:
+  return {
+      column: (value.strip() or None) if isinstance(value, str) else value
+      for column, value in row.items()
+  }
+
+
+def _chunks(rows: Iterator[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+  while True:
+    chunk = list(itertools.islice(rows, size))
+    if not chunk:
+      return
+    yield chunk
+
+
+class _ChunkProcessor:
+  """Repairs, validates and deduplicates chunks, updating an IngestReport."""
+
+  def __init__(self, report: IngestReport, seen: set, reference: Dict[str, str], rejects: Optional[Any]):
+    self.report = report
+    self.seen = seen
+    self.reference = reference
+    self.rejects = rejects
+
+  def _reject(self, row: Dict[str, Any], reason: str) -> None:
+    self.report.rejected[reason] += 1
+    if self.rejects is not None:
+      self.rejects.write(json.dumps({"reason": reason, "row": row}, default=str) + "\n")
+
+  def process(self, chunk: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    candidates, sources, repairs = [], [], []
+    for raw in chunk:
+      row = _clean(raw)
+      transaction_id = row.get("transaction_id")
+      if transaction_id is not None:
+        transaction_id = row["transaction_id"] = str(transaction_id)
+      if transaction_id in self.seen:
+        self.report.duplicates += 1
+        continue
+      row["payment_time"], repaired = repair_timestamp(
+          row.get("payment_time"), self.reference.get(transaction_id)
+      )
+      if row["payment_time"] is None:
+        self._reject(raw, "payment_time: unrepairable")
+        continue
+      candidates.append(row)
+      sources.append(raw)
+      repairs.append(repaired)
+
+    batch = TransactionBatch.from_rows(candidates, currencies=get_fx_table().rates)
+    reasons: Dict[int, str] = {}
+    for error in batch.errors:
+      for position in error.rows.tolist():
+        reasons.setdefault(position, f"{error.field}: {error.type}")
+    for position in sorted(reasons):
+      self._reject(sources[position], reasons[position])
+
+    keep = []
+    for position, transaction_id in enumerate(batch.columns["transaction_id"].tolist()):
+      if position in reasons:
+        continue
+      if transaction_id in self.seen:
+        self.report.duplicates += 1
+        continue
+      self.seen.add(transaction_id)
+      self.report.repaired_times += repairs[position]
+      keep.append(position)
+    return batch.filter(np.asarray(keep, dtype=np.intp)).to_rows()
+
+
+def ingest(
+    sources: Sequence[str],
+    store: Optional[TransactionStore] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    time_reference: Optional[Sequence[str]] = None,
+    skip_existing: bool = True,
+    rejects_path: Optional[str] = None,
+) -> IngestReport:
+  """Stream CSV/XLSX sources into the store.
+
+  Args:
+      sources: Dataset files, processed in order.
+      store: Destination store; defaults to the shared store.
+      chunk_size: Rows read, validated and loaded at a time.
+      time_reference: Files whose full payment_times repair clock fragments
+          for the same transaction_id in `sources`; defaults to
+          `config.time_reference_paths` (the shipped XLSX).
+      skip_existing: Also skip transaction_ids already in the store.
+      rejects_path: If given, rejected rows are appended there as JSON Lines.
+
+  Returns:
+      The IngestReport, including rows per second.
+  """
+  store = store or get_transaction_store()
+  report = IngestReport()
+  start = time.perf_counter()
+  if time_reference is None:
+    time_reference = get_config().time_reference_paths
+  reference = load_time_reference(time_reference)
+  seen = set()
+  if skip_existing:
+    seen = {row["transaction_id"] for row in store.load_transaction_columns(["transaction_id"])}
+  rejects = open(rejects_path, "a", encoding="utf-8") if rejects_path else None
+  try:
+    processor = _ChunkProcessor(report, seen, reference, rejects)
+    for source in sources:
+      for chunk in _chunks(read_raw_dataset(source), chunk_size):
+        report.read += len(chunk)
+        report.chunks += 1
+        rows = processor.process(chunk)
+        if rows:
+          load_start = time.perf_counter()
+          report.loaded += store.load_rows(rows)
+          report.load_seconds += time.perf_counter() - load_start
+        logger.info(f"{source}: {report.read} rows read, {report.loaded} loaded")
+  finally:
+    if rejects is not None:
+      rejects.close()
+  report.elapsed_seconds = time.perf_counter() - start
+  logger.info(f"Ingest finished into {store.name}: {report.as_dict()}")
+  return report
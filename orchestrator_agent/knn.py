@@ -0,0 +1,403 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Nearest-neighbour retrieval of historical transactions.
+
+`get_similar_transactions` only returns rows matching every filter exactly,
+so a specific probe often finds nothing and has to be retried with fewer
+filters. `NeighbourIndex` instead ranks historical transactions by a
+weighted distance to the probe:
+
+- each categorical field contributes its weight in FIELD_WEIGHTS (squared)
+  when the values differ;
+- the amount contributes the difference of log1p(USD equivalent), so a
+  payment e times larger costs as much as an AMOUNT_WEIGHT field mismatch;
+- payment_time contributes the distance between the times of day on a
+  circle, so 23:50 is close to 00:10.
+
+Fields the probe leaves out are ignored. Rows live in a CompactRecordStore.
+Past `exact_below` rows, an IVF index narrows the scan: every row is encoded
+as a feature vector (one block of signed hashed one-hot slots per
+categorical field, plus the amount and time-of-day terms), k-means centroids
+are trained over those vectors, and each row is kept in the inverted list
+of its nearest centroid. A query scores only the rows in the `probes` lists
+nearest to it, and falls back to an exact scan when they hold fewer than k
+rows. Candidates are always scored exactly, on the stored field values, so
+hash collisions never affect the ranking.
+"""
+
+import hashlib
+import logging
+import math
+import threading
+from array import array
+from collections import defaultdict
+from typing import Any, Dict, Iterable, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .config import get_config
+from .fx import BASE_CURRENCY, get_fx_table
+from .store import TransactionStore, get_transaction_store
+from .store.dataset import parse_timestamp
+from .store.record_store import NULL_TIME, CompactRecordStore
+
+logger = logging.getLogger('google_adk.' + __name__)
+
+# Categorical fields compared, with the distance a mismatch costs.
+FIELD_WEIGHTS = {
+    "payer_id": 1.0,
+    "payee_id": 1.0,
+    "vendor_id": 0.7,
+    "vendor_industry": 0.8,
+    "payment_currency": 0.6,
+    "payee_country": 0.6,
+    "vendor_country": 0.4,
+    "payment_method": 0.4,
+}
+
+# Distance per unit of log1p(USD amount) difference.
+AMOUNT_WEIGHT = 1.0
+
+# Distance between opposite times of day (12 hours apart).
+TIME_WEIGHT = 0.3
+
+# Hashed one-hot slots per categorical field in the IVF feature vectors.
+SLOTS_PER_FIELD = 8
+
+# Columns returned for each neighbour.
+NEIGHBOUR_COLUMNS = [
+    "transaction_id",
+    "payment_time",
+    "payer_id",
+    "payee_id",
+    "payment_amount",
+    "payment_currency",
+    "payment_method",
+    "vendor_id",
+    "payee_country",
+    "vendor_country",
+    "vendor_industry",
+    "approval_status",
+    "reject_reason",
+]
+
+_DAY_MS = 24 * 3600 * 1000
+_KMEANS_ITERATIONS = 10
+_KMEANS_SAMPLE_PER_LIST = 32
+_ASSIGN_CHUNK = 8192
+
+
+def _hash_slot(field: str, value: Any) -> Tuple[int, float]:
+  digest = hashlib.blake2b(f"{field}={value}".encode("utf-8"), digest_size=8).digest()
+  hashed = int.from_bytes(digest, "little")
+  return hashed % SLOTS_PER_FIELD, 1.0 if hashed >> 63 else -1.0
+
+
+class FeatureEncoder:
+  """Encodes stored rows and probes as IVF feature vectors.
+
+  Each field's block is scaled so that a mismatch adds about the field's
+  squared weight to the squared distance, as in exact scoring.
+  """
+
+  def __init__(self):
+    self.dim = SLOTS_PER_FIELD * len(FIELD_WEIGHTS) + 3
+    # Per field: hashed slot and signed value of every dictionary code so far.
+    self._tables: Dict[str, Tuple[np.ndarray, np.ndarray]] = {
+        field: (np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.float32)) for field in FIELD_WEIGHTS
+    }
+
+  def _table(self, field: str, values: Sequence[Any]) -> Tuple[np.ndarray, np.ndarray]:
+    slots, signs = self._tables[field]
+    if len(slots) < len(values):
+      scale = FIELD_WEIGHTS[field] / math.sqrt(2)
+      hashed = [_hash_slot(field, value) for value in values[len(slots):]]
+      slots = np.concatenate([slots, np.array([slot for slot, _ in hashed], dtype=np.intp)])
+      signs = np.concatenate([signs, np.array([sign * scale for _, sign in hashed], dtype=np.float32)])
+      self._tables[field] = (slots, signs)
+    return slots, signs
+
+  def encode_records(self, records: CompactRecordStore, start: int, end: int) -> np.ndarray:
+    vectors = np.zeros((end - start, self.dim), dtype=np.float32)
+    rows = np.arange(end - start)
+    for block, field in enumerate(FIELD_WEIGHTS):
+      codes = records.column(field)[start:end].astype(np.intp)
+      slots, signs = self._table(field, records.dictionaries[field].values)
+      known = codes >= 0
+      vectors[rows[known], block * SLOTS_PER_FIELD + slots[codes[known]]] = signs[codes[known]]
+    amounts = records.column("payment_amount_usd")[start:end]
+    base = SLOTS_PER_FIELD * len(FIELD_WEIGHTS)
+    vectors[:, base] = AMOUNT_WEIGHT * np.log1p(np.nan_to_num(np.maximum(amounts, 0)))
+    times = records.column("payment_time")[start:end]
+    angles = 2 * np.pi * (times % _DAY_MS) / _DAY_MS
+    known = times != NULL_TIME
+    # Half the chord length, so opposite times are TIME_WEIGHT apart.
+    vectors[:, base + 1] = np.where(known, TIME_WEIGHT / 2 * np.cos(angles), 0)
+    vectors[:, base + 2] = np.where(known, TIME_WEIGHT / 2 * np.sin(angles), 0)
+    return vectors
+
+  def encode_probe(self, probe: "_Probe") -> Tuple[np.ndarray, np.ndarray]:
+    """Return (vector, mask of the dimensions the probe constrains)."""
+    vector = np.zeros(self.dim, dtype=np.float32)
+    mask = np.zeros(self.dim, dtype=bool)
+    for block, field in enumerate(FIELD_WEIGHTS):
+      if field in probe.fields:
+        slot, sign = _hash_slot(field, probe.fields[field])
+        vector[block * SLOTS_PER_FIELD + slot] = sign * FIELD_WEIGHTS[field] / math.sqrt(2)
+        mask[block * SLOTS_PER_FIELD:(block + 1) * SLOTS_PER_FIELD] = True
+    base = SLOTS_PER_FIELD * len(FIELD_WEIGHTS)
+    if probe.log_amount is not None:
+      vector[base] = AMOUNT_WEIGHT * probe.log_amount
+      mask[base] = True
+    if probe.angle is not None:
+      vector[base + 1] = TIME_WEIGHT / 2 * math.cos(probe.angle)
+      vector[base + 2] = TIME_WEIGHT / 2 * math.sin(probe.angle)
+      mask[base + 1:base + 3] = True
+    return vector, mask
+
+
+class _Probe:
+  """A query transaction reduced to the terms of the distance."""
+
+  def __init__(self, probe: Mapping[str, Any]):
+    self.fields = {field: probe[field] for field in FIELD_WEIGHTS if probe.get(field)}
+    self.log_amount: Optional[float] = None
+    amount = probe.get("payment_amount")
+    if amount is not None:
+      currency = probe.get("payment_currency") or BASE_CURRENCY
+      usd = get_fx_table().to_usd(amount, currency)
+      if usd is None:
+        raise ValueError(f"No FX rate for currency {currency}")
+      self.log_amount = math.log1p(max(usd, 0.0))
+    self.angle: Optional[float] = None
+    timestamp = parse_timestamp(probe.get("payment_time"))
+    if timestamp is not None:
+      self.angle = 2 * math.pi * (round(timestamp * 1000) % _DAY_MS) / _DAY_MS
+
+  def is_empty(self) -> bool:
+    return not self.fields and self.log_amount is None and self.angle is None
+
+
+def _nearest_centroids(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+  """Index of the nearest centroid for every vector, in bounded-memory chunks."""
+  # ||v - c||^2 = ||v||^2 - 2 v.c + ||c||^2, and ||v||^2 does not change the argmin.
+  norms = np.einsum("ij,ij->i", centroids, centroids)
+  return np.concatenate([
+      (norms - 2 * vectors[start:start + _ASSIGN_CHUNK] @ centroids.T).argmin(axis=1)
+      for start in range(0, len(vectors), _ASSIGN_CHUNK)
+  ]) if len(vectors) else np.zeros(0, dtype=np.intp)
+
+
+class _IVF:
+  """k-means coarse quantizer with one inverted list of row positions per centroid."""
+
+  def __init__(self, vectors: np.ndarray, n_lists: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    sample_size = min(len(vectors), n_lists * _KMEANS_SAMPLE_PER_LIST)
+    sample = vectors[rng.choice(len(vectors), sample_size, replace=False)]
+    centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+    for _ in range(_KMEANS_ITERATIONS):
+      nearest = _nearest_centroids(sample, centroids)
+      counts = np.bincount(nearest, minlength=n_lists)
+      sums = np.zeros_like(centroids)
+      np.add.at(sums, nearest, sample)
+      filled = counts > 0
+      centroids[filled] = sums[filled] / counts[filled, None]
+    self.centroids = centroids
+    self.lists = [array("i") for _ in range(n_lists)]
+    self.trained_size = len(vectors)
+    self.add(vectors, 0)
+
+  def add(self, vectors: np.ndarray, first_position: int) -> None:
+    for offset, list_id in enumerate(_nearest_centroids(vectors, self.centroids).tolist()):
+      self.lists[list_id].append(first_position + offset)
+
+  def candidates(self, vector: np.ndarray, mask: np.ndarray, probes: int) -> np.ndarray:
+    distances = (((self.centroids - vector) * mask) ** 2).sum(axis=1)
+    nearest = np.argsort(distances)[:probes]
+    return np.concatenate([np.frombuffer(self.lists[i], dtype=np.int32) for i in nearest]).astype(np.intp)
+
+
+class NeighbourIndex:
+  """Top-k weighted nearest neighbours over historical transactions."""
+
+  def __init__(
+      self,
+      rows: Iterable[Dict[str, Any]] = (),
+      n_lists: int = 0,
+      probes: int = 16,
+      exact_below: int = 50_000,
+  ):
+    self.n_lists = n_lists
+    self.probes = probes
+    self.exact_below = exact_below
+    self.records = CompactRecordStore()
+    self.encoder = FeatureEncoder()
+    self._ivf: Optional[_IVF] = None
+    self._lock = threading.RLock()
+    self.add_many(rows)
+
+  def __len__(self) -> int:
+    return len(self.records)
+
+  def add_many(self, rows: Iterable[Dict[str, Any]]) -> int:
+    """Add rows, replacing indexed ones with the same transaction_id; return how many were appended.
+
+    A replaced row keeps its IVF list. Distances are computed from the
+    stored columns, so they reflect the new values; only the choice of
+    lists probed can lag until the next retraining.
+    """
+    with self._lock:
+      start = len(self.records)
+      added = self.records.extend(rows)
+      size = len(self.records)
+      if size < self.exact_below:
+        return added
+      if self._ivf is None or size > 2 * self._ivf.trained_size:
+        self._train()
+      elif added:
+        self._ivf.add(self.encoder.encode_records(self.records, start, size), start)
+      return added
+
+  def _train(self) -> None:
+    size = len(self.records)
+    n_lists = self.n_lists or max(1, int(math.sqrt(size)))
+    vectors = np.concatenate([
+        self.encoder.encode_records(self.records, start, min(start + _ASSIGN_CHUNK, size))
+        for start in range(0, size, _ASSIGN_CHUNK)
+    ])
+    self._ivf = _IVF(vectors, min(n_lists, size))
+    logger.info(f"Trained IVF with {len(self._ivf.lists)} lists over {size} transactions")
+
+  def _score(self, probe: _Probe, positions: np.ndarray) -> np.ndarray:
+    """Exact squared distance of the rows at `positions` to the probe."""
+    records = self.records
+    distances = np.zeros(len(positions))
+    for field, value in probe.fields.items():
+      code = records.find_code(field, value)
+      if code is None:
+        distances += FIELD_WEIGHTS[field] ** 2
+      else:
+        distances += FIELD_WEIGHTS[field] ** 2 * (records.column(field)[positions] != code)
+    if probe.log_amount is not None:
+      amounts = records.column("payment_amount_usd")[positions]
+      gap = AMOUNT_WEIGHT * (np.log1p(np.maximum(amounts, 0)) - probe.log_amount)
+      # A row without a convertible amount counts as one unit away.
+      distances += np.where(np.isnan(gap), AMOUNT_WEIGHT ** 2, gap ** 2)
+    if probe.angle is not None:
+      times = records.column("payment_time")[positions]
+      angles = 2 * np.pi * (times % _DAY_MS) / _DAY_MS
+      chord = TIME_WEIGHT ** 2 * (1 - np.cos(angles - probe.angle)) / 2
+      distances += np.where(times == NULL_TIME, TIME_WEIGHT ** 2 / 2, chord)
+    return distances
+
+  def _nearest(self, probe: _Probe, positions: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    distances = self._score(probe, positions)
+    if len(positions) > k:
+      # Keep everything tied with the k-th nearest, then break ties by recency.
+      cutoff = np.partition(distances, k - 1)[k - 1]
+      keep = distances <= cutoff
+      positions, distances = positions[keep], distances[keep]
+    # float64 negation: NULL_TIME cannot be negated as int64; it sorts oldest.
+    times = self.records.column("payment_time")[positions].astype(float)
+    order = np.lexsort((-positions, -times, distances))[:k]
+    return positions[order], np.sqrt(np.maximum(distances[order], 0))
+
+  def search(
+      self,
+      probe: Mapping[str, Any],
+      k: int = 10,
+      columns: Sequence[str] = NEIGHBOUR_COLUMNS,
+  ) -> Dict[str, Any]:
+    """Return the k nearest transactions and their weighted decision distribution.
+
+    Args:
+        probe: Transaction fields; any of FIELD_WEIGHTS, payment_amount (in
+            payment_currency, default USD) and payment_time.
+        k: Number of neighbours.
+        columns: Columns returned for each neighbour.
+    """
+    parsed = _Probe(probe)
+    if parsed.is_empty():
+      raise ValueError("Provide at least one transaction field to compare")
+    k = max(1, k)
+    with self._lock:
+      method, positions = "exact", None
+      if self._ivf is not None:
+        vector, mask = self.encoder.encode_probe(parsed)
+        positions = self._ivf.candidates(vector, mask, self.probes)
+        method = "ivf"
+      if positions is None or len(positions) < k:
+        method, positions = "exact", np.arange(len(self.records))
+      scanned = len(positions)
+      positions, distances = self._nearest(parsed, positions, k)
+      rows = self.records.rows(positions, columns)
+      details = self.records.rows(positions, list(parsed.fields) + ["approval_status", "reject_reason"])
+
+    weights = 1 / (1 + distances)
+    decisions: Dict[str, float] = defaultdict(float)
+    reasons: Dict[str, float] = defaultdict(float)
+    for row, detail, weight, distance in zip(rows, details, weights.tolist(), distances.tolist()):
+      row["distance"] = round(distance, 4)
+      row["similarity"] = round(weight, 4)
+      row["matched_fields"] = [field for field, value in parsed.fields.items() if detail[field] == value]
+      decisions[detail["approval_status"] or "UNKNOWN"] += weight
+      if detail["approval_status"] == "REJECTED":
+        reasons[(detail["reject_reason"] or "Unspecified").strip() or "Unspecified"] += weight
+    total = float(weights.sum()) or 1.0
+    return {
+        "neighbours": rows,
+        "decision_distribution": {
+            status: round(weight / total, 4)
+            for status, weight in sorted(decisions.items(), key=lambda item: -item[1])
+        },
+        "reject_reasons": {
+            reason: round(weight / total, 4)
+            for reason, weight in sorted(reasons.items(), key=lambda item: -item[1])
+        },
+        "search": {"method": method, "scanned": scanned, "indexed": len(self.records)},
+    }
+
+  def stats(self) -> Dict[str, Any]:
+    return {
+        "transactions": len(self.records),
+        "ivf_lists": len(self._ivf.lists) if self._ivf is not None else 0,
+        "probes": self.probes,
+        "record_bytes": self.records.nbytes,
+    }
+
+
+_index: Optional[NeighbourIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_neighbour_index(store: Optional[TransactionStore] = None) -> NeighbourIndex:
+  """Return the process-wide neighbour index, built from the store on first use."""
+  global _index
+  if _index is None:
+    with _index_lock:
+      if _index is None:
+        store = store or get_transaction_store()
+        config = get_config()
+        index = NeighbourIndex(
+            store.load_transaction_columns(NEIGHBOUR_COLUMNS),
+            n_lists=config.knn_lists,
+            probes=config.knn_probes,
+            exact_below=config.knn_exact_below,
+        )
+        store.add_write_listener(lambda rows, replaced: index.add_many(rows))
+        logger.info(f"Built neighbour index from {store.name}: {index.stats()}")
+        _index = index
+  return _index
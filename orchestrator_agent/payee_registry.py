@@ -0,0 +1,207 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Registry of known payees and payer->payee relationships.
+
+Answers "is this a New Payee?" without a table scan. The default "set" mode
+keeps exact hash maps (payee -> first payment_time seen, and the set of
+payer/payee pairs). The "bloom" mode keeps only Bloom filters: a fixed,
+much smaller memory footprint, at the cost of reporting a genuinely new
+payee as known with probability `error_rate` (it never reports a known
+payee as new). The registry is built from the Transactions table and kept
+current through the store's write listener, so feedback corrections are
+registered as soon as they are written. In set mode a corrected transaction
+(same transaction_id) is retracted first, so a payee or pair whose only
+payment was corrected away is new again; a Bloom filter cannot forget, so
+bloom mode keeps it known.
+"""
+
+import hashlib
+import logging
+import math
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Mapping, MutableMapping, Optional, Sequence
+
+from .config import get_config
+from .store import TransactionStore, get_transaction_store, replacement_pairs
+
+logger = logging.getLogger('google_adk.' + __name__)
+
+MODES = ("set", "bloom")
+
+# Transactions columns the registry is built from.
+REGISTRY_COLUMNS = ["payer_id", "payee_id", "payment_time"]
+
+
+class BloomFilter:
+  """Fixed-size Bloom filter over strings."""
+
+  def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.001):
+    self.capacity = capacity
+    self.error_rate = error_rate
+    self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+    self.hashes = max(1, round(self.size / capacity * math.log(2)))
+    self._bits = bytearray((self.size + 7) // 8)
+    self.count = 0
+
+  def _positions(self, key: str) -> List[int]:
+    # Double hashing: k positions from two independent 64-bit halves.
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+    first = int.from_bytes(digest[:8], "little")
+    second = int.from_bytes(digest[8:], "little") | 1
+    return [(first + i * second) % self.size for i in range(self.hashes)]
+
+  def add(self, key: str) -> None:
+    for position in self._positions(key):
+      self._bits[position >> 3] |= 1 << (position & 7)
+    self.count += 1
+
+  def __contains__(self, key: str) -> bool:
+    bits = self._bits
+    return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+  @property
+  def nbytes(self) -> int:
+    return len(self._bits)
+
+
+def _pair_key(payer_id: str, payee_id: str) -> str:
+  return f"{payer_id}\x1f{payee_id}"
+
+
+class PayeeRegistry:
+  """Membership of payees and payer->payee pairs seen in Transactions."""
+
+  def __init__(self, mode: str = "set", capacity: int = 1_000_000, error_rate: float = 0.001):
+    if mode not in MODES:
+      raise ValueError(f"Unknown payee registry mode: {mode}")
+    self.mode = mode
+    self._lock = threading.Lock()
+    if mode == "bloom":
+      self._payees: Any = BloomFilter(capacity, error_rate)
+      self._pairs: Any = BloomFilter(capacity, error_rate)
+    else:
+      self._payees: MutableMapping[str, Optional[str]] = {}
+      # Rows per payee and per pair, so remove() knows when one is gone.
+      self._payee_rows: Counter = Counter()
+      self._pairs = Counter()
+
+  def add(self, row: Mapping[str, Any]) -> None:
+    payee, payer = row.get("payee_id"), row.get("payer_id")
+    if not payee:
+      return
+    with self._lock:
+      if self.mode == "bloom":
+        self._payees.add(payee)
+      else:
+        seen = row.get("payment_time")
+        first = self._payees.get(payee)
+        if payee not in self._payees or (seen is not None and (first is None or str(seen) < first)):
+          self._payees[payee] = None if seen is None else str(seen)
+        self._payee_rows[payee] += 1
+      if payer and self.mode == "bloom":
+        self._pairs.add(_pair_key(payer, payee))
+      elif payer:
+        self._pairs[_pair_key(payer, payee)] += 1
+
+  def remove(self, row: Mapping[str, Any]) -> None:
+    """Retract a row previously passed to add(); a no-op in bloom mode.
+
+    The payee's first payment_time is kept while it has other rows.
+    """
+    payee, payer = row.get("payee_id"), row.get("payer_id")
+    if not payee or self.mode == "bloom":
+      return
+    with self._lock:
+      self._payee_rows[payee] -= 1
+      if self._payee_rows[payee] <= 0:
+        del self._payee_rows[payee]
+        self._payees.pop(payee, None)
+      if payer:
+        key = _pair_key(payer, payee)
+        self._pairs[key] -= 1
+        if self._pairs[key] <= 0:
+          del self._pairs[key]
+
+  def update(self, rows: Iterable[Mapping[str, Any]], replaced: Sequence[Mapping[str, Any]] = ()) -> None:
+    """Register rows, retracting the stored rows in `replaced` that they correct."""
+    for old, row in replacement_pairs(list(rows), replaced):
+      if old is not None:
+        same_parties = all(old.get(column) == row.get(column) for column in ("payee_id", "payer_id"))
+        if self.mode == "bloom" and same_parties:
+          continue  # already in the filters; adding it again would only inflate the counts
+        self.remove(old)
+      self.add(row)
+
+  def is_known_payee(self, payee_id: str) -> bool:
+    return payee_id in self._payees
+
+  def is_known_pair(self, payer_id: str, payee_id: str) -> bool:
+    return _pair_key(payer_id, payee_id) in self._pairs
+
+  def check(self, payee_id: str, payer_id: Optional[str] = None) -> Dict[str, Any]:
+    """Return known/new flags for a payee and, if given, the payer->payee pair."""
+    known = self.is_known_payee(payee_id)
+    result: Dict[str, Any] = {"payee_id": payee_id, "new_payee": not known}
+    if known and self.mode == "set":
+      result["payee_first_seen"] = self._payees[payee_id]
+    if payer_id:
+      result["payer_id"] = payer_id
+      result["new_relationship"] = not self.is_known_pair(payer_id, payee_id)
+    if self.mode == "bloom":
+      result["false_known_rate"] = self._payees.error_rate
+    return result
+
+  def annotate(self, record: MutableMapping[str, Any]) -> MutableMapping[str, Any]:
+    """Set the rule-engine inputs `payee_is_new` / `relationship_is_new` on a record."""
+    payee, payer = record.get("payee_id"), record.get("payer_id")
+    if payee:
+      record["payee_is_new"] = not self.is_known_payee(payee)
+      if payer:
+        record["relationship_is_new"] = not self.is_known_pair(payer, payee)
+    return record
+
+  def stats(self) -> Dict[str, Any]:
+    if self.mode == "bloom":
+      return {
+          "mode": self.mode,
+          "payees_added": self._payees.count,
+          "pairs_added": self._pairs.count,
+          "bytes": self._payees.nbytes + self._pairs.nbytes,
+      }
+    return {"mode": self.mode, "payees": len(self._payees), "pairs": len(self._pairs)}
+
+
+_registry: Optional[PayeeRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_payee_registry(store: Optional[TransactionStore] = None) -> PayeeRegistry:
+  """Return the process-wide registry, built from the store on first use."""
+  global _registry
+  if _registry is None:
+    with _registry_lock:
+      if _registry is None:
+        store = store or get_transaction_store()
+        config = get_config()
+        registry = PayeeRegistry(
+            config.payee_registry_mode,
+            capacity=config.payee_registry_capacity,
+        )
+        registry.update(store.load_transaction_columns(REGISTRY_COLUMNS))
+        store.add_write_listener(registry.update)
+        logger.info(f"Built payee registry from {store.name}: {registry.stats()}")
+        _registry = registry
+  return _registry
@@ -0,0 +1,316 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Materialized per-entity profiles for payers, payees and vendors.
+
+Each profile keeps, per payment currency, a running count/mean/stddev
+(Welford's algorithm, so updates are O(1) and numerically stable), min/max
+and an exponentially weighted recent mean, plus first/last seen times,
+currency usage and approval history. Profiles are built once from the
+transaction store and then updated from its write listener as transactions
+and feedback corrections arrive, so a lookup is a dict access rather than an
+aggregation query. A corrected transaction (same transaction_id) is retracted
+from the profiles before the correction is folded in; first/last seen times
+are only ever widened.
+"""
+
+import logging
+import math
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, Mapping, Optional, Sequence, Tuple
+
+from .store import TransactionStore, get_transaction_store, replacement_pairs
+
+logger = logging.getLogger('google_adk.' + __name__)
+
+# Profiled entity types and the Transactions column holding their id.
+ENTITY_COLUMNS = {
+    "payer": "payer_id",
+    "payee": "payee_id",
+    "vendor": "vendor_id",
+}
+
+# Transactions columns the profiles are built from.
+PROFILE_COLUMNS = [
+    *ENTITY_COLUMNS.values(),
+    "payment_time",
+    "payment_amount",
+    "payment_currency",
+    "approval_status",
+]
+
+# Weight of the newest amount in the exponentially weighted recent mean.
+RECENT_ALPHA = 0.2
+
+# Fraction above the per-currency mean treated as "Higher than avg amount".
+ABOVE_AVERAGE_THRESHOLD = 0.25
+
+
+def _time_text(value: Any) -> Optional[str]:
+  if value is None:
+    return None
+  return value.isoformat() if isinstance(value, datetime) else str(value)
+
+
+def _time_order(row: Mapping[str, Any]) -> Tuple[bool, str]:
+  # Rows without a payment_time first, so they never count as the most recent.
+  seen = _time_text(row.get("payment_time"))
+  return (seen is not None, seen or "")
+
+
+def _decrement(counter: Counter, key: Any) -> None:
+  counter[key] -= 1
+  if counter[key] <= 0:
+    del counter[key]
+
+
+def _amount_key(row: Mapping[str, Any]) -> Tuple[Any, Any]:
+  amount = row.get("payment_amount")
+  return (row.get("payment_currency") or None, None if amount is None else float(amount))
+
+
+class RunningStats:
+  """Count, mean, variance, min, max and EWMA of a stream of amounts."""
+
+  __slots__ = ("count", "mean", "_m2", "minimum", "maximum", "recent_mean")
+
+  def __init__(self):
+    self.count = 0
+    self.mean = 0.0
+    self._m2 = 0.0
+    self.minimum = math.inf
+    self.maximum = -math.inf
+    self.recent_mean = 0.0
+
+  def add(self, value: float) -> None:
+    self.count += 1
+    delta = value - self.mean
+    self.mean += delta / self.count
+    self._m2 += delta * (value - self.mean)
+    self.minimum = min(self.minimum, value)
+    self.maximum = max(self.maximum, value)
+    self.recent_mean = value if self.count == 1 else (
+        RECENT_ALPHA * value + (1 - RECENT_ALPHA) * self.recent_mean
+    )
+
+  def remove(self, value: float) -> None:
+    """Undo add(value); min, max and the recent mean are left as they are."""
+    if self.count <= 1:
+      self.count, self.mean, self._m2 = 0, 0.0, 0.0
+      return
+    previous_mean = (self.count * self.mean - value) / (self.count - 1)
+    self._m2 = max(self._m2 - (value - previous_mean) * (value - self.mean), 0.0)
+    self.mean = previous_mean
+    self.count -= 1
+
+  @property
+  def std(self) -> float:
+    """Sample standard deviation (0 for fewer than two values)."""
+    return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+  def as_dict(self) -> Dict[str, Any]:
+    return {
+        "count": self.count,
+        "mean": round(self.mean, 2),
+        "std": round(self.std, 2),
+        "min": round(self.minimum, 2),
+        "max": round(self.maximum, 2),
+        "recent_mean": round(self.recent_mean, 2),
+    }
+
+
+class EntityProfile:
+  """Aggregated history of one payer, payee or vendor."""
+
+  __slots__ = ("entity_type", "entity_id", "count", "first_seen", "last_seen",
+               "amounts", "currencies", "statuses")
+
+  def __init__(self, entity_type: str, entity_id: str):
+    self.entity_type = entity_type
+    self.entity_id = entity_id
+    self.count = 0
+    self.first_seen: Optional[str] = None
+    self.last_seen: Optional[str] = None
+    self.amounts: Dict[str, RunningStats] = {}
+    self.currencies: Counter = Counter()
+    self.statuses: Counter = Counter()
+
+  def add(self, row: Mapping[str, Any]) -> None:
+    self.count += 1
+    self._add_seen(row)
+    self._add_amount(row)
+    status = row.get("approval_status")
+    if status:
+      self.statuses[status] += 1
+
+  def remove(self, row: Mapping[str, Any]) -> None:
+    """Retract a row previously passed to add(); first/last seen are kept."""
+    self.count -= 1
+    self._remove_amount(row)
+    status = row.get("approval_status")
+    if status:
+      _decrement(self.statuses, status)
+
+  def replace(self, old: Mapping[str, Any], new: Mapping[str, Any]) -> None:
+    """Swap a row previously passed to add() for its correction."""
+    self._add_seen(new)
+    if _amount_key(old) != _amount_key(new):
+      self._remove_amount(old)
+      self._add_amount(new)
+    if old.get("approval_status"):
+      _decrement(self.statuses, old["approval_status"])
+    if new.get("approval_status"):
+      self.statuses[new["approval_status"]] += 1
+
+  def _add_seen(self, row: Mapping[str, Any]) -> None:
+    seen = _time_text(row.get("payment_time"))
+    if seen is not None:
+      self.first_seen = seen if self.first_seen is None else min(self.first_seen, seen)
+      self.last_seen = seen if self.last_seen is None else max(self.last_seen, seen)
+
+  def _add_amount(self, row: Mapping[str, Any]) -> None:
+    currency = row.get("payment_currency")
+    if not currency:
+      return
+    self.currencies[currency] += 1
+    amount = row.get("payment_amount")
+    if amount is not None:
+      self.amounts.setdefault(currency, RunningStats()).add(float(amount))
+
+  def _remove_amount(self, row: Mapping[str, Any]) -> None:
+    currency = row.get("payment_currency")
+    if not currency:
+      return
+    _decrement(self.currencies, currency)
+    amount = row.get("payment_amount")
+    stats = self.amounts.get(currency)
+    if amount is not None and stats is not None:
+      stats.remove(float(amount))
+
+  def compare(self, payment_amount: float, payment_currency: str) -> Dict[str, Any]:
+    """How an amount compares with this entity's history in the same currency."""
+    stats = self.amounts.get(payment_currency)
+    if stats is None or not stats.count:
+      return {"history_in_currency": 0, "new_currency": True}
+    comparison: Dict[str, Any] = {
+        "history_in_currency": stats.count,
+        "new_currency": False,
+        "pct_vs_mean": round((payment_amount - stats.mean) / stats.mean * 100, 1) if stats.mean else None,
+        "z_score": round((payment_amount - stats.mean) / stats.std, 2) if stats.std else None,
+        "above_max_seen": payment_amount > stats.maximum,
+    }
+    comparison["above_average_threshold"] = payment_amount > stats.mean * (1 + ABOVE_AVERAGE_THRESHOLD)
+    return comparison
+
+  def as_dict(self) -> Dict[str, Any]:
+    return {
+        "entity_type": self.entity_type,
+        "entity_id": self.entity_id,
+        "transaction_count": self.count,
+        "first_seen": self.first_seen,
+        "last_seen": self.last_seen,
+        "typical_currencies": [currency for currency, _ in self.currencies.most_common(3)],
+        "amounts_by_currency": {currency: stats.as_dict() for currency, stats in self.amounts.items()},
+        "approval_history": dict(self.statuses),
+    }
+
+
+class ProfileStore:
+  """In-memory profiles keyed by (entity_type, entity_id)."""
+
+  def __init__(self, rows: Iterable[Mapping[str, Any]] = ()):
+    self._lock = threading.Lock()
+    self._profiles: Dict[Tuple[str, str], EntityProfile] = {}
+    self.update(rows)
+
+  def __len__(self) -> int:
+    return len(self._profiles)
+
+  def update(
+      self,
+      rows: Iterable[Mapping[str, Any]],
+      replaced: Sequence[Mapping[str, Any]] = (),
+  ) -> None:
+    """Fold transaction rows into the payer, payee and vendor profiles.
+
+    Rows are folded oldest payment_time first, which the recent mean assumes.
+    `replaced` are the stored rows that some of `rows` correct (same
+    transaction_id); they are retracted rather than counted twice.
+    """
+    pairs = replacement_pairs(list(rows), replaced)
+    with self._lock:
+      for old, row in sorted(pairs, key=lambda pair: _time_order(pair[1])):
+        for entity_type, column in ENTITY_COLUMNS.items():
+          old_id = old.get(column) if old is not None else None
+          entity_id = row.get(column)
+          previous = self._profiles.get((entity_type, old_id)) if old_id else None
+          if previous is not None and old_id == entity_id:
+            previous.replace(old, row)
+            continue
+          if previous is not None:
+            previous.remove(old)
+          if not entity_id:
+            continue
+          key = (entity_type, entity_id)
+          profile = self._profiles.get(key)
+          if profile is None:
+            profile = self._profiles[key] = EntityProfile(entity_type, entity_id)
+          profile.add(row)
+
+  def get(self, entity_type: str, entity_id: str) -> Optional[EntityProfile]:
+    if entity_type not in ENTITY_COLUMNS:
+      raise ValueError(f"Unknown entity type: {entity_type}; expected one of {list(ENTITY_COLUMNS)}")
+    return self._profiles.get((entity_type, entity_id))
+
+  def lookup(
+      self,
+      entity_id: str,
+      entity_types: Sequence[str] = tuple(ENTITY_COLUMNS),
+      payment_amount: Optional[float] = None,
+      payment_currency: Optional[str] = None,
+  ) -> Dict[str, Any]:
+    """Return the profiles of `entity_id`, optionally compared with a new amount."""
+    with self._lock:
+      found = {}
+      for entity_type in entity_types:
+        profile = self.get(entity_type, entity_id)
+        if profile is None:
+          continue
+        found[entity_type] = profile.as_dict()
+        if payment_amount is not None and payment_currency:
+          found[entity_type]["comparison"] = profile.compare(payment_amount, payment_currency)
+      return found
+
+
+_profiles: Optional[ProfileStore] = None
+_profiles_lock = threading.Lock()
+
+
+def get_profile_store(store: Optional[TransactionStore] = None) -> ProfileStore:
+  """Return the process-wide profiles, building them from the store on first use.
+
+  The profiles then follow every Transactions write made through the store.
+  """
+  global _profiles
+  if _profiles is None:
+    with _profiles_lock:
+      if _profiles is None:
+        store = store or get_transaction_store()
+        profiles = ProfileStore(store.load_transaction_columns(PROFILE_COLUMNS))
+        store.add_write_listener(profiles.update)
+        logger.info(f"Built {len(profiles)} entity profiles from {store.name}")
+        _profiles = profiles
+  return _profiles
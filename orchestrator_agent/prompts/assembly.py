@@ -0,0 +1,203 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Agent instructions assembled from prompt sections.
+
+An `AssembledPrompt` is a list of `PromptSection`s. Sections without a
+condition form the static prefix, passed to ADK as `static_instruction`: it
+is identical on every turn and sent first as the system instruction, which
+is what the context cache (and Gemini's implicit prefix cache) can reuse.
+Conditional sections are picked per turn from session state by the
+`instruction` provider; ADK sends them as user content near the end of the
+conversation (before the user's latest message, or after the latest tool
+results), so they do not invalidate the cached prefix.
+`user_message_indices()` tells those apart from what the user typed.
+
+The approval agent's feedback flow is the one conditional section today: it
+is included only while `FEEDBACK_STATE_KEY` is set, i.e. from the turn that
+produced a decision until feedback is stored or a new transaction is
+screened (`feedback_callbacks()`).
+"""
+
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence
+
+from ..encoding import estimate_tokens
+from .prompts import (
+    ANALYSIS_AGENT_INSTRUCTION,
+    APPROVAL_EVALUATION_STEP,
+    APPROVAL_FEEDBACK_FLOW,
+    APPROVAL_GUIDELINES,
+    APPROVAL_REJECTION_PATTERNS,
+    APPROVAL_RESPONSE_FORMAT,
+    APPROVAL_ROLE,
+    APPROVAL_TOOLS,
+    APPROVAL_WORKFLOW,
+    LLM_REVIEWER_INSTRUCTION,
+    ROOT_AGENT_INSTRUCTION,
+    TRANSACTION_EXTRACTOR_INSTRUCTION,
+)
+
+FEEDBACK_STATE_KEY = "awaiting_feedback"
+
+_DECISION_MARKER = "**Decision:**"
+
+
+def awaiting_feedback(state: Mapping[str, Any]) -> bool:
+  return bool(state.get(FEEDBACK_STATE_KEY))
+
+
+@dataclass(frozen=True)
+class PromptSection:
+  """A named block of instruction text, optionally included only when `when(state)`."""
+  name: str
+  text: str
+  when: Optional[Callable[[Mapping[str, Any]], bool]] = None
+
+
+class AssembledPrompt:
+  """An instruction split into a static prefix and per-turn sections.
+
+  Attributes:
+      name: Agent the prompt is for.
+      sections: In order; all static sections must come first.
+      states: Example session states by name, used by `token_sizes()`.
+  """
+
+  def __init__(
+      self,
+      name: str,
+      sections: Sequence[PromptSection],
+      states: Optional[Mapping[str, Mapping[str, Any]]] = None,
+  ):
+    dynamic = [section.when is not None for section in sections]
+    if dynamic != sorted(dynamic):
+      raise ValueError(f"{name}: static sections must precede conditional ones")
+    self.name = name
+    self.sections = list(sections)
+    self.states = dict(states or {"default": {}})
+    self.static_text = "\n".join(s.text.strip("\n") for s in self.sections if s.when is None) + "\n"
+
+  def dynamic_text(self, state: Mapping[str, Any]) -> str:
+    """The conditional sections that apply to `state`."""
+    return "\n".join(
+        s.text.strip("\n") for s in self.sections if s.when is not None and s.when(state)
+    )
+
+  def render(self, state: Optional[Mapping[str, Any]] = None) -> str:
+    """The full instruction for `state`, as the model sees it."""
+    dynamic = self.dynamic_text(state or {})
+    return self.static_text + ("\n" + dynamic + "\n" if dynamic else "")
+
+  def instruction(self, context: Any) -> str:
+    """ADK InstructionProvider returning this turn's conditional sections."""
+    return self.dynamic_text(context.state)
+
+  def agent_kwargs(self) -> Dict[str, Any]:
+    """Keyword arguments setting an LlmAgent's static and dynamic instruction."""
+    kwargs: Dict[str, Any] = {"static_instruction": self.static_text}
+    if any(s.when is not None for s in self.sections):
+      kwargs["instruction"] = self.instruction
+    return kwargs
+
+  def token_sizes(self) -> Dict[str, Any]:
+    """Estimated tokens of the static prefix, each section and each example state."""
+    return {
+        "static_tokens": estimate_tokens(self.static_text),
+        "sections": {s.name: estimate_tokens(s.text) for s in self.sections},
+        "per_state": {
+            state_name: {
+                "dynamic_tokens": estimate_tokens(self.dynamic_text(state)),
+                "total_tokens": estimate_tokens(self.render(state)),
+            }
+            for state_name, state in self.states.items()
+        },
+    }
+
+
+def _static(name: str, text: str) -> AssembledPrompt:
+  return AssembledPrompt(name, [PromptSection("instruction", text)])
+
+
+ROOT_PROMPT = _static("orchestrator_root_agent", ROOT_AGENT_INSTRUCTION)
+ANALYSIS_PROMPT = _static("analysis_agent", ANALYSIS_AGENT_INSTRUCTION)
+APPROVAL_PROMPT = AssembledPrompt(
+    "transaction_approval_agent",
+    [
+        PromptSection("role", APPROVAL_ROLE),
+        PromptSection("tools", APPROVAL_TOOLS),
+        PromptSection("rejection_patterns", APPROVAL_REJECTION_PATTERNS),
+        PromptSection("workflow", APPROVAL_WORKFLOW),
+        PromptSection("response_format", APPROVAL_RESPONSE_FORMAT),
+        PromptSection("guidelines", APPROVAL_GUIDELINES),
+        PromptSection("evaluation_step", APPROVAL_EVALUATION_STEP, when=lambda state: not awaiting_feedback(state)),
+        PromptSection("feedback_flow", APPROVAL_FEEDBACK_FLOW, when=awaiting_feedback),
+    ],
+    states={"evaluation": {}, "feedback": {FEEDBACK_STATE_KEY: True}},
+)
+
+PROMPTS = {
+    prompt.name: prompt
+    for prompt in (
+        ROOT_PROMPT,
+        ANALYSIS_PROMPT,
+        APPROVAL_PROMPT,
+        _static("transaction_extractor", TRANSACTION_EXTRACTOR_INSTRUCTION),
+        _static("llm_reviewer", LLM_REVIEWER_INSTRUCTION),
+    )
+}
+
+
+def prompt_token_sizes() -> Dict[str, Dict[str, Any]]:
+  """token_sizes() of every agent's instruction, by agent name."""
+  return {name: prompt.token_sizes() for name, prompt in PROMPTS.items()}
+
+
+def user_message_indices(contents: Sequence[Any]) -> List[int]:
+  """Positions in an LlmRequest's contents of messages typed by the user.
+
+  Skips tool results, other agents' messages (replayed as user content
+  starting "For context:") and dynamic instructions. ADK inserts the latter
+  right after the latest tool results mid-turn, where the user cannot have
+  spoken; at the start of a turn they precede the user's message, which
+  therefore remains the last one found.
+  """
+  indices = []
+  for position, content in enumerate(contents):
+    parts = content.parts or []
+    if content.role != "user" or not parts or not parts[0].text or parts[0].text == "For context:":
+      continue
+    previous = contents[position - 1] if position else None
+    if previous is not None and any(part.function_response for part in previous.parts or ()):
+      continue
+    indices.append(position)
+  return indices
+
+
+def _mark_decision(callback_context: Any, llm_response: Any) -> None:
+  if getattr(llm_response, "partial", False) or not llm_response.content:
+    return
+  if any(part.text and _DECISION_MARKER in part.text for part in llm_response.content.parts or ()):
+    callback_context.state[FEEDBACK_STATE_KEY] = True
+
+
+def _clear_on_tool(tool: Any, args: Dict[str, Any], tool_context: Any, tool_response: Any) -> None:
+  # Feedback stored, or a new transaction being screened.
+  if tool.name in ("insert_transaction_feedback", "screen_transaction"):
+    tool_context.state[FEEDBACK_STATE_KEY] = False
+
+
+def feedback_callbacks() -> Dict[str, Any]:
+  """Callbacks maintaining FEEDBACK_STATE_KEY for the approval agent."""
+  return {"after_model_callback": _mark_decision, "after_tool_callback": _clear_on_tool}
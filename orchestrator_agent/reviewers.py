@@ -0,0 +1,169 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Parallel synthetic reviewer panel.
+
+A transaction is extracted into session state once, then N independent
+reviewers run concurrently under a `ParallelAgent`, each writing an
+`AnalysisResult` to its own state key. A deterministic aggregator combines
+them, so decision latency is that of the slowest reviewer rather than the
+sum of all of them.
+"""
+
+import logging
+from typing import Any, AsyncGenerator, Dict, List, Optional, Sequence
+
+from google.adk.agents import BaseAgent, LlmAgent, ParallelAgent, SequentialAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from data_models.transaction_models import AnalysisResult, TransactionDetails
+from .config import get_config
+from .prompts.prompts import LLM_REVIEWER_INSTRUCTION, TRANSACTION_EXTRACTOR_INSTRUCTION
+from .rules import RuleEngine, default_engine
+from .scoring import (  # noqa: F401 - re-exported for existing imports
+    HISTORY_MIN_SUPPORT,
+    HISTORY_PROBES,
+    aggregate_reviews,
+    review_history,
+    review_history_async,
+    score_counts,
+    score_history,
+)
+from .tracing import adk_callbacks
+
+logger = logging.getLogger('google_adk.' + __name__)
+
+TRANSACTION_STATE_KEY = "transaction_under_review"
+DECISION_STATE_KEY = "review_decision"
+
+
+def _result_event(agent: BaseAgent, ctx: InvocationContext, state_delta: Dict[str, Any], text: str) -> Event:
+  return Event(
+      author=agent.name,
+      invocation_id=ctx.invocation_id,
+      branch=ctx.branch,
+      content=types.Content(role="model", parts=[types.Part(text=text)]),
+      actions=EventActions(state_delta=state_delta),
+  )
+
+
+class RuleReviewerAgent(BaseAgent):
+  """Reviewer that applies the deterministic rule engine; makes no model call."""
+
+  output_key: str = "rule_review"
+  engine: RuleEngine = default_engine
+
+  async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+    record = ctx.session.state.get(TRANSACTION_STATE_KEY) or {}
+    result = self.engine.evaluate(record).model_copy(update={"agent_name": self.name})
+    yield _result_event(self, ctx, {self.output_key: result.model_dump()}, result.model_dump_json())
+
+
+class HistoryReviewerAgent(BaseAgent):
+  """Reviewer that scores the approval history of similar transactions."""
+
+  output_key: str = "history_review"
+
+  async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+    record = ctx.session.state.get(TRANSACTION_STATE_KEY) or {}
+    # The store calls block, so they run on the tool executor and overlap
+    # with each other and with the other reviewers.
+    result = await review_history_async(record)
+    result = result.model_copy(update={"agent_name": self.name})
+    yield _result_event(self, ctx, {self.output_key: result.model_dump()}, result.model_dump_json())
+
+
+class ReviewAggregatorAgent(BaseAgent):
+  """Combines the reviewers' AnalysisResults from session state."""
+
+  review_keys: List[str]
+  output_key: str = DECISION_STATE_KEY
+
+  async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+    results = []
+    for key in self.review_keys:
+      value = ctx.session.state.get(key)
+      if value is None:
+        logger.warning(f"Reviewer output '{key}' missing from session state")
+        continue
+      try:
+        results.append(AnalysisResult.model_validate(value))
+      except Exception as e:
+        logger.warning(f"Ignoring malformed reviewer output '{key}': {e}")
+    decision = aggregate_reviews(results, agent_name=self.name)
+    text = (
+        f"**Panel Decision:** {decision.decision} "
+        f"(confidence {decision.confidence_score:.2f})\n\n"
+        + "\n".join(f"- {r.agent_name}: {r.decision} ({r.confidence_score:.2f}) - {r.reason}" for r in results)
+    )
+    yield _result_event(self, ctx, {self.output_key: decision.model_dump()}, text)
+
+
+def build_llm_reviewer(name: str = "llm_reviewer", output_key: str = "llm_review") -> LlmAgent:
+  """Build the LLM reviewer; it reads the transaction from session state."""
+  return LlmAgent(
+      name=name,
+      model=get_config().escalation_model,
+      instruction=LLM_REVIEWER_INSTRUCTION,
+      output_schema=AnalysisResult,
+      output_key=output_key,
+      disallow_transfer_to_parent=True,
+      disallow_transfer_to_peers=True,
+      **adk_callbacks(),
+  )
+
+
+def build_review_panel(
+    reviewers: Optional[Sequence[BaseAgent]] = None,
+    name: str = "parallel_review_agent",
+) -> SequentialAgent:
+  """Build extractor -> parallel reviewers -> aggregator.
+
+  Args:
+      reviewers: Reviewer agents, each writing an AnalysisResult to the state
+          key named by its `output_key`. Defaults to the rule, history and LLM
+          reviewers.
+      name: Name of the returned agent.
+  """
+  if reviewers is None:
+    reviewers = [
+        RuleReviewerAgent(name="rule_reviewer", **adk_callbacks(llm=False)),
+        HistoryReviewerAgent(name="history_reviewer", **adk_callbacks(llm=False)),
+        build_llm_reviewer(),
+    ]
+  return SequentialAgent(
+      name=name,
+      description="Runs independent rule, history and LLM reviewers in parallel on one transaction and aggregates their decisions",
+      sub_agents=[
+          LlmAgent(
+              name="transaction_extractor",
+              model="gemini-2.5-flash",
+              instruction=TRANSACTION_EXTRACTOR_INSTRUCTION,
+              output_schema=TransactionDetails,
+              output_key=TRANSACTION_STATE_KEY,
+              disallow_transfer_to_parent=True,
+              disallow_transfer_to_peers=True,
+              **adk_callbacks(),
+          ),
+          ParallelAgent(name="review_panel", sub_agents=list(reviewers), **adk_callbacks(llm=False)),
+          ReviewAggregatorAgent(
+              name="review_aggregator",
+              review_keys=[reviewer.output_key for reviewer in reviewers],
+              **adk_callbacks(llm=False),
+          ),
+      ],
+      **adk_callbacks(llm=False),
+  )
@@ -0,0 +1,258 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Deterministic rule pre-screen for transactions.
+
+The "Known Rejection Patterns" from the approval agent's prompt are
+expressed here as declarative `Rule`s. A `RuleEngine` compiles each rule
+into a column-wise test that produces a boolean array over a whole batch
+(True where the rule fires), so a batch is screened with one pass per rule
+rather than one pass per transaction. Numeric thresholds compare
+USD-equivalent amounts from `fx` and are evaluated as numpy array
+comparisons; categorical rules test each distinct value once. Rows are then
+grouped by the combination of rules that fired, and each combination is
+turned into a verdict once. Results are emitted as
+`AnalysisResult`s; `prescreen()` returns one only when it is confident
+enough to skip the LLM agents.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+from data_models.transaction_batch import TransactionBatch
+from data_models.transaction_models import AnalysisResult, Transaction
+from .fx import get_fx_table
+
+AGENT_NAME = "rule_engine"
+
+HIGH_VALUE_USD = 15000.0
+
+HIGH_RISK_INDUSTRIES = frozenset({
+    "Cannabis Industry",
+    "Shell Corporations",
+    "Precious Metals Trading",
+    "Art & Antiques Dealers",
+    "Arms Dealing",
+})
+
+# Currencies expected for payees in each country.
+COUNTRY_CURRENCIES = {
+    "USA": frozenset({"USD"}),
+    "UK": frozenset({"GBP"}),
+    "France": frozenset({"EUR"}),
+    "Germany": frozenset({"EUR"}),
+    "Japan": frozenset({"JPY"}),
+    "Canada": frozenset({"CAD"}),
+    "India": frozenset({"INR"}),
+    "China": frozenset({"CNY"}),
+    "Brazil": frozenset({"BRL"}),
+    "Australia": frozenset({"AUD"}),
+}
+
+_SEVERITY = {"Approve": 0, "Review": 1, "Reject": 2}
+
+Record = Union[Transaction, Mapping[str, Any]]
+
+
+@dataclass(frozen=True)
+class Rule:
+  """A single declarative screening rule.
+
+  Attributes:
+      name: Identifier used in the emitted reason.
+      field: Column the rule tests.
+      op: One of "gt", "ge", "lt", "le", "eq", "in", "startswith" or
+          "not_mapped" (true when `value[row[other_field]]` is defined and
+          does not contain the field value).
+      value: Operand for `op`.
+      decision: Decision the rule argues for when it fires.
+      reason: Human-readable reason, in the reject_reason vocabulary.
+      confidence: How strongly a firing rule supports `decision`.
+      other_field: Second column used by "not_mapped".
+  """
+  name: str
+  field: str
+  op: str
+  value: Any
+  decision: str
+  reason: str
+  confidence: float
+  other_field: Optional[str] = None
+
+
+DEFAULT_RULES = (
+    Rule("high_value", "payment_amount_usd", "gt", HIGH_VALUE_USD,
+         "Reject", "High Value Transaction", 0.95),
+    # Historically these two are usually cleared on review rather than rejected
+    # outright, so on their own they only argue for a human look.
+    Rule("high_risk_industry", "vendor_industry", "in", HIGH_RISK_INDUSTRIES,
+         "Review", "High-Risk Industry", 0.7),
+    Rule("mismatched_currency", "payment_currency", "not_mapped", COUNTRY_CURRENCIES,
+         "Review", "Mismatched Currency", 0.5, other_field="payee_country"),
+    Rule("unusual_transfer", "payment_purpose", "startswith", "Unusual Transfer",
+         "Review", "Unusual Transfer", 0.8),
+    # Only fires when the caller supplies `payee_is_new`, e.g. from the payee registry.
+    Rule("new_payee", "payee_is_new", "eq", True,
+         "Review", "New Payee", 0.6),
+)
+
+_NUMERIC_OPS: Dict[str, Callable[[np.ndarray, float], np.ndarray]] = {
+    "gt": np.greater,
+    "ge": np.greater_equal,
+    "lt": np.less,
+    "le": np.less_equal,
+}
+
+
+def _mask(values: Sequence[Any], test: Callable[[Any], bool]) -> np.ndarray:
+  """Boolean array of the positions whose value passes `test`, testing each distinct value once."""
+  verdicts: Dict[Any, bool] = {}
+
+  def verdict(value: Any) -> bool:
+    known = verdicts.get(value)
+    if known is None:
+      known = verdicts[value] = value is not None and bool(test(value))
+    return known
+
+  return np.fromiter(map(verdict, values), dtype=bool, count=len(values))
+
+
+def _compile(rule: Rule) -> Callable[[Mapping[str, Sequence[Any]]], np.ndarray]:
+  if rule.op in _NUMERIC_OPS:
+    compare, threshold = _NUMERIC_OPS[rule.op], rule.value
+    # NULLs become NaN, and NaN compares false with every threshold.
+    return lambda columns: compare(np.asarray(columns[rule.field], dtype=float), threshold)
+  if rule.op == "eq":
+    return lambda columns: _mask(columns[rule.field], lambda v: v == rule.value)
+  if rule.op == "in":
+    return lambda columns: _mask(columns[rule.field], lambda v: v in rule.value)
+  if rule.op == "startswith":
+    return lambda columns: _mask(columns[rule.field], lambda v: v.startswith(rule.value))
+  if rule.op == "not_mapped":
+    def evaluate(columns):
+      pairs = list(zip(columns[rule.field], columns[rule.other_field]))
+      return _mask(
+          pairs, lambda p: p[0] is not None and p[1] in rule.value and p[0] not in rule.value[p[1]]
+      )
+    return evaluate
+  raise ValueError(f"Unsupported rule op: {rule.op}")
+
+
+def to_columns(records: Union[TransactionBatch, Sequence[Record]]) -> Mapping[str, Sequence[Any]]:
+  """Convert a TransactionBatch, Transaction models or row dicts into columns."""
+  if isinstance(records, TransactionBatch):
+    return records.columns
+  rows = [r.model_dump() if isinstance(r, Transaction) else r for r in records]
+  names = {name for row in rows for name in row}
+  return {name: [row.get(name) for row in rows] for name in names}
+
+
+@dataclass
+class RuleEngine:
+  """Evaluates a set of rules over single transactions or column batches.
+
+  Attributes:
+      rules: The rules to apply.
+      approve_confidence: Confidence of the Approve result when no rule fires.
+          Kept below `decisive_threshold`: the rules only know rejection
+          patterns, so a clean screen must still be checked against history,
+          and only a Reject or Review can settle a case on its own.
+      decisive_threshold: Minimum confidence for prescreen() to return a result.
+  """
+  rules: Sequence[Rule] = DEFAULT_RULES
+  approve_confidence: float = 0.6
+  decisive_threshold: float = 0.9
+  _compiled: List[Callable] = field(init=False, repr=False)
+
+  def __post_init__(self):
+    self._compiled = [_compile(rule) for rule in self.rules]
+
+  def _with_derived(self, columns: Mapping[str, Sequence[Any]]) -> Mapping[str, Sequence[Any]]:
+    size = len(next(iter(columns.values()), ()))
+    derived = dict(columns)
+    for name in ("payment_amount", "payment_currency"):
+      derived.setdefault(name, [None] * size)
+    if "payment_amount_usd" not in derived:
+      derived["payment_amount_usd"] = get_fx_table().to_usd_array(
+          derived["payment_amount"], derived["payment_currency"]
+      )
+    for rule in self.rules:
+      for name in (rule.field, rule.other_field):
+        if name is not None:
+          derived.setdefault(name, [None] * size)
+    return derived
+
+  def fired_matrix(self, columns: Mapping[str, Sequence[Any]]) -> np.ndarray:
+    """Boolean array of shape (rules, rows): True where a rule fires on a row."""
+    size = len(next(iter(columns.values()), ()))
+    columns = self._with_derived(columns)
+    if not self._compiled:
+      return np.zeros((0, size), dtype=bool)
+    return np.vstack([evaluate(columns) for evaluate in self._compiled])
+
+  def evaluate_columns(self, columns: Mapping[str, Sequence[Any]]) -> List[AnalysisResult]:
+    """Evaluate a columnar batch, returning one AnalysisResult per row.
+
+    Rows on which the same rules fire share one result instance; use
+    `model_copy()` before modifying a result.
+    """
+    matrix = self.fired_matrix(columns)
+    # One code per row: bit `i` set when rule `i` fired.
+    weights = np.left_shift(np.uint64(1), np.arange(len(self.rules), dtype=np.uint64))
+    codes = (matrix.astype(np.uint64) * weights[:, None]).sum(axis=0, dtype=np.uint64)
+    distinct, inverse = np.unique(codes, return_inverse=True)
+    verdicts = [
+        self._combine([rule for i, rule in enumerate(self.rules) if int(code) >> i & 1])
+        for code in distinct
+    ]
+    return [verdicts[index] for index in inverse.tolist()]
+
+  def _combine(self, fired: Sequence[Rule]) -> AnalysisResult:
+    if not fired:
+      return AnalysisResult(
+          agent_name=AGENT_NAME,
+          decision="Approve",
+          reason="No screening rules triggered",
+          confidence_score=self.approve_confidence,
+      )
+    decision = max((rule.decision for rule in fired), key=_SEVERITY.__getitem__)
+    # Independent rules arguing for the same decision reinforce each other.
+    doubt = 1.0
+    for rule in fired:
+      if rule.decision == decision:
+        doubt *= 1.0 - rule.confidence
+    return AnalysisResult(
+        agent_name=AGENT_NAME,
+        decision=decision,
+        reason="; ".join(rule.reason for rule in fired),
+        confidence_score=round(1.0 - doubt, 4),
+    )
+
+  def evaluate_batch(self, records: Union[TransactionBatch, Sequence[Record]]) -> List[AnalysisResult]:
+    """Evaluate a TransactionBatch, Transaction models or row dicts."""
+    return self.evaluate_columns(to_columns(records))
+
+  def evaluate(self, record: Record) -> AnalysisResult:
+    """Evaluate a single Transaction model or row dict."""
+    return self.evaluate_batch([record])[0]
+
+  def prescreen(self, record: Record) -> Optional[AnalysisResult]:
+    """Return the rule verdict if it is decisive, else None to defer to the agents."""
+    result = self.evaluate(record)
+    return result if result.confidence_score >= self.decisive_threshold else None
+
+
+default_engine = RuleEngine()
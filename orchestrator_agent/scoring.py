@@ -0,0 +1,207 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Deterministic scoring shared by the review panel, tiering and batch.
+
+This module scores a transaction from the approval counts of similar
+historical transactions (the history reviewer), and combines reviewers'
+AnalysisResults with a confidence-weighted vote. Nothing here depends on
+ADK, so the rules-and-history path of batch jobs and the tiering router
+load without the agent framework.
+"""
+
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
+from data_models.transaction_models import AnalysisResult
+from .async_tools import find_similar_many
+from .store import TransactionStore, get_transaction_store
+
+# Minimum number of similar historical transactions for full confidence.
+HISTORY_MIN_SUPPORT = 20
+
+# (filter fields, use amount band) probes issued by the history reviewer.
+HISTORY_PROBES = (
+    (("payer_id", "payment_currency"), False),
+    (("payee_id",), False),
+    (("vendor_industry", "payment_currency"), False),
+    (("payee_country", "payment_currency"), False),
+    (("payment_currency",), True),
+)
+
+# Probes on these fields describe the parties to the transaction; the others
+# match broad populations.
+_ENTITY_FIELDS = ("payer_id", "payee_id")
+
+# Highest confidence of an Approve backed only by broad probes. Almost every
+# transaction in the dataset is APPROVED, so a broad population approves
+# whatever the transaction; the cap rises to 1 as payer/payee history reaches
+# HISTORY_MIN_SUPPORT rows.
+BROAD_HISTORY_MAX_CONFIDENCE = 0.5
+
+_HISTORY_COLUMNS = ("transaction_id", "approval_status")
+
+_SEVERITY = {"Approve": 0, "Review": 1, "Reject": 2}
+
+
+def score_counts(
+    approved: int,
+    rejected: int,
+    review: int,
+    agent_name: str = "history_reviewer",
+    approve_cap: float = 1.0,
+) -> AnalysisResult:
+  """Turn approval counts of similar transactions into an AnalysisResult.
+
+  An Approve's confidence is at most `approve_cap`.
+  """
+  total = approved + rejected + review
+  if not total:
+    return AnalysisResult(
+        agent_name=agent_name,
+        decision="Review",
+        reason="No similar historical transactions found",
+        confidence_score=0.5,
+    )
+  support = min(1.0, total / HISTORY_MIN_SUPPORT)
+  summary = f"{approved} approved, {rejected} rejected, {review} marked for review of {total} similar"
+
+  if rejected / total >= 0.5:
+    decision, share = "Reject", rejected / total
+  elif (rejected + review) / total >= 0.25:
+    decision, share = "Review", (rejected + review) / total
+  else:
+    decision, share = "Approve", approved / total
+  confidence = share * support
+  if decision == "Approve" and confidence > approve_cap:
+    confidence = approve_cap
+    summary += " (little payer/payee history)"
+  return AnalysisResult(
+      agent_name=agent_name,
+      decision=decision,
+      reason=summary,
+      confidence_score=round(confidence, 4),
+  )
+
+
+def score_history(
+    rows: Sequence[Mapping[str, Any]],
+    agent_name: str = "history_reviewer",
+    approve_cap: float = 1.0,
+) -> AnalysisResult:
+  """Turn the approval statuses of similar transactions into an AnalysisResult."""
+  rejected = sum(1 for row in rows if row.get("approval_status") == "REJECTED")
+  review = sum(1 for row in rows if row.get("approval_status") == "MARKED FOR REVIEW")
+  return score_counts(
+      len(rows) - rejected - review, rejected, review, agent_name=agent_name, approve_cap=approve_cap
+  )
+
+
+def _history_probes(record: Mapping[str, Any]) -> List[Dict[str, Any]]:
+  probes = []
+  for fields, use_amount in HISTORY_PROBES:
+    if any(not record.get(field) for field in fields):
+      continue
+    if use_amount and record.get("payment_amount") is None:
+      continue
+    probes.append({
+        "filters": {field: record[field] for field in fields},
+        "payment_amount": record.get("payment_amount") if use_amount else None,
+    })
+  return probes
+
+
+def _merge_history(
+    probes: Sequence[Mapping[str, Any]], results: Sequence[Sequence[Mapping[str, Any]]]
+) -> AnalysisResult:
+  seen: Dict[Any, Mapping[str, Any]] = {}
+  entity_ids = set()
+  for probe, rows in zip(probes, results):
+    entity_probe = any(field in probe["filters"] for field in _ENTITY_FIELDS)
+    for row in rows:
+      seen[row["transaction_id"]] = row
+      if entity_probe:
+        entity_ids.add(row["transaction_id"])
+  entity_support = min(1.0, len(entity_ids) / HISTORY_MIN_SUPPORT)
+  approve_cap = BROAD_HISTORY_MAX_CONFIDENCE + (1 - BROAD_HISTORY_MAX_CONFIDENCE) * entity_support
+  return score_history(list(seen.values()), approve_cap=approve_cap)
+
+
+def review_history(
+    record: Mapping[str, Any],
+    store: Optional[TransactionStore] = None,
+    limit: int = 100,
+) -> AnalysisResult:
+  """Score a transaction against similar historical transactions in the store."""
+  store = store or get_transaction_store()
+  probes = _history_probes(record)
+  return _merge_history(probes, [
+      store.find_similar_transactions(
+          probe["filters"],
+          payment_amount=probe["payment_amount"],
+          limit=limit,
+          columns=_HISTORY_COLUMNS,
+      )
+      for probe in probes
+  ])
+
+
+async def review_history_async(
+    record: Mapping[str, Any],
+    store: Optional[TransactionStore] = None,
+    limit: int = 100,
+) -> AnalysisResult:
+  """review_history() with the similarity probes issued concurrently."""
+  probes = _history_probes(record)
+  results = await find_similar_many(probes, store=store, limit=limit, columns=_HISTORY_COLUMNS)
+  return _merge_history(probes, results)
+
+
+def aggregate_reviews(
+    results: Sequence[AnalysisResult],
+    weights: Optional[Mapping[str, float]] = None,
+    agent_name: str = "review_aggregator",
+    veto_threshold: float = 0.9,
+) -> AnalysisResult:
+  """Combine reviewer results by confidence-weighted vote.
+
+  Ties go to the more severe decision. The combined confidence is the
+  winning decision's share of the total weighted confidence. An Approve
+  is downgraded to Review when any reviewer rejects with at least
+  `veto_threshold` confidence.
+  """
+  if not results:
+    return AnalysisResult(
+        agent_name=agent_name,
+        decision="Review",
+        reason="No reviewer produced a result",
+        confidence_score=0.0,
+    )
+  weights = weights or {}
+  scores = {decision: 0.0 for decision in _SEVERITY}
+  for result in results:
+    scores[result.decision] += weights.get(result.agent_name, 1.0) * result.confidence_score
+  total = sum(scores.values())
+  decision = max(scores, key=lambda d: (scores[d], _SEVERITY[d]))
+  if decision == "Approve" and any(
+      r.decision == "Reject" and r.confidence_score >= veto_threshold for r in results
+  ):
+    decision = "Review"
+  return AnalysisResult(
+      agent_name=agent_name,
+      decision=decision,
+      reason="; ".join(
+          f"{r.agent_name}: {r.decision} ({r.confidence_score:.2f}) - {r.reason}" for r in results
+      ),
+      confidence_score=round(scores[decision] / total, 4) if total else 0.0,
+  )
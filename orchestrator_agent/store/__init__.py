@@ -0,0 +1,118 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Pluggable storage backends for the transaction tools.
+
+The backend is chosen by `config.store_backend` (TRINETRA_STORE):
+- `bigquery`: the Tri_Netra BigQuery dataset (default)
+- `sqlite`: an embedded store loaded from the local Dataset/ files
+
+With `config.similarity_index` (TRINETRA_SIMILARITY_INDEX) enabled, reads are
+served from an in-process columnar index over the chosen backend, laid out
+per `config.index_layout` (TRINETRA_INDEX_LAYOUT): per-value bitmaps, or the
+fixed-size rows of `record_store.CompactRecordStore`. Reads are
+then memoized in a TTL + LRU cache sized by `config.cache_size`.
+
+Feedback writes go through a shared background `FeedbackWriter`
+(`get_feedback_writer()`), which batches them into the current store.
+"""
+
+import atexit
+import threading
+from typing import Optional
+
+from ..config import get_config
+from .base import (
+    FEEDBACK_COLUMNS,
+    REJECTED_COLUMNS,
+    SIMILARITY_FILTER_FIELDS,
+    TRANSACTION_COLUMNS,
+    StoreError,
+    TransactionStore,
+    replacement_pairs,
+)
+from .caching_store import CachingTransactionStore, TTLCache
+from .columnar_index import IndexedTransactionStore, TransactionIndex
+from .feedback_writer import FeedbackWriter
+from .record_store import CompactRecordStore, CompactTransactionIndex
+from .sqlite_store import SQLiteTransactionStore
+
+_store: Optional[TransactionStore] = None
+_store_lock = threading.Lock()
+_feedback_writer: Optional[FeedbackWriter] = None
+
+
+def create_transaction_store(backend: Optional[str] = None) -> TransactionStore:
+  """Build a new transaction store for the given (or configured) backend."""
+  config = get_config()
+  backend = (backend or config.store_backend).lower()
+  if backend == "bigquery":
+    # Imported lazily so the local backend works without google-cloud-bigquery.
+    from .bigquery_store import BigQueryTransactionStore
+    store = BigQueryTransactionStore(config.transactions_table, config.feedback_table)
+  elif backend == "sqlite":
+    store = SQLiteTransactionStore(
+        config.sqlite_path, config.local_dataset_paths, config.time_reference_paths
+    )
+  else:
+    raise ValueError(f"Unknown transaction store backend: {backend}")
+
+  if config.similarity_index:
+    if config.index_layout == "compact":
+      store = IndexedTransactionStore(store, index_factory=CompactTransactionIndex)
+    elif config.index_layout == "bitmap":
+      store = IndexedTransactionStore(store)
+    else:
+      raise ValueError(f"Unknown similarity index layout: {config.index_layout}")
+  if config.cache_size > 0:
+    store = CachingTransactionStore(
+        store, TTLCache(max_size=config.cache_size, ttl=config.cache_ttl)
+    )
+  return store
+
+
+def get_transaction_store() -> TransactionStore:
+  """Return the process-wide transaction store."""
+  global _store
+  if _store is None:
+    with _store_lock:
+      if _store is None:
+        _store = create_transaction_store()
+  return _store
+
+
+def set_transaction_store(store: Optional[TransactionStore]) -> None:
+  """Replace the process-wide store (None resets to the configured backend)."""
+  global _store
+  with _store_lock:
+    _store = store
+
+
+def get_feedback_writer() -> FeedbackWriter:
+  """Return the process-wide feedback writer, starting it on first use."""
+  global _feedback_writer
+  if _feedback_writer is None:
+    with _store_lock:
+      if _feedback_writer is None:
+        config = get_config()
+        writer = FeedbackWriter(
+            get_transaction_store,
+            batch_size=config.feedback_batch_size,
+            flush_interval=config.feedback_flush_interval,
+            dead_letter_path=config.feedback_dead_letter_path,
+        )
+        writer.start()
+        atexit.register(writer.close)
+        _feedback_writer = writer
+  return _feedback_writer
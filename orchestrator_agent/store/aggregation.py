@@ -0,0 +1,135 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Summary statistics over a population of similar transactions.
+
+Stores compute the raw aggregates (status counts, reject-reason counts,
+payment amounts or their quantiles) as close to the data as they can; the
+helpers here turn those aggregates into the one summary shape every store
+returns. Amount statistics are over USD equivalents (payment_amount_usd),
+so a population mixing currencies gives a meaningful average.
+"""
+
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from ..fx import get_fx_table
+
+# Percentiles of the USD-equivalent payment amount reported in a summary.
+SUMMARY_PERCENTILES = (5, 25, 50, 75, 95)
+
+# Number of most frequent reject reasons reported in a summary.
+TOP_REJECT_REASONS = 10
+
+# Columns of the optional sample rows attached to a summary.
+SAMPLE_COLUMNS = [
+    "transaction_id",
+    "payment_time",
+    "payment_amount",
+    "payment_currency",
+    "approval_status",
+    "reject_reason",
+]
+
+# approval_status -> (count key, rate key) in a summary.
+_STATUS_KEYS = {
+    "APPROVED": ("approved", "approval_rate"),
+    "REJECTED": ("rejected", "rejection_rate"),
+    "MARKED FOR REVIEW": ("marked_for_review", "review_rate"),
+}
+
+
+def percentile(sorted_values: Sequence[float], p: float) -> Optional[float]:
+  """Linearly interpolated percentile (0-100) of already sorted values."""
+  if not sorted_values:
+    return None
+  rank = (len(sorted_values) - 1) * p / 100
+  lower = int(rank)
+  upper = min(lower + 1, len(sorted_values) - 1)
+  return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+def amount_stats(amounts: Iterable[Optional[float]]) -> Dict[str, Any]:
+  """Count, min, max, mean and SUMMARY_PERCENTILES of the non-null amounts."""
+  values = sorted(float(a) for a in amounts if a is not None)
+  if not values:
+    return {"count": 0}
+  stats = {
+      "count": len(values),
+      "min": values[0],
+      "max": values[-1],
+      "mean": sum(values) / len(values),
+  }
+  for p in SUMMARY_PERCENTILES:
+    stats[f"p{p}"] = percentile(values, p)
+  return stats
+
+
+def quantile_stats(
+    count: int,
+    minimum: Optional[float],
+    maximum: Optional[float],
+    mean: Optional[float],
+    quantiles: Optional[Sequence[float]],
+) -> Dict[str, Any]:
+  """amount_stats() from precomputed aggregates and a 101-point quantile array."""
+  if not count:
+    return {"count": 0}
+  stats = {"count": count, "min": minimum, "max": maximum, "mean": mean}
+  for p in SUMMARY_PERCENTILES:
+    stats[f"p{p}"] = quantiles[p] if quantiles and len(quantiles) == 101 else None
+  return stats
+
+
+def build_summary(
+    status_counts: Mapping[Optional[str], int],
+    reason_counts: Mapping[Optional[str], int],
+    amounts: Dict[str, Any],
+    sample: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+  """Assemble the summary returned by summarize_similar_transactions()."""
+  total = sum(status_counts.values())
+  summary: Dict[str, Any] = {"total_similar_transactions": total}
+  for status, (count_key, _) in _STATUS_KEYS.items():
+    summary[count_key] = status_counts.get(status, 0)
+  for status, (_, rate_key) in _STATUS_KEYS.items():
+    summary[rate_key] = round(status_counts.get(status, 0) / total, 4) if total else 0.0
+
+  # Reasons are recorded with inconsistent trailing whitespace; merge them.
+  reasons: Counter = Counter()
+  for reason, count in reason_counts.items():
+    reasons[(reason or "Unspecified").strip() or "Unspecified"] += count
+  summary["reject_reasons"] = dict(reasons.most_common(TOP_REJECT_REASONS))
+  summary["payment_amount_usd"] = {
+      key: round(value, 2) if isinstance(value, float) else value for key, value in amounts.items()
+  }
+  if sample is not None:
+    summary["sample"] = sample
+  return summary
+
+
+def summarize_rows(rows: Sequence[Mapping[str, Any]], sample_size: int = 0) -> Dict[str, Any]:
+  """Summarize fully materialized rows (newest first); the fallback for stores without aggregation."""
+  status_counts = Counter(row.get("approval_status") for row in rows)
+  reason_counts = Counter(
+      row.get("reject_reason") for row in rows if row.get("approval_status") == "REJECTED"
+  )
+  sample = [{column: row.get(column) for column in SAMPLE_COLUMNS} for row in rows[:sample_size]]
+  fx = get_fx_table()
+  return build_summary(
+      status_counts,
+      reason_counts,
+      amount_stats(fx.to_usd(row.get("payment_amount"), row.get("payment_currency")) for row in rows),
+      sample if sample_size else None,
+  )
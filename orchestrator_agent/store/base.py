@@ -0,0 +1,260 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Storage backend interface used by the transaction tools."""
+
+import abc
+import logging
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from ..fx import BASE_CURRENCY, get_fx_table
+from .aggregation import summarize_rows
+
+logger = logging.getLogger('google_adk.' + __name__)
+
+# Called with the Transactions rows after they are written to a store, and the
+# previously stored rows that some of them replaced (same transaction_id).
+WriteListener = Callable[[Sequence[Dict[str, Any]], Sequence[Dict[str, Any]]], None]
+
+# Columns of the Transactions table, in table order.
+TRANSACTION_COLUMNS = [
+    "transaction_id",
+    "payment_time",
+    "payer_id",
+    "payee_id",
+    "payment_amount",
+    "payment_currency",
+    "payment_method",
+    "payment_purpose",
+    "vendor_id",
+    "payee_country",
+    "vendor_country",
+    "vendor_industry",
+    "approval_status",
+    "reject_reason",
+]
+
+# Columns returned by get_rejected_transactions().
+REJECTED_COLUMNS = [
+    "transaction_id",
+    "payment_time",
+    "payer_id",
+    "payee_id",
+    "payment_amount",
+    "payment_currency",
+    "reject_reason",
+]
+
+# Columns that get_similar_transactions() can filter on by equality.
+SIMILARITY_FILTER_FIELDS = [
+    "payer_id",
+    "payee_id",
+    "payment_currency",
+    "payment_method",
+    "vendor_id",
+    "payee_country",
+    "vendor_country",
+    "vendor_industry",
+]
+
+# Row limit standing in for "no limit" (the largest SQLite/BigQuery INT64).
+_UNLIMITED = 2**63 - 1
+
+# Fraction above/below the USD equivalent of payment_amount considered "similar".
+AMOUNT_TOLERANCE = 0.2
+
+# Columns of the Transaction_Feedback table, in table order.
+FEEDBACK_COLUMNS = [
+    "feedback_id",
+    "feedback_timestamp",
+    "transaction_id",
+    "payer_id",
+    "payee_id",
+    "payment_amount",
+    "payment_currency",
+    "payment_method",
+    "payment_purpose",
+    "vendor_id",
+    "payee_country",
+    "vendor_country",
+    "vendor_industry",
+    "agent_decision",
+    "agent_reasoning",
+    "agent_confidence",
+    "user_decision",
+    "is_agent_correct",
+    "feedback_notes",
+    "session_id",
+    "agent_version",
+]
+
+
+class StoreError(Exception):
+  """Raised when a storage backend rejects a read or write."""
+
+
+class TransactionStore(abc.ABC):
+  """Read/write access to the Transactions and Transaction_Feedback tables."""
+
+  name = "base"
+
+  # Replaced, never mutated, so an instance's registration cannot leak into
+  # the class or other stores, and a write in progress keeps the tuple it read.
+  _write_listeners: Tuple[WriteListener, ...] = ()
+
+  @abc.abstractmethod
+  def get_rejected_transactions(self) -> List[Dict[str, Any]]:
+    """Return all REJECTED transactions with REJECTED_COLUMNS."""
+
+  @abc.abstractmethod
+  def find_similar_transactions(
+      self,
+      filters: Dict[str, str],
+      payment_amount: Optional[float] = None,
+      limit: int = 100,
+      columns: Sequence[str] = TRANSACTION_COLUMNS,
+  ) -> List[Dict[str, Any]]:
+    """Return the most recent transactions matching the filters.
+
+    Args:
+        filters: Equality filters keyed by SIMILARITY_FILTER_FIELDS.
+        payment_amount: If given, only transactions whose USD equivalent is
+            within +/- AMOUNT_TOLERANCE of it (see similar_amount_bounds()).
+        limit: Maximum number of rows, newest payment_time first.
+        columns: Columns to return for each row.
+    """
+
+  def summarize_similar_transactions(
+      self,
+      filters: Dict[str, str],
+      payment_amount: Optional[float] = None,
+      sample_size: int = 0,
+  ) -> Dict[str, Any]:
+    """Summarize every transaction matching the filters, not just the newest N.
+
+    Returns approval counts and rates, the most frequent reject reasons,
+    payment_amount_usd count/min/max/mean/percentiles and, if `sample_size` is
+    positive, that many of the newest matching rows with SAMPLE_COLUMNS.
+    This default materializes the matching rows; backends override it to
+    aggregate in place.
+    """
+    rows = self.find_similar_transactions(filters, payment_amount=payment_amount, limit=_UNLIMITED)
+    return summarize_rows(rows, sample_size)
+
+  @abc.abstractmethod
+  def load_all_transactions(self) -> List[Dict[str, Any]]:
+    """Return every Transactions row with TRANSACTION_COLUMNS."""
+
+  def load_transaction_columns(self, columns: Sequence[str]) -> List[Dict[str, Any]]:
+    """Return every Transactions row with only `columns` (a subset of TRANSACTION_COLUMNS).
+
+    Backends that can select columns override this, so a caller needing a
+    few columns of the whole table does not fetch every column.
+    """
+    return [{column: row.get(column) for column in columns} for row in self.load_all_transactions()]
+
+  @abc.abstractmethod
+  def insert_feedback(self, feedback_row: Dict[str, Any]) -> None:
+    """Store one Transaction_Feedback row, raising StoreError on failure."""
+
+  @abc.abstractmethod
+  def insert_transaction(self, transaction_row: Dict[str, Any]) -> None:
+    """Store one Transactions row, raising StoreError on failure."""
+
+  def add_write_listener(self, listener: WriteListener) -> None:
+    """Call `listener(rows, replaced)` after Transactions rows are written to this store.
+
+    `replaced` holds the stored versions of rows whose transaction_id was
+    already present, so derived state can retract them before counting the
+    new version; it is empty for backends that only append. Wrapping stores
+    forward this to the store they wrap, so a listener sees each write
+    exactly once whichever layer it was registered on.
+    """
+    self._write_listeners = self._write_listeners + (listener,)
+
+  def _notify_written(self, rows: Sequence[Dict[str, Any]], replaced: Sequence[Dict[str, Any]] = ()) -> None:
+    for listener in self._write_listeners:
+      try:
+        listener(rows, replaced)
+      except Exception as e:
+        # Derived state must never fail the write that fed it.
+        logger.warning(f"Write listener {listener!r} failed: {e}")
+
+  def ensure_schema(self) -> None:
+    """Create the tables this store writes to, if it needs to."""
+
+  def insert_feedback_batch(self, feedback_rows: Sequence[Dict[str, Any]]) -> None:
+    """Store Transaction_Feedback rows, raising StoreError on failure.
+
+    Backends should treat feedback_id as an idempotency key so a batch can be
+    retried after a partial failure without duplicating rows.
+    """
+    for row in feedback_rows:
+      self.insert_feedback(row)
+
+  def insert_transactions_batch(self, transaction_rows: Sequence[Dict[str, Any]]) -> None:
+    """Store Transactions rows, keyed on transaction_id like insert_feedback_batch()."""
+    for row in transaction_rows:
+      self.insert_transaction(row)
+
+  def load_rows(self, transaction_rows: Sequence[Dict[str, Any]]) -> int:
+    """Bulk-load Transactions rows and return how many were loaded.
+
+    Meant for ingest: backends override it with their cheapest bulk path
+    (a single SQLite transaction, a BigQuery load job) instead of row inserts.
+    """
+    self.insert_transactions_batch(transaction_rows)
+    return len(transaction_rows)
+
+
+def replacement_pairs(
+    rows: Sequence[Dict[str, Any]], replaced: Sequence[Dict[str, Any]]
+) -> List[Tuple[Optional[Dict[str, Any]], Dict[str, Any]]]:
+  """(stored row it replaced or None, row) for each row a write listener receives.
+
+  Only the last row per transaction_id is kept, since that is the one the
+  store holds after the write.
+  """
+  previous = {row.get("transaction_id"): row for row in replaced}
+  latest: Dict[Any, Dict[str, Any]] = {}
+  pairs = []
+  for row in rows:
+    transaction_id = row.get("transaction_id")
+    if transaction_id is None:
+      pairs.append((None, row))
+    else:
+      latest[transaction_id] = row
+  pairs += [(previous.get(transaction_id), row) for transaction_id, row in latest.items()]
+  return pairs
+
+
+def amount_bounds(payment_amount: float) -> tuple:
+  """Return the (lower, upper) amount band considered similar."""
+  return (
+      payment_amount * (1 - AMOUNT_TOLERANCE),
+      payment_amount * (1 + AMOUNT_TOLERANCE),
+  )
+
+
+def similar_amount_bounds(filters: Dict[str, Any], payment_amount: float) -> tuple:
+  """Return the USD band considered similar to a probe amount.
+
+  The amount is taken to be in the filtered payment_currency, or in USD when
+  no currency filter is given. Raises ValueError for a currency without a rate.
+  """
+  currency = filters.get("payment_currency") or BASE_CURRENCY
+  usd = get_fx_table().to_usd(payment_amount, currency)
+  if usd is None:
+    raise ValueError(f"No FX rate for currency {currency}")
+  return amount_bounds(usd)
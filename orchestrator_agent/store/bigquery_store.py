@@ -0,0 +1,197 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""BigQuery-backed transaction store."""
+
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Sequence
+
+from google.cloud import bigquery
+
+from ..bigquery_client import BigQueryClientManager, get_client_manager
+from .base import (
+    REJECTED_COLUMNS,
+    TRANSACTION_COLUMNS,
+    StoreError,
+    TransactionStore,
+)
+from .aggregation import SAMPLE_COLUMNS, TOP_REJECT_REASONS, build_summary, quantile_stats
+from .query_builder import Query, columns_query, similarity_query, status_query, summary_query
+
+logger = logging.getLogger('google_adk.' + __name__)
+
+_PARAMETER_TYPES = {bool: "BOOL", int: "INT64", float: "FLOAT64", str: "STRING"}
+
+FEEDBACK_SCHEMA = [
+    bigquery.SchemaField("feedback_id", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("feedback_timestamp", "TIMESTAMP", mode="REQUIRED"),
+    bigquery.SchemaField("transaction_id", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("payer_id", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("payee_id", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("payment_amount", "FLOAT64", mode="NULLABLE"),
+    bigquery.SchemaField("payment_currency", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("payment_method", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("payment_purpose", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("vendor_id", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("payee_country", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("vendor_country", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("vendor_industry", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("agent_decision", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("agent_reasoning", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("agent_confidence", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("user_decision", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("is_agent_correct", "BOOLEAN", mode="REQUIRED"),
+    bigquery.SchemaField("feedback_notes", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("session_id", "STRING", mode="NULLABLE"),
+    bigquery.SchemaField("agent_version", "STRING", mode="NULLABLE"),
+]
+
+
+class BigQueryTransactionStore(TransactionStore):
+  """Transaction store backed by the Tri_Netra BigQuery dataset."""
+
+  name = "bigquery"
+
+  def __init__(
+      self,
+      transactions_table: str,
+      feedback_table: str,
+      manager: Optional[BigQueryClientManager] = None,
+  ):
+    self.transactions_table = transactions_table
+    self.feedback_table = feedback_table
+    self.manager = manager or get_client_manager()
+    self._schema_ready = False
+    self._schema_lock = threading.Lock()
+
+  def _run(self, query: Query) -> List[Dict[str, Any]]:
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=[
+            bigquery.ScalarQueryParameter(name, _PARAMETER_TYPES[type(value)], value)
+            for name, value in query.params.items()
+        ]
+    )
+    results = self.manager.run_query(query.sql, job_config=job_config)
+    return [dict(row.items()) for row in results]
+
+  def get_rejected_transactions(self) -> List[Dict[str, Any]]:
+    return self._run(
+        status_query("bigquery", self.transactions_table, "REJECTED", REJECTED_COLUMNS)
+    )
+
+  def find_similar_transactions(
+      self,
+      filters: Dict[str, str],
+      payment_amount: Optional[float] = None,
+      limit: int = 100,
+      columns: Sequence[str] = TRANSACTION_COLUMNS,
+  ) -> List[Dict[str, Any]]:
+    return self._run(
+        similarity_query(
+            "bigquery", self.transactions_table, filters, payment_amount, limit, columns
+        )
+    )
+
+  def summarize_similar_transactions(
+      self,
+      filters: Dict[str, str],
+      payment_amount: Optional[float] = None,
+      sample_size: int = 0,
+  ) -> Dict[str, Any]:
+    # One round trip returns only aggregates; APPROX_QUANTILES percentiles are
+    # approximate on large populations.
+    (row,) = self._run(
+        summary_query("bigquery", self.transactions_table, filters, payment_amount, TOP_REJECT_REASONS)
+    )
+    status_counts = {
+        "APPROVED": row["approved"],
+        "REJECTED": row["rejected"],
+        "MARKED FOR REVIEW": row["marked_for_review"],
+        None: row["other"],
+    }
+    reason_counts = {entry["reason"]: entry["n"] for entry in row["reject_reasons"] or []}
+    amounts = quantile_stats(
+        row["amount_count"], row["amount_min"], row["amount_max"], row["amount_mean"], row["amount_quantiles"]
+    )
+    sample = None
+    if sample_size > 0:
+      sample = self.find_similar_transactions(filters, payment_amount, sample_size, SAMPLE_COLUMNS)
+    return build_summary(status_counts, reason_counts, amounts, sample)
+
+  def load_all_transactions(self) -> List[Dict[str, Any]]:
+    query = f"""
+        SELECT {", ".join(TRANSACTION_COLUMNS)}
+        FROM `{self.transactions_table}`
+     """
+    results = self.manager.run_query(query)
+    return [dict(row.items()) for row in results]
+
+  def load_transaction_columns(self, columns: Sequence[str]) -> List[Dict[str, Any]]:
+    return self._run(columns_query("bigquery", self.transactions_table, columns))
+
+  def ensure_schema(self) -> None:
+    """Create the feedback table if missing; checked once per store."""
+    if self._schema_ready:
+      return
+    with self._schema_lock:
+      if self._schema_ready:
+        return
+      client = self.manager.client
+      try:
+        client.get_table(self.feedback_table, timeout=self.manager.timeout)
+      except Exception:
+        feedback_table = bigquery.Table(self.feedback_table, schema=FEEDBACK_SCHEMA)
+        feedback_table.description = "Stores user feedback on transaction approval decisions"
+        client.create_table(feedback_table, exists_ok=True, timeout=self.manager.timeout)
+        logger.info(f"Created table {self.feedback_table}")
+      self._schema_ready = True
+
+  def _insert_rows(self, table: str, rows: Sequence[Dict[str, Any]], key: str) -> None:
+    # Streaming inserts are deduplicated on row_ids, so retried batches are
+    # idempotent per feedback_id / transaction_id.
+    errors = self.manager.insert_rows_json(
+        table, list(rows), row_ids=[row.get(key) for row in rows]
+    )
+    if errors:
+      raise StoreError(errors)
+
+  def insert_feedback(self, feedback_row: Dict[str, Any]) -> None:
+    self.insert_feedback_batch([feedback_row])
+
+  def insert_transaction(self, transaction_row: Dict[str, Any]) -> None:
+    self.insert_transactions_batch([transaction_row])
+
+  def insert_feedback_batch(self, feedback_rows: Sequence[Dict[str, Any]]) -> None:
+    self.ensure_schema()
+    self._insert_rows(self.feedback_table, feedback_rows, "feedback_id")
+
+  def insert_transactions_batch(self, transaction_rows: Sequence[Dict[str, Any]]) -> None:
+    self._insert_rows(self.transactions_table, transaction_rows, "transaction_id")
+    # Streaming inserts append; nothing stored is replaced in place.
+    self._notify_written(transaction_rows)
+
+  def load_rows(self, transaction_rows: Sequence[Dict[str, Any]]) -> int:
+    # Load jobs are free and not subject to streaming-insert quotas, but unlike
+    # insert_transactions_batch() they do not deduplicate on transaction_id.
+    job_config = bigquery.LoadJobConfig(
+        write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+        source_format=bigquery.SourceFormat.NEWLINE_DELIMITED_JSON,
+    )
+    try:
+      self.manager.load_rows_json(self.transactions_table, list(transaction_rows), job_config=job_config)
+    except Exception as e:
+      raise StoreError(str(e)) from e
+    self._notify_written(transaction_rows)
+    return len(transaction_rows)
@@ -0,0 +1,254 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""TTL + LRU result cache in front of a transaction store."""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from ..fx import get_fx_table
+from .base import TRANSACTION_COLUMNS, TransactionStore, WriteListener, similar_amount_bounds
+
+_REJECTED_KEY = ("rejected",)
+
+# Writes touching more rows than this clear the cache instead of matching
+# every row against every entry.
+_INVALIDATE_MAX_ROWS = 256
+
+
+class TTLCache:
+  """Size-bounded LRU cache whose entries also expire after `ttl` seconds.
+
+  Each entry carries an arbitrary `tag` that invalidate() predicates can
+  inspect, so writers can drop exactly the entries they affect.
+  """
+
+  def __init__(self, max_size: int = 1024, ttl: float = 300.0, clock: Callable[[], float] = time.monotonic):
+    self.max_size = max_size
+    self.ttl = ttl
+    self._clock = clock
+    self._lock = threading.Lock()
+    self._entries: "OrderedDict[Hashable, Tuple[float, Any, Any]]" = OrderedDict()
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+    self.expirations = 0
+    self.invalidations = 0
+
+  def get(self, key: Hashable) -> Tuple[bool, Any]:
+    """Return (found, value), refreshing the entry's LRU position on a hit."""
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is None:
+        self.misses += 1
+        return False, None
+      expires_at, value, _ = entry
+      if expires_at <= self._clock():
+        del self._entries[key]
+        self.expirations += 1
+        self.misses += 1
+        return False, None
+      self._entries.move_to_end(key)
+      self.hits += 1
+      return True, value
+
+  def put(self, key: Hashable, value: Any, tag: Any = None) -> None:
+    with self._lock:
+      self._entries[key] = (self._clock() + self.ttl, value, tag)
+      self._entries.move_to_end(key)
+      while len(self._entries) > self.max_size:
+        self._entries.popitem(last=False)
+        self.evictions += 1
+
+  def invalidate(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+    """Drop every entry for which predicate(key, tag) is true."""
+    with self._lock:
+      stale = [key for key, (_, _, tag) in self._entries.items() if predicate(key, tag)]
+      for key in stale:
+        del self._entries[key]
+      self.invalidations += len(stale)
+      return len(stale)
+
+  def clear(self) -> None:
+    with self._lock:
+      self._entries.clear()
+
+  def stats(self) -> Dict[str, Any]:
+    with self._lock:
+      lookups = self.hits + self.misses
+      return {
+          "size": len(self._entries),
+          "max_size": self.max_size,
+          "ttl_seconds": self.ttl,
+          "hits": self.hits,
+          "misses": self.misses,
+          "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+          "evictions": self.evictions,
+          "expirations": self.expirations,
+          "invalidations": self.invalidations,
+      }
+
+
+def _normalize_filters(filters: Dict[str, Any]) -> Tuple[Tuple[str, Any], ...]:
+  normalized = []
+  for field, value in filters.items():
+    if isinstance(value, str):
+      value = value.strip()
+    if value is None or value == "":
+      continue
+    normalized.append((field, value))
+  return tuple(sorted(normalized))
+
+
+def _normalize_amount(payment_amount: Optional[float]) -> Optional[float]:
+  # Amounts are compared at cent precision so 100.0 and 100.001 share an entry.
+  return None if payment_amount is None else round(float(payment_amount), 2)
+
+
+def _row_matches(row: Dict[str, Any], filters: Tuple[Tuple[str, Any], ...], payment_amount: Optional[float]) -> bool:
+  if any(row.get(field) != value for field, value in filters):
+    return False
+  if payment_amount is not None:
+    amount = get_fx_table().to_usd(row.get("payment_amount"), row.get("payment_currency"))
+    if amount is None:
+      return False
+    lower, upper = similar_amount_bounds(dict(filters), payment_amount)
+    return lower <= amount <= upper
+  return True
+
+
+class CachingTransactionStore(TransactionStore):
+  """Memoizes reads of another store and invalidates them on writes.
+
+  Similarity results are keyed on normalized filters, amount, limit and
+  selected columns.
+  Every Transactions write to the inner store, including corrections that
+  replace a stored row, drops only the cached similarity results whose
+  filters and amount band the written or replaced rows satisfy, and the
+  cached rejected list only when one of them is or was REJECTED.
+  """
+
+  def __init__(self, inner: TransactionStore, cache: Optional[TTLCache] = None):
+    self.inner = inner
+    self.name = f"{inner.name}+cache"
+    self.cache = cache or TTLCache()
+    inner.add_write_listener(self._on_written)
+
+  def _on_written(self, rows: Sequence[Dict[str, Any]], replaced: Sequence[Dict[str, Any]]) -> None:
+    self.invalidate_rows([*rows, *replaced])
+
+  def get_rejected_transactions(self) -> List[Dict[str, Any]]:
+    found, value = self.cache.get(_REJECTED_KEY)
+    if found:
+      return list(value)
+    value = self.inner.get_rejected_transactions()
+    self.cache.put(_REJECTED_KEY, value)
+    return list(value)
+
+  def find_similar_transactions(
+      self,
+      filters: Dict[str, str],
+      payment_amount: Optional[float] = None,
+      limit: int = 100,
+      columns: Sequence[str] = TRANSACTION_COLUMNS,
+  ) -> List[Dict[str, Any]]:
+    normalized = _normalize_filters(filters)
+    amount = _normalize_amount(payment_amount)
+    columns = tuple(columns)
+    key = ("similar", normalized, amount, int(limit), columns)
+    found, value = self.cache.get(key)
+    if found:
+      return list(value)
+    value = self.inner.find_similar_transactions(
+        dict(normalized), payment_amount=amount, limit=limit, columns=columns
+    )
+    self.cache.put(key, value, tag=(normalized, amount))
+    return list(value)
+
+  def summarize_similar_transactions(
+      self,
+      filters: Dict[str, str],
+      payment_amount: Optional[float] = None,
+      sample_size: int = 0,
+  ) -> Dict[str, Any]:
+    normalized = _normalize_filters(filters)
+    amount = _normalize_amount(payment_amount)
+    key = ("summary", normalized, amount, int(sample_size))
+    found, value = self.cache.get(key)
+    if found:
+      return copy.deepcopy(value)
+    value = self.inner.summarize_similar_transactions(
+        dict(normalized), payment_amount=amount, sample_size=sample_size
+    )
+    self.cache.put(key, value, tag=(normalized, amount))
+    return copy.deepcopy(value)
+
+  def load_all_transactions(self) -> List[Dict[str, Any]]:
+    return self.inner.load_all_transactions()
+
+  def load_transaction_columns(self, columns: Sequence[str]) -> List[Dict[str, Any]]:
+    return self.inner.load_transaction_columns(columns)
+
+  def insert_feedback(self, feedback_row: Dict[str, Any]) -> None:
+    self.inner.insert_feedback(feedback_row)
+
+  def insert_transaction(self, transaction_row: Dict[str, Any]) -> None:
+    try:
+      self.inner.insert_transaction(transaction_row)
+    except Exception:
+      # Invalidate even on a reported failure: the row may have landed anyway.
+      self.invalidate_rows([transaction_row])
+      raise
+
+  def add_write_listener(self, listener: WriteListener) -> None:
+    self.inner.add_write_listener(listener)
+
+  def ensure_schema(self) -> None:
+    self.inner.ensure_schema()
+
+  def insert_feedback_batch(self, feedback_rows: Sequence[Dict[str, Any]]) -> None:
+    self.inner.insert_feedback_batch(feedback_rows)
+
+  def insert_transactions_batch(self, transaction_rows: Sequence[Dict[str, Any]]) -> None:
+    try:
+      self.inner.insert_transactions_batch(transaction_rows)
+    except Exception:
+      self.invalidate_rows(transaction_rows)
+      raise
+
+  def load_rows(self, transaction_rows: Sequence[Dict[str, Any]]) -> int:
+    try:
+      return self.inner.load_rows(transaction_rows)
+    finally:
+      # A bulk load touches too many entries to invalidate them one by one.
+      self.cache.clear()
+
+  def invalidate_rows(self, rows: Sequence[Dict[str, Any]]) -> int:
+    """Drop cached results that writing, or replacing, these transaction rows would change."""
+    if len(rows) > _INVALIDATE_MAX_ROWS:
+      dropped = self.cache.stats()["size"]
+      self.cache.clear()
+      return dropped
+    rejected = any(row.get("approval_status") == "REJECTED" for row in rows)
+
+    def affected(key: Hashable, tag: Any) -> bool:
+      if key == _REJECTED_KEY:
+        return rejected
+      filters, amount = tag
+      return any(_row_matches(row, filters, amount) for row in rows)
+
+    return self.cache.invalidate(affected)
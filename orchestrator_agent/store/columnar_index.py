@@ -0,0 +1,579 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""In-process columnar index for similarity lookups.
+
+Rows are held column-wise, ordered oldest to newest by payment_time, so a
+row's position doubles as its recency rank. String columns are dictionary
+encoded and every encoded value keeps an inverted index. For the
+low-cardinality columns that index is a bitmap (a Python int with bit `i`
+set for row `i`), built once per value from the positions holding it, never
+a bit at a time: an equality filter is a bitmap lookup, a combination of
+filters is a bitwise AND, and "newest first" is the set bits, unpacked from
+the bitmap's bytes, in reverse. A bitmap is as long as the table, so the
+payer, payee and vendor ids (one value per entity) instead keep a sorted
+array of positions per value; a filter on one of them starts from the
+shortest such array and checks the other filters on the encoded codes of
+just those rows. USD-equivalent amounts, converted per batch as rows are
+added, are kept in a separate sorted index so an amount band is a pair of
+bisects.
+"""
+
+import bisect
+import logging
+import threading
+from array import array
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from ..fx import get_fx_table
+from .aggregation import SAMPLE_COLUMNS, amount_stats, build_summary
+from .base import (
+    REJECTED_COLUMNS,
+    TRANSACTION_COLUMNS,
+    TransactionStore,
+    WriteListener,
+    similar_amount_bounds,
+)
+
+logger = logging.getLogger('google_adk.' + __name__)
+
+# Columns kept as plain per-row values instead of being dictionary encoded.
+_RAW_COLUMNS = ("transaction_id", "payment_time", "payment_amount")
+
+CATEGORICAL_COLUMNS = [c for c in TRANSACTION_COLUMNS if c not in _RAW_COLUMNS]
+
+# High-cardinality columns indexed by position arrays instead of bitmaps.
+ID_COLUMNS = ("payer_id", "payee_id", "vendor_id")
+
+
+def _time_key(value: Any) -> tuple:
+  # NULL payment_time sorts oldest, matching ORDER BY payment_time DESC.
+  if value is None:
+    return (0, "")
+  if isinstance(value, datetime):
+    return (1, value.isoformat())
+  return (1, str(value))
+
+
+def _bits_descending(bits: int, size: int) -> List[int]:
+  """Set positions of a bitmap over `size` rows, highest first."""
+  # One pass over the bitmap's bytes; peeling bits off the int is O(size) per bit.
+  if not bits:
+    return []
+  packed = np.frombuffer(bits.to_bytes((size + 7) // 8, "little"), dtype=np.uint8)
+  return np.flatnonzero(np.unpackbits(packed, bitorder="little"))[::-1].tolist()
+
+
+def _to_bitmap(positions: Iterable[int], size: int) -> int:
+  # Built in a byte buffer: OR-ing bits into an int one at a time is quadratic.
+  positions = np.asarray(positions, dtype=np.int64)
+  buffer = np.zeros((size + 7) // 8, dtype=np.uint8)
+  np.bitwise_or.at(buffer, positions >> 3, (1 << (positions & 7)).astype(np.uint8))
+  return int.from_bytes(buffer.tobytes(), "little")
+
+
+def _usd_amounts(rows: List[Dict[str, Any]]) -> List[float]:
+  return get_fx_table().to_usd_array(
+      [row.get("payment_amount") for row in rows],
+      [row.get("payment_currency") for row in rows],
+  ).tolist()
+
+
+class _EncodedColumn:
+  """Dictionary-encoded column; subclasses keep an inverted index per value."""
+
+  __slots__ = ("values", "codes", "lookup")
+
+  def __init__(self):
+    self.values: List[Any] = []
+    self.codes = array("i")
+    self.lookup: Dict[Any, int] = {}
+
+  def _new_value(self) -> None:
+    raise NotImplementedError
+
+  def _code(self, value: Any) -> int:
+    code = self.lookup.get(value)
+    if code is None:
+      code = len(self.values)
+      self.lookup[value] = code
+      self.values.append(value)
+      self._new_value()
+    return code
+
+  def append(self, value: Any) -> None:
+    """Encode `value` for the next row; its index is updated by index_from()."""
+    self.codes.append(self._code(value))
+
+  def _grouped_from(self, start: int):
+    """(code, positions) of the rows appended since position `start`."""
+    codes = np.frombuffer(self.codes, dtype=np.int32)[start:]
+    order = np.argsort(codes, kind="stable")
+    distinct, first = np.unique(codes[order], return_index=True)
+    return zip(distinct.tolist(), np.split(order + start, first[1:]))
+
+  def code_counts(self, positions: np.ndarray) -> Dict[Any, int]:
+    """Occurrences of each value among the rows at `positions`."""
+    counts = np.bincount(np.frombuffer(self.codes, dtype=np.int32)[positions], minlength=len(self.values))
+    return {self.values[code]: count for code, count in enumerate(counts.tolist()) if count}
+
+  def select(self, positions: np.ndarray, value: Any) -> np.ndarray:
+    """The subset of `positions` whose row holds `value`."""
+    code = self.lookup.get(value)
+    if code is None:
+      return positions[:0]
+    return positions[np.frombuffer(self.codes, dtype=np.int32)[positions] == code]
+
+  def value_at(self, position: int) -> Any:
+    return self.values[self.codes[position]]
+
+
+class _CategoricalColumn(_EncodedColumn):
+  """Dictionary-encoded column with one bitmap per distinct value."""
+
+  __slots__ = ("bitmaps",)
+
+  def __init__(self):
+    super().__init__()
+    self.bitmaps: List[int] = []
+
+  def _new_value(self) -> None:
+    self.bitmaps.append(0)
+
+  def replace(self, position: int, value: Any) -> None:
+    """Change the value of an indexed row, moving its bit between bitmaps."""
+    code, old = self._code(value), self.codes[position]
+    if code != old:
+      self.bitmaps[old] &= ~(1 << position)
+      self.bitmaps[code] |= 1 << position
+      self.codes[position] = code
+
+  def index_from(self, start: int) -> None:
+    """Set the bitmap bits of rows appended since position `start`."""
+    size = len(self.codes)
+    if start >= size:
+      return
+    for code, positions in self._grouped_from(start):
+      self.bitmaps[code] |= _to_bitmap(positions, size)
+
+  def bitmap(self, value: Any) -> int:
+    code = self.lookup.get(value)
+    return 0 if code is None else self.bitmaps[code]
+
+
+class _IdColumn(_EncodedColumn):
+  """Dictionary-encoded column with one sorted position array per distinct value."""
+
+  __slots__ = ("positions",)
+
+  def __init__(self):
+    super().__init__()
+    self.positions: List[array] = []
+
+  def _new_value(self) -> None:
+    self.positions.append(array("i"))
+
+  def replace(self, position: int, value: Any) -> None:
+    """Change the value of an indexed row, moving it between position arrays."""
+    code, old = self._code(value), self.codes[position]
+    if code != old:
+      held = self.positions[old]
+      del held[bisect.bisect_left(held, position)]
+      bisect.insort(self.positions[code], position)
+      self.codes[position] = code
+
+  def index_from(self, start: int) -> None:
+    """Append the rows added since position `start` to their values' arrays."""
+    if start >= len(self.codes):
+      return
+    for code, positions in self._grouped_from(start):
+      # Every new position is past the existing ones, so the arrays stay sorted.
+      self.positions[code].frombytes(positions.astype(np.int32).tobytes())
+
+  def positions_of(self, value: Any) -> np.ndarray:
+    """Ascending positions of the rows holding `value`."""
+    code = self.lookup.get(value)
+    if code is None:
+      return np.zeros(0, dtype=np.intp)
+    return np.frombuffer(self.positions[code], dtype=np.int32).astype(np.intp)
+
+
+class TransactionIndex:
+  """Columnar, bitmap-indexed snapshot of the Transactions table."""
+
+  def __init__(self, rows: Iterable[Dict[str, Any]] = ()):
+    self._lock = threading.RLock()
+    self._reset()
+    self._build(rows)
+
+  def _reset(self) -> None:
+    self.transaction_ids: List[Optional[str]] = []
+    self._positions: Dict[Any, int] = {}
+    self.payment_times: List[Any] = []
+    self.amounts = array("d")
+    self.amounts_usd = array("d")
+    self.columns = {
+        column: _IdColumn() if column in ID_COLUMNS else _CategoricalColumn()
+        for column in CATEGORICAL_COLUMNS
+    }
+    self._sorted_amounts = array("d")
+    self._amount_positions = array("i")
+    self._all_bits = 0
+    self._newest_key = (0, "")
+
+  def _build(self, rows: Iterable[Dict[str, Any]]) -> None:
+    ordered = sorted(rows, key=lambda row: _time_key(row.get("payment_time")))
+    for row, amount_usd in zip(ordered, _usd_amounts(ordered)):
+      self._append(row, amount_usd)
+    self._index_from(0)
+    pairs = sorted(
+        (amount, position) for position, amount in enumerate(self.amounts_usd)
+        if amount == amount  # skip NaN placeholders for NULL or unconvertible amounts
+    )
+    self._sorted_amounts = array("d", (amount for amount, _ in pairs))
+    self._amount_positions = array("i", (position for _, position in pairs))
+
+  def _append(self, row: Dict[str, Any], amount_usd: float) -> int:
+    position = len(self.transaction_ids)
+    self.transaction_ids.append(row.get("transaction_id"))
+    if row.get("transaction_id") is not None:
+      self._positions[row.get("transaction_id")] = position
+    self.payment_times.append(row.get("payment_time"))
+    amount = row.get("payment_amount")
+    self.amounts.append(float("nan") if amount is None else float(amount))
+    self.amounts_usd.append(amount_usd)
+    for column, encoded in self.columns.items():
+      encoded.append(row.get(column))
+    self._newest_key = max(self._newest_key, _time_key(row.get("payment_time")))
+    return position
+
+  def _index_from(self, start: int) -> None:
+    for encoded in self.columns.values():
+      encoded.index_from(start)
+    self._all_bits = (1 << len(self)) - 1
+
+  def __len__(self) -> int:
+    return len(self.transaction_ids)
+
+  def add(self, row: Dict[str, Any]) -> None:
+    """Add one row, appending in place when it is the newest transaction."""
+    self.add_many([row])
+
+  def add_many(self, rows: Iterable[Dict[str, Any]]) -> int:
+    """Add rows, replacing indexed ones with the same transaction_id; return how many.
+
+    Within `rows` the last one for a transaction_id wins, as with the stores'
+    upserts. A replacement with the same payment_time is updated in place;
+    rows newer than everything indexed are appended in place. Any other row
+    triggers a single rebuild to keep position == recency rank.
+    """
+    with self._lock:
+      latest: Dict[Any, Dict[str, Any]] = {}
+      fresh = []
+      for row in rows:
+        transaction_id = row.get("transaction_id")
+        if transaction_id is None:
+          fresh.append(row)
+        else:
+          latest[transaction_id] = row
+      replacements = {}
+      for transaction_id, row in latest.items():
+        position = self._positions.get(transaction_id)
+        if position is None:
+          fresh.append(row)
+        else:
+          replacements[position] = row
+      fresh.sort(key=lambda row: _time_key(row.get("payment_time")))
+      moved = any(
+          _time_key(row.get("payment_time")) != _time_key(self.payment_times[position])
+          for position, row in replacements.items()
+      )
+      if moved or (fresh and _time_key(fresh[0].get("payment_time")) < self._newest_key):
+        existing = [replacements.get(position) or self.row_at(position) for position in range(len(self))]
+        self._reset()
+        self._build(existing + fresh)
+        return len(replacements) + len(fresh)
+      positions = list(replacements)
+      for position, amount_usd in zip(positions, _usd_amounts([replacements[p] for p in positions])):
+        self._replace(position, replacements[position], amount_usd)
+      start = len(self)
+      for row, amount_usd in zip(fresh, _usd_amounts(fresh)):
+        position = self._append(row, amount_usd)
+        amount = self.amounts_usd[position]
+        if amount == amount:
+          slot = bisect.bisect_right(self._sorted_amounts, amount)
+          self._sorted_amounts.insert(slot, amount)
+          self._amount_positions.insert(slot, position)
+      self._index_from(start)
+      return len(replacements) + len(fresh)
+
+  def _replace(self, position: int, row: Dict[str, Any], amount_usd: float) -> None:
+    """Overwrite the row at `position` with one of the same payment_time."""
+    self.payment_times[position] = row.get("payment_time")
+    amount = row.get("payment_amount")
+    self.amounts[position] = float("nan") if amount is None else float(amount)
+    for column, encoded in self.columns.items():
+      encoded.replace(position, row.get(column))
+    old = self.amounts_usd[position]
+    self.amounts_usd[position] = amount_usd
+    if old == old:
+      start = bisect.bisect_left(self._sorted_amounts, old)
+      slot = start + list(self._amount_positions[start:bisect.bisect_right(self._sorted_amounts, old)]).index(position)
+      del self._sorted_amounts[slot]
+      del self._amount_positions[slot]
+    if amount_usd == amount_usd:
+      slot = bisect.bisect_right(self._sorted_amounts, amount_usd)
+      self._sorted_amounts.insert(slot, amount_usd)
+      self._amount_positions.insert(slot, position)
+
+  def row_at(self, position: int, columns: Iterable[str] = TRANSACTION_COLUMNS) -> Dict[str, Any]:
+    """Materialize one row as a dict with the requested columns."""
+    row = {}
+    for column in columns:
+      if column == "transaction_id":
+        row[column] = self.transaction_ids[position]
+      elif column == "payment_time":
+        row[column] = self.payment_times[position]
+      elif column == "payment_amount":
+        amount = self.amounts[position]
+        row[column] = amount if amount == amount else None
+      else:
+        row[column] = self.columns[column].value_at(position)
+    return row
+
+  def match(self, filters: Dict[str, Any]) -> int:
+    """Return the bitmap of rows matching every equality filter."""
+    selected = self._match_positions(filters)
+    if selected is not None:
+      return _to_bitmap(selected, len(self))
+    bits = self._all_bits
+    for field, value in filters.items():
+      bits &= self.columns[field].bitmap(value)
+      if not bits:
+        break
+    return bits
+
+  def _match_positions(self, filters: Dict[str, Any]) -> Optional[np.ndarray]:
+    """Ascending positions matching `filters` if one filters an id column, else None."""
+    unknown = [field for field in filters if field not in self.columns]
+    if unknown:
+      raise ValueError(f"Unsupported filter field: {unknown[0]}")
+    ids = sorted(
+        (self.columns[field].positions_of(value) for field, value in filters.items() if field in ID_COLUMNS),
+        key=len,
+    )
+    if not ids:
+      return None
+    selected = ids[0]
+    for positions in ids[1:]:
+      selected = np.intersect1d(selected, positions, assume_unique=True)
+    for field, value in filters.items():
+      if field not in ID_COLUMNS:
+        selected = self.columns[field].select(selected, value)
+    return selected
+
+  def _in_band(self, positions: np.ndarray, filters: Dict[str, Any], payment_amount: float) -> np.ndarray:
+    lower, upper = similar_amount_bounds(filters, payment_amount)
+    amounts = np.frombuffer(self.amounts_usd, dtype=np.float64)[positions]
+    # NaN (NULL or unconvertible) amounts compare False.
+    return positions[(amounts >= lower) & (amounts <= upper)]
+
+  def _amount_slice(self, filters: Dict[str, Any], payment_amount: float) -> array:
+    lower, upper = similar_amount_bounds(filters, payment_amount)
+    start = bisect.bisect_left(self._sorted_amounts, lower)
+    end = bisect.bisect_right(self._sorted_amounts, upper)
+    return self._amount_positions[start:end]
+
+  def search(
+      self,
+      filters: Dict[str, Any],
+      payment_amount: Optional[float] = None,
+      limit: int = 100,
+      columns: Iterable[str] = TRANSACTION_COLUMNS,
+  ) -> List[Dict[str, Any]]:
+    """Return up to `limit` matching rows, newest payment_time first."""
+    columns = list(columns)
+    with self._lock:
+      selected = None if payment_amount is not None and not filters else self._match_positions(filters)
+      if selected is not None:
+        if payment_amount is not None:
+          selected = self._in_band(selected, filters, payment_amount)
+        positions = selected[::-1][:max(limit, 0)].tolist()
+      elif payment_amount is None:
+        positions = _bits_descending(self.match(filters), len(self))
+      elif not filters:
+        positions = iter(sorted(self._amount_slice(filters, payment_amount), reverse=True))
+      else:
+        bits = self.match(filters)
+        lower, upper = similar_amount_bounds(filters, payment_amount)
+        amounts = self.amounts_usd
+        positions = (
+            position for position in _bits_descending(bits, len(self))
+            if lower <= amounts[position] <= upper
+        )
+      results = []
+      for position in positions:
+        if len(results) >= limit:
+          break
+        results.append(self.row_at(position, columns))
+      return results
+
+  def summarize(
+      self,
+      filters: Dict[str, Any],
+      payment_amount: Optional[float] = None,
+      sample_size: int = 0,
+  ) -> Dict[str, Any]:
+    """Summarize all matching rows with bitmap popcounts instead of row scans."""
+    with self._lock:
+      selected = self._match_positions(filters)
+      if selected is not None:
+        return self._summarize_positions(filters, selected, payment_amount, sample_size)
+      bits = self.match(filters)
+      if payment_amount is not None:
+        bits &= _to_bitmap(self._amount_slice(filters, payment_amount), len(self))
+      status = self.columns["approval_status"]
+      status_counts = {
+          value: (bits & bitmap).bit_count() for value, bitmap in zip(status.values, status.bitmaps)
+      }
+      rejected = bits & status.bitmap("REJECTED")
+      reasons = self.columns["reject_reason"]
+      reason_counts = {
+          value: (rejected & bitmap).bit_count() for value, bitmap in zip(reasons.values, reasons.bitmaps)
+      }
+      amounts = self.amounts_usd
+      stats = amount_stats(
+          amounts[position] for position in _bits_descending(bits, len(self)) if amounts[position] == amounts[position]
+      )
+      sample = None
+      if sample_size > 0:
+        sample = self.search(filters, payment_amount, sample_size, SAMPLE_COLUMNS)
+      return build_summary(
+          {value: count for value, count in status_counts.items() if count},
+          {value: count for value, count in reason_counts.items() if count},
+          stats,
+          sample,
+      )
+
+  def _summarize_positions(
+      self,
+      filters: Dict[str, Any],
+      selected: np.ndarray,
+      payment_amount: Optional[float],
+      sample_size: int,
+  ) -> Dict[str, Any]:
+    """summarize() for rows selected by an id filter: code histograms over just those rows."""
+    if payment_amount is not None:
+      selected = self._in_band(selected, filters, payment_amount)
+    status = self.columns["approval_status"]
+    rejected = status.select(selected, "REJECTED")
+    amounts = np.frombuffer(self.amounts_usd, dtype=np.float64)[selected]
+    sample = None
+    if sample_size > 0:
+      sample = self.search(filters, payment_amount, sample_size, SAMPLE_COLUMNS)
+    return build_summary(
+        status.code_counts(selected),
+        self.columns["reject_reason"].code_counts(rejected),
+        amount_stats(amounts[~np.isnan(amounts)].tolist()),
+        sample,
+    )
+
+
+class IndexedTransactionStore(TransactionStore):
+  """Serves reads from a TransactionIndex and writes through to another store.
+
+  The index is built from the wrapped store on first read and kept in sync
+  with transactions inserted through this store. `index_factory` builds it
+  from the initial rows; `record_store.CompactTransactionIndex` trades some
+  lookup speed for a fixed number of bytes per row.
+  """
+
+  def __init__(
+      self,
+      inner: TransactionStore,
+      index_factory: Callable[[Iterable[Dict[str, Any]]], Any] = TransactionIndex,
+  ):
+    self.inner = inner
+    self.name = f"{inner.name}+index"
+    self.index_factory = index_factory
+    self._index: Optional[TransactionIndex] = None
+    self._lock = threading.Lock()
+
+  @property
+  def index(self) -> TransactionIndex:
+    if self._index is None:
+      with self._lock:
+        if self._index is None:
+          self._index = self.index_factory(self.inner.load_all_transactions())
+          logger.info(f"Built {type(self._index).__name__} over {len(self._index)} transactions")
+    return self._index
+
+  def get_rejected_transactions(self) -> List[Dict[str, Any]]:
+    return self.index.search(
+        {"approval_status": "REJECTED"}, limit=len(self.index), columns=REJECTED_COLUMNS
+    )
+
+  def find_similar_transactions(
+      self,
+      filters: Dict[str, str],
+      payment_amount: Optional[float] = None,
+      limit: int = 100,
+      columns: Sequence[str] = TRANSACTION_COLUMNS,
+  ) -> List[Dict[str, Any]]:
+    return self.index.search(filters, payment_amount=payment_amount, limit=limit, columns=columns)
+
+  def summarize_similar_transactions(
+      self,
+      filters: Dict[str, str],
+      payment_amount: Optional[float] = None,
+      sample_size: int = 0,
+  ) -> Dict[str, Any]:
+    return self.index.summarize(filters, payment_amount=payment_amount, sample_size=sample_size)
+
+  def load_all_transactions(self) -> List[Dict[str, Any]]:
+    return self.inner.load_all_transactions()
+
+  def load_transaction_columns(self, columns: Sequence[str]) -> List[Dict[str, Any]]:
+    return self.inner.load_transaction_columns(columns)
+
+  def insert_feedback(self, feedback_row: Dict[str, Any]) -> None:
+    self.inner.insert_feedback(feedback_row)
+
+  def insert_transaction(self, transaction_row: Dict[str, Any]) -> None:
+    self.inner.insert_transaction(transaction_row)
+    if self._index is not None:
+      self._index.add(dict.fromkeys(TRANSACTION_COLUMNS) | transaction_row)
+
+  def add_write_listener(self, listener: WriteListener) -> None:
+    self.inner.add_write_listener(listener)
+
+  def ensure_schema(self) -> None:
+    self.inner.ensure_schema()
+
+  def insert_feedback_batch(self, feedback_rows: Sequence[Dict[str, Any]]) -> None:
+    self.inner.insert_feedback_batch(feedback_rows)
+
+  def insert_transactions_batch(self, transaction_rows: Sequence[Dict[str, Any]]) -> None:
+    self.inner.insert_transactions_batch(transaction_rows)
+    if self._index is not None:
+      self._index.add_many(dict.fromkeys(TRANSACTION_COLUMNS) | row for row in transaction_rows)
+
+  def load_rows(self, transaction_rows: Sequence[Dict[str, Any]]) -> int:
+    loaded = self.inner.load_rows(transaction_rows)
+    if self._index is not None:
+      self._index.add_many(dict.fromkeys(TRANSACTION_COLUMNS) | row for row in transaction_rows)
+    return loaded
@@ -0,0 +1,145 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Readers for the transaction datasets shipped in Dataset/."""
+
+import csv
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, Optional
+
+from .base import TRANSACTION_COLUMNS
+
+# Day zero of Excel serial dates (1900 date system, including its leap-year bug).
+_EXCEL_EPOCH = datetime(1899, 12, 30, tzinfo=timezone.utc)
+
+# Excel serials accepted as dates: 1954-10-03 .. 2119-07-06.
+_EXCEL_SERIAL_RANGE = (20000.0, 80000.0)
+
+# Numbers at least this large are epoch seconds (1973-03-03 onwards).
+_EPOCH_SECONDS_MIN = 1e8
+
+# Source column names that differ from the Transactions table.
+COLUMN_ALIASES = {
+    "Date and Time": "payment_time",
+}
+
+
+def _clean_value(column: str, value: Any) -> Any:
+  if isinstance(value, str):
+    value = value.strip()
+    if not value:
+      return None
+  if value is None:
+    return None
+  if column == "payment_amount":
+    return float(value)
+  if isinstance(value, datetime):
+    return value.isoformat()
+  return value if isinstance(value, str) else str(value)
+
+
+def parse_timestamp(value: Any) -> Optional[float]:
+  """Return a payment_time as UTC epoch seconds, or None if it is not a full timestamp.
+
+  Accepts datetimes, ISO 8601 strings (naive values are taken as UTC), Excel
+  serial dates and epoch seconds. Partial times such as "50:32.2" are not timestamps.
+  """
+  if value is None:
+    return None
+  if isinstance(value, datetime):
+    moment = value
+  else:
+    try:
+      serial = float(value)
+    except (TypeError, ValueError):
+      serial = None
+    if serial is not None:
+      if serial >= _EPOCH_SECONDS_MIN:
+        return serial
+      if not _EXCEL_SERIAL_RANGE[0] <= serial <= _EXCEL_SERIAL_RANGE[1]:
+        return None
+      return (_EXCEL_EPOCH + timedelta(days=serial)).timestamp()
+    try:
+      moment = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    except ValueError:
+      return None
+  if moment.tzinfo is None:
+    moment = moment.replace(tzinfo=timezone.utc)
+  return moment.timestamp()
+
+
+def _rename_row(raw: Dict[str, Any]) -> Dict[str, Any]:
+  row: Dict[str, Optional[Any]] = dict.fromkeys(TRANSACTION_COLUMNS)
+  for key, value in raw.items():
+    if key is None:
+      continue
+    column = COLUMN_ALIASES.get(key.strip(), key.strip())
+    if column in row:
+      row[column] = value
+  return row
+
+
+def _normalize_row(raw: Dict[str, Any]) -> Dict[str, Any]:
+  return {column: _clean_value(column, value) for column, value in _rename_row(raw).items()}
+
+
+def _read_csv(path: str) -> Iterator[Dict[str, Any]]:
+  with open(path, newline="", encoding="utf-8-sig") as f:
+    yield from csv.DictReader(f)
+
+
+def _read_xlsx(path: str) -> Iterator[Dict[str, Any]]:
+  try:
+    import openpyxl
+  except ImportError as e:
+    raise ImportError(
+        "Reading .xlsx datasets requires openpyxl (pip install openpyxl)"
+    ) from e
+
+  workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+  try:
+    rows = workbook.active.iter_rows(values_only=True)
+    header = [str(cell) if cell is not None else None for cell in next(rows)]
+    for values in rows:
+      yield dict(zip(header, values))
+  finally:
+    workbook.close()
+
+
+def _read_source(path: str) -> Iterator[Dict[str, Any]]:
+  extension = os.path.splitext(path)[1].lower()
+  if extension == ".csv":
+    return _read_csv(path)
+  if extension in (".xlsx", ".xlsm"):
+    return _read_xlsx(path)
+  raise ValueError(f"Unsupported dataset format: {path}")
+
+
+def read_raw_dataset(path: str) -> Iterator[Dict[str, Any]]:
+  """Yield rows of a CSV or XLSX file keyed by TRANSACTION_COLUMNS, values as read.
+
+  Rows are streamed (XLSX in openpyxl's read-only mode), so memory does not
+  grow with the file. Extra columns are dropped; nothing is parsed.
+  """
+  return map(_rename_row, _read_source(path))
+
+
+def read_dataset(path: str) -> Iterator[Dict[str, Any]]:
+  """Yield Transactions rows from a CSV or XLSX dataset file.
+
+  Column names are mapped onto TRANSACTION_COLUMNS, blank cells become None
+  and payment_amount is parsed as a float. Extra columns are dropped.
+  """
+  return map(_normalize_row, _read_source(path))
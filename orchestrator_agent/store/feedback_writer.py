@@ -0,0 +1,301 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Background, batched writer for feedback and corrected transactions.
+
+The feedback tool enqueues its two rows and returns. A daemon thread drains
+the queue and writes a batch when `batch_size` rows are waiting or
+`flush_interval` seconds after the first row of a batch arrived, using one
+insert per table per batch. Failed batches are retried with backoff. Rows
+still unwritten after `max_retries` are appended to a dead-letter file
+(JSON Lines), which is replayed when the writer starts and on every
+flush() or close(). Because the stores key inserts on feedback_id /
+transaction_id, a retry or replay after a partial success does not
+duplicate rows (at-least-once delivery with idempotent writes).
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from .base import TransactionStore
+
+logger = logging.getLogger('google_adk.' + __name__)
+
+_FEEDBACK = "feedback"
+_TRANSACTION = "transaction"
+
+
+class _FlushRequest:
+  """Queue marker that ends the current batch early and replays dead letters."""
+
+  __slots__ = ("done",)
+
+  def __init__(self):
+    self.done = threading.Event()
+
+
+class FeedbackWriter:
+  """Queues Transaction_Feedback and Transactions rows and writes them in batches."""
+
+  def __init__(
+      self,
+      store_provider: Callable[[], TransactionStore],
+      batch_size: int = 50,
+      flush_interval: float = 2.0,
+      max_retries: int = 5,
+      retry_backoff: float = 0.5,
+      dead_letter_path: Optional[str] = None,
+  ):
+    self._store_provider = store_provider
+    self.batch_size = max(1, batch_size)
+    self.flush_interval = flush_interval
+    self.max_retries = max_retries
+    self.retry_backoff = retry_backoff
+    self.dead_letter_path = dead_letter_path or None
+    self._queue: "queue.Queue[Any]" = queue.Queue()
+    self._progress = threading.Condition()
+    self._enqueued = 0
+    self._completed = 0
+    self._closing = False
+    self._thread: Optional[threading.Thread] = None
+    self._start_lock = threading.Lock()
+    self.batches = 0
+    self.retries = 0
+    self.written_feedback = 0
+    self.written_transactions = 0
+    self.dead_lettered = 0
+    self.replayed = 0
+    self.failed = 0
+    self.last_flush_seconds = 0.0
+
+  def start(self) -> None:
+    """Start the writer thread.
+
+    Before the first batch it bootstraps the store schema and replays the
+    dead-letter file.
+    """
+    with self._start_lock:
+      if self._thread is None:
+        self._thread = threading.Thread(target=self._run, name="trinetra-feedback-writer", daemon=True)
+        self._thread.start()
+
+  def submit(self, feedback_row: Dict[str, Any], transaction_row: Optional[Dict[str, Any]] = None) -> None:
+    """Queue one feedback row and, optionally, its corrected transaction row."""
+    if self._closing:
+      raise RuntimeError("FeedbackWriter is closed")
+    self.start()
+    items = [(_FEEDBACK, feedback_row)]
+    if transaction_row is not None:
+      items.append((_TRANSACTION, transaction_row))
+    with self._progress:
+      self._enqueued += len(items)
+    for item in items:
+      self._queue.put(item)
+
+  def flush(self, timeout: Optional[float] = None) -> bool:
+    """Write everything queued so far and replay dead letters.
+
+    Returns False if `timeout` elapsed first. Rows that still cannot be
+    written are back in the dead-letter file, not lost.
+    """
+    with self._progress:
+      if self._completed >= self._enqueued and not self._has_dead_letters():
+        return True
+    self.start()
+    request = _FlushRequest()
+    self._queue.put(request)
+    return request.done.wait(timeout)
+
+  def close(self, timeout: Optional[float] = 30.0) -> None:
+    """Flush queued rows and stop the writer thread."""
+    self._closing = True
+    if self._thread is not None:
+      self._queue.put(_FlushRequest())
+      self._thread.join(timeout)
+
+  def stats(self) -> Dict[str, Any]:
+    with self._progress:
+      pending = self._enqueued - self._completed
+    return {
+        "pending": pending,
+        "batches": self.batches,
+        "retries": self.retries,
+        "written_feedback": self.written_feedback,
+        "written_transactions": self.written_transactions,
+        "dead_lettered": self.dead_lettered,
+        "replayed": self.replayed,
+        "failed": self.failed,
+        "last_flush_ms": round(self.last_flush_seconds * 1000, 3),
+    }
+
+  def _run(self) -> None:
+    try:
+      self._store_provider().ensure_schema()
+    except Exception as e:
+      # Each batch write bootstraps the schema itself as well, so a failure
+      # here is retried with the first batch.
+      logger.warning(f"Feedback schema bootstrap failed: {e}")
+    self._replay_dead_letters()
+    while True:
+      batch, flush = self._next_batch()
+      if batch:
+        self._write(batch)
+      if flush is not None:
+        self._replay_dead_letters()
+        flush.done.set()
+      if (flush is not None or not batch) and self._closing and self._queue.empty():
+        return
+
+  def _next_batch(self) -> Tuple[List[Tuple[str, Dict[str, Any]]], Optional[_FlushRequest]]:
+    try:
+      item = self._queue.get(timeout=self.flush_interval)
+    except queue.Empty:
+      return [], None
+    if isinstance(item, _FlushRequest):
+      return [], item
+    batch = [item]
+    deadline = time.monotonic() + self.flush_interval
+    while len(batch) < self.batch_size:
+      remaining = deadline - time.monotonic()
+      if remaining <= 0:
+        break
+      try:
+        item = self._queue.get(timeout=remaining)
+      except queue.Empty:
+        break
+      if isinstance(item, _FlushRequest):
+        return batch, item
+      batch.append(item)
+    return batch, None
+
+  def _deliver(self, batch: Sequence[Tuple[str, Dict[str, Any]]]) -> List[Tuple[str, Dict[str, Any]]]:
+    """Write a batch, retrying with backoff; return the items still unwritten."""
+    # Within a batch the last row for a key wins, matching the stores' upserts.
+    feedback = list({row.get("feedback_id"): row for kind, row in batch if kind == _FEEDBACK}.values())
+    transactions = list({row.get("transaction_id"): row for kind, row in batch if kind == _TRANSACTION}.values())
+    feedback_done = not feedback
+    for attempt in range(self.max_retries + 1):
+      try:
+        store = self._store_provider()
+        if not feedback_done:
+          store.insert_feedback_batch(feedback)
+          feedback_done = True
+        if transactions:
+          store.insert_transactions_batch(transactions)
+        self.batches += 1
+        self.written_feedback += len(feedback)
+        self.written_transactions += len(transactions)
+        return []
+      except Exception as e:
+        if attempt == self.max_retries:
+          logger.error(
+              f"Feedback batch write failed after {attempt + 1} attempts: {e}; "
+              f"feedback_ids={[row.get('feedback_id') for row in feedback]}"
+          )
+          break
+        self.retries += 1
+        delay = self.retry_backoff * 2 ** attempt
+        logger.warning(f"Feedback batch write failed ({e}); retrying in {delay:.1f}s")
+        time.sleep(delay)
+    if feedback and feedback_done:
+      self.written_feedback += len(feedback)  # written before the transactions failed
+    unwritten = [] if feedback_done else [(_FEEDBACK, row) for row in feedback]
+    return unwritten + [(_TRANSACTION, row) for row in transactions]
+
+  def _write(self, batch: List[Tuple[str, Dict[str, Any]]]) -> None:
+    started = time.perf_counter()
+    unwritten = self._deliver(batch)
+    if unwritten:
+      self._dead_letter(unwritten)
+    self.last_flush_seconds = time.perf_counter() - started
+    with self._progress:
+      self._completed += len(batch)
+      self._progress.notify_all()
+
+  # --- Dead letters ---------------------------------------------------------
+
+  def _replaying_path(self) -> str:
+    return self.dead_letter_path + ".replaying"
+
+  def _has_dead_letters(self) -> bool:
+    if self.dead_letter_path is None:
+      return False
+    return any(
+        os.path.exists(path) and os.path.getsize(path) > 0
+        for path in (self.dead_letter_path, self._replaying_path())
+    )
+
+  def _dead_letter(self, items: Sequence[Tuple[str, Dict[str, Any]]], replayed: bool = False) -> None:
+    """Append unwritten items to the dead-letter file, or drop them if there is none.
+
+    Items put back by a replay (`replayed`) are not counted or logged again.
+    """
+    if self.dead_letter_path is not None:
+      try:
+        os.makedirs(os.path.dirname(os.path.abspath(self.dead_letter_path)), exist_ok=True)
+        with open(self.dead_letter_path, "a", encoding="utf-8") as f:
+          for kind, row in items:
+            f.write(json.dumps({"kind": kind, "row": row}, default=str) + "\n")
+          f.flush()
+          os.fsync(f.fileno())
+        if not replayed:
+          self.dead_lettered += len(items)
+          logger.warning(f"Saved {len(items)} unwritten feedback writes to {self.dead_letter_path}")
+        return
+      except OSError as e:
+        logger.error(f"Cannot write dead-letter file {self.dead_letter_path}: {e}")
+    self.failed += len(items)
+    logger.error(
+        f"Dropping {len(items)} feedback writes; "
+        f"feedback_ids={[row.get('feedback_id') for kind, row in items if kind == _FEEDBACK]}"
+    )
+
+  def _replay_dead_letters(self) -> None:
+    """Write the dead-letter file's items again; those that still fail go back to it."""
+    if not self._has_dead_letters():
+      return
+    replaying = self._replaying_path()
+    try:
+      # A leftover .replaying file is from a replay interrupted by a crash.
+      if not os.path.exists(replaying):
+        os.replace(self.dead_letter_path, replaying)
+      items = []
+      with open(replaying, encoding="utf-8") as f:
+        for line in f:
+          try:
+            entry = json.loads(line)
+            items.append((entry["kind"], entry["row"]))
+          except (ValueError, KeyError, TypeError):
+            logger.error(f"Skipping unreadable dead-letter line: {line.strip()[:200]}")
+    except OSError as e:
+      logger.error(f"Cannot read dead-letter file {self.dead_letter_path}: {e}")
+      return
+    logger.info(f"Replaying {len(items)} feedback writes from {self.dead_letter_path}")
+    still_failing = 0
+    for start in range(0, len(items), self.batch_size):
+      chunk = items[start:start + self.batch_size]
+      # Once the store keeps failing, save the rest for the next replay untried.
+      unwritten = chunk if still_failing else self._deliver(chunk)
+      if unwritten:
+        still_failing += len(unwritten)
+        self._dead_letter(unwritten, replayed=True)
+      self.replayed += len(chunk) - len(unwritten)
+    os.remove(replaying)
+    if still_failing:
+      logger.warning(f"{still_failing} feedback writes still failing; kept in {self.dead_letter_path}")
@@ -0,0 +1,258 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Parameterized SQL for the transaction stores.
+
+Values never appear in the SQL text: they are bound as named parameters
+(`@name` for BigQuery, `:name` for SQLite). The text therefore depends only
+on the *shape* of a request -- which filters are present, whether an amount
+band is used and which columns are selected -- so it is built once per shape
+and reused, which lets BigQuery's result cache and SQLite's statement cache
+hit across different argument values.
+
+Amount bands and summary amount statistics use USD equivalents. SQLite
+reads the payment_amount_usd column materialized at ingest; BigQuery converts
+payment_amount in the query with a CASE over payment_currency whose
+currencies and rates are parameters.
+"""
+
+import functools
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from ..fx import get_fx_table
+from .base import SIMILARITY_FILTER_FIELDS, TRANSACTION_COLUMNS, similar_amount_bounds
+
+DIALECTS = ("bigquery", "sqlite")
+
+
+@dataclass(frozen=True)
+class Query:
+  """SQL text plus its named parameter values."""
+  sql: str
+  params: Dict[str, Any]
+
+
+def _placeholder(dialect: str, name: str) -> str:
+  return f"@{name}" if dialect == "bigquery" else f":{name}"
+
+
+def _table_ref(dialect: str, table: str) -> str:
+  return f"`{table}`" if dialect == "bigquery" else table
+
+
+def _check_columns(columns: Sequence[str]) -> Tuple[str, ...]:
+  unknown = [column for column in columns if column not in TRANSACTION_COLUMNS]
+  if unknown:
+    raise ValueError(f"Unsupported columns: {unknown}")
+  return tuple(columns)
+
+
+def _amount_usd_sql(dialect: str, fx_terms: int) -> str:
+  if dialect == "sqlite":
+    return "payment_amount_usd"
+  cases = " ".join(f"WHEN @fx_currency_{i} THEN @fx_rate_{i}" for i in range(fx_terms))
+  return f"payment_amount * CASE payment_currency {cases} END"
+
+
+def _fx_params(dialect: str, params: Dict[str, Any]) -> int:
+  """Add the FX rate parameters _amount_usd_sql() needs; return their number."""
+  if dialect != "bigquery":
+    return 0
+  rates = sorted(get_fx_table().rates.items())
+  for i, (currency, rate) in enumerate(rates):
+    params[f"fx_currency_{i}"], params[f"fx_rate_{i}"] = currency, rate
+  return len(rates)
+
+
+def _where_sql(dialect: str, fields: Tuple[str, ...], amount_shape: Optional[int]) -> str:
+  where_clauses = [f"{field} = {_placeholder(dialect, field)}" for field in fields]
+  if amount_shape is not None:
+    where_clauses.append(
+        f"{_amount_usd_sql(dialect, amount_shape)} BETWEEN {_placeholder(dialect, 'amount_lower')}"
+        f" AND {_placeholder(dialect, 'amount_upper')}"
+    )
+  return " AND ".join(where_clauses) if where_clauses else "1=1"
+
+
+def _similarity_params(
+    dialect: str, filters: Dict[str, Any], payment_amount: Optional[float]
+) -> Tuple[Tuple[str, ...], Optional[int], Dict[str, Any]]:
+  """Return the filter fields, the amount shape and the parameter values.
+
+  The amount shape is None without an amount band, otherwise the number of
+  FX rate terms the band's SQL needs (0 when a materialized column is used).
+  """
+  if dialect not in DIALECTS:
+    raise ValueError(f"Unknown SQL dialect: {dialect}")
+  unknown = [field for field in filters if field not in SIMILARITY_FILTER_FIELDS]
+  if unknown:
+    raise ValueError(f"Unsupported filter fields: {unknown}")
+
+  # Fields are emitted in a fixed order so equal shapes give equal SQL text.
+  fields = tuple(field for field in SIMILARITY_FILTER_FIELDS if field in filters)
+  params: Dict[str, Any] = {field: filters[field] for field in fields}
+  amount_shape = None
+  if payment_amount is not None:
+    params["amount_lower"], params["amount_upper"] = similar_amount_bounds(filters, payment_amount)
+    amount_shape = _fx_params(dialect, params)
+  return fields, amount_shape, params
+
+
+@functools.lru_cache(maxsize=256)
+def _similarity_sql(
+    dialect: str,
+    table: str,
+    fields: Tuple[str, ...],
+    amount_shape: Optional[int],
+    columns: Tuple[str, ...],
+) -> str:
+  return (
+      f"SELECT {', '.join(columns)} FROM {_table_ref(dialect, table)} "
+      f"WHERE {_where_sql(dialect, fields, amount_shape)} ORDER BY payment_time DESC "
+      f"LIMIT {_placeholder(dialect, 'limit')}"
+  )
+
+
+def similarity_query(
+    dialect: str,
+    table: str,
+    filters: Dict[str, Any],
+    payment_amount: Optional[float] = None,
+    limit: int = 100,
+    columns: Sequence[str] = TRANSACTION_COLUMNS,
+) -> Query:
+  """Build the most-recent-similar-transactions query for a filter set.
+
+  Args:
+      dialect: "bigquery" or "sqlite".
+      table: Transactions table name.
+      filters: Equality filters keyed by SIMILARITY_FILTER_FIELDS.
+      payment_amount: If given, restrict to the +/- AMOUNT_TOLERANCE band
+          around its USD equivalent.
+      limit: Maximum number of rows.
+      columns: Columns to select.
+  """
+  fields, amount_shape, params = _similarity_params(dialect, filters, payment_amount)
+  params["limit"] = int(limit)
+
+  sql = _similarity_sql(dialect, table, fields, amount_shape, _check_columns(columns))
+  return Query(sql, params)
+
+
+@functools.lru_cache(maxsize=256)
+def _summary_sql(
+    dialect: str, table: str, fields: Tuple[str, ...], amount_shape: Optional[int], fx_terms: int
+) -> str:
+  table_ref = _table_ref(dialect, table)
+  where_sql = _where_sql(dialect, fields, amount_shape)
+  amount_usd = _amount_usd_sql(dialect, fx_terms)
+  if dialect == "sqlite":
+    return (
+        f"SELECT approval_status, TRIM(reject_reason) AS reject_reason, COUNT(*) AS n "
+        f"FROM {table_ref} WHERE {where_sql} "
+        f"GROUP BY approval_status, TRIM(reject_reason)"
+    )
+  return f"""
+      SELECT
+        COUNTIF(approval_status = 'APPROVED') AS approved,
+        COUNTIF(approval_status = 'REJECTED') AS rejected,
+        COUNTIF(approval_status = 'MARKED FOR REVIEW') AS marked_for_review,
+        COUNTIF(approval_status IS NULL
+                OR approval_status NOT IN ('APPROVED', 'REJECTED', 'MARKED FOR REVIEW')) AS other,
+        COUNT({amount_usd}) AS amount_count,
+        MIN({amount_usd}) AS amount_min,
+        MAX({amount_usd}) AS amount_max,
+        AVG({amount_usd}) AS amount_mean,
+        APPROX_QUANTILES({amount_usd}, 100) AS amount_quantiles,
+        ARRAY(
+          SELECT AS STRUCT TRIM(reject_reason) AS reason, COUNT(*) AS n
+          FROM {table_ref}
+          WHERE {where_sql} AND approval_status = 'REJECTED'
+          GROUP BY reason
+          ORDER BY n DESC
+          LIMIT @top_reasons
+        ) AS reject_reasons
+      FROM {table_ref}
+      WHERE {where_sql}
+  """
+
+
+def summary_query(
+    dialect: str,
+    table: str,
+    filters: Dict[str, Any],
+    payment_amount: Optional[float] = None,
+    top_reasons: int = 10,
+) -> Query:
+  """Build the aggregation query behind summarize_similar_transactions().
+
+  For BigQuery this is a single-row query with status counts, USD amount
+  min/max/mean, a 101-point APPROX_QUANTILES array and the top reject
+  reasons. For SQLite it returns (approval_status, reject_reason, n) groups;
+  exact amount percentiles come from amounts_query().
+  """
+  fields, amount_shape, params = _similarity_params(dialect, filters, payment_amount)
+  fx_terms = 0
+  if dialect == "bigquery":
+    params["top_reasons"] = int(top_reasons)
+    fx_terms = _fx_params(dialect, params)
+  return Query(_summary_sql(dialect, table, fields, amount_shape, fx_terms), params)
+
+
+@functools.lru_cache(maxsize=256)
+def _amounts_sql(
+    dialect: str, table: str, fields: Tuple[str, ...], amount_shape: Optional[int], fx_terms: int
+) -> str:
+  amount_usd = _amount_usd_sql(dialect, fx_terms)
+  return (
+      f"SELECT {amount_usd} AS amount_usd FROM {_table_ref(dialect, table)} "
+      f"WHERE {_where_sql(dialect, fields, amount_shape)} AND {amount_usd} IS NOT NULL "
+      f"ORDER BY amount_usd"
+  )
+
+
+def amounts_query(
+    dialect: str,
+    table: str,
+    filters: Dict[str, Any],
+    payment_amount: Optional[float] = None,
+) -> Query:
+  """Build a query for the sorted non-null USD amounts (as amount_usd) of the matching rows."""
+  fields, amount_shape, params = _similarity_params(dialect, filters, payment_amount)
+  fx_terms = _fx_params(dialect, params)
+  return Query(_amounts_sql(dialect, table, fields, amount_shape, fx_terms), params)
+
+
+def columns_query(dialect: str, table: str, columns: Sequence[str]) -> Query:
+  """Build a query for the given columns of every transaction."""
+  if dialect not in DIALECTS:
+    raise ValueError(f"Unknown SQL dialect: {dialect}")
+  return Query(f"SELECT {', '.join(_check_columns(columns))} FROM {_table_ref(dialect, table)}", {})
+
+
+def status_query(
+    dialect: str,
+    table: str,
+    approval_status: str,
+    columns: Sequence[str] = TRANSACTION_COLUMNS,
+) -> Query:
+  """Build a query for every transaction with the given approval_status."""
+  if dialect not in DIALECTS:
+    raise ValueError(f"Unknown SQL dialect: {dialect}")
+  sql = (
+      f"SELECT {', '.join(_check_columns(columns))} FROM {_table_ref(dialect, table)} "
+      f"WHERE approval_status = {_placeholder(dialect, 'approval_status')}"
+  )
+  return Query(sql, {"approval_status": approval_status})
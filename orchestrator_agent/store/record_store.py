@@ -0,0 +1,537 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Memory-compact in-process store of transaction records.
+
+A dict per row, with 14 string keys and boxed values, costs well over a
+kilobyte per transaction. `CompactRecordStore` keeps one NumPy array per
+column instead:
+
+- categorical strings (currency, method, purpose, countries, industry,
+  approval status, reject reason) as int16 codes into interned dictionaries;
+- payer, payee and vendor IDs as int32 codes into the same kind of dictionary;
+- transaction_ids as their 128-bit UUID value (IDs that are not canonical
+  UUIDs are kept aside in a sparse map);
+- payment_amount and its USD equivalent as float64, and payment_time as
+  int64 epoch milliseconds (values that are not full timestamps, such as the
+  CSV clock fragments, are kept aside; they sort older than any timestamp
+  and, among themselves, by their text).
+
+That is `ROW_BYTES` (68) bytes per transaction plus one dictionary entry per
+distinct value. Rows are materialized as dicts only for the positions a
+caller asks for. `CompactTransactionIndex` serves similarity searches and
+summaries over the store with vectorized column comparisons; it is the
+index `IndexedTransactionStore` uses when `config.index_layout`
+(TRINETRA_INDEX_LAYOUT) is "compact".
+
+Search order matches the SQL stores and `TransactionIndex`, which sort
+payment_time as text, when the times are all full timestamps or all clock
+fragments. With both kinds in one store those interleave them by text
+while this index puts every timestamp first.
+"""
+
+import itertools
+import re
+import sys
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from ..fx import get_fx_table
+from .aggregation import SAMPLE_COLUMNS, amount_stats, build_summary
+from .base import TRANSACTION_COLUMNS, similar_amount_bounds
+from .dataset import parse_timestamp
+
+# Low-cardinality string columns, stored as int16 codes (widened if needed).
+CATEGORICAL_COLUMNS = [
+    "payment_currency",
+    "payment_method",
+    "payment_purpose",
+    "payee_country",
+    "vendor_country",
+    "vendor_industry",
+    "approval_status",
+    "reject_reason",
+]
+
+# Entity ID columns, stored as int32 codes.
+ID_COLUMNS = ["payer_id", "payee_id", "vendor_id"]
+
+CODED_COLUMNS = CATEGORICAL_COLUMNS + ID_COLUMNS
+
+_ID_DTYPE = np.dtype([("hi", "<u8"), ("lo", "<u8")])
+
+ROW_BYTES = (
+    2 * len(CATEGORICAL_COLUMNS)
+    + 4 * len(ID_COLUMNS)
+    + _ID_DTYPE.itemsize
+    + 3 * 8  # payment_amount, payment_amount_usd, payment_time
+)
+
+# payment_time of rows without a full timestamp; sorts oldest, like NULL, with
+# raw_time_ranks() ordering those rows among themselves.
+NULL_TIME = np.iinfo(np.int64).min
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_LOW_MASK = (1 << 64) - 1
+_UUID = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\Z")
+
+# Rows encoded per step by extend(), bounding its temporary lists.
+_EXTEND_CHUNK = 65536
+
+# transaction_ids added since the sorted ID index was last rebuilt are kept in
+# a set; it is merged into the index once it holds more than this many...
+_MERGE_MIN = 4096
+# ...or more than this fraction of the store.
+_MERGE_FRACTION = 8
+
+
+def _uuid_int(value: Any) -> Optional[int]:
+  """128-bit value of a canonical (lowercase, hyphenated) non-nil UUID string."""
+  if not isinstance(value, str) or not _UUID.match(value):
+    return None
+  return int(value.replace("-", ""), 16) or None
+
+
+def _uuid_str(value: int) -> str:
+  digits = f"{value:032x}"
+  return f"{digits[:8]}-{digits[8:12]}-{digits[12:16]}-{digits[16:20]}-{digits[20:]}"
+
+
+def _iso_from_ms(milliseconds: int) -> str:
+  return (_EPOCH + timedelta(milliseconds=milliseconds)).isoformat()
+
+
+class _Dictionary:
+  """Interned value <-> integer code mapping; None is always code -1."""
+
+  __slots__ = ("values", "lookup", "_decoder")
+
+  def __init__(self):
+    self.values: List[Any] = []
+    self.lookup: Dict[Any, int] = {None: -1}
+    self._decoder: Optional[np.ndarray] = None
+
+  def __len__(self) -> int:
+    return len(self.values)
+
+  def code(self, value: Any) -> int:
+    code = self.lookup.get(value)
+    if code is None:
+      if isinstance(value, str):
+        value = sys.intern(value)
+      code = self.lookup[value] = len(self.values)
+      self.values.append(value)
+      self._decoder = None
+    return code
+
+  def encode(self, values: Sequence[Any]) -> np.ndarray:
+    """Codes of `values`, adding the ones not seen before."""
+    # map() over dict.get runs in C; only new values take the slow path.
+    codes = list(map(self.lookup.get, values))
+    if None in codes:
+      codes = [self.code(value) if code is None else code for value, code in zip(values, codes)]
+    return np.array(codes, dtype=np.int64)
+
+  def find(self, value: Any) -> Optional[int]:
+    """Code of an already known value (-1 for None), or None if unknown."""
+    return self.lookup.get(value)
+
+  def decoder(self) -> np.ndarray:
+    # Code -1 indexes the trailing None.
+    if self._decoder is None:
+      decoder = np.empty(len(self.values) + 1, dtype=object)
+      decoder[:-1] = self.values
+      decoder[-1] = None
+      self._decoder = decoder
+    return self._decoder
+
+
+class CompactRecordStore:
+  """Column-wise transaction records at ROW_BYTES bytes per row.
+
+  Rows are appended; a row whose transaction_id is already stored replaces
+  the stored one at its position.
+
+  Not thread-safe; `CompactTransactionIndex` serializes access.
+  """
+
+  def __init__(self, capacity: int = 1024):
+    self._size = 0
+    self._capacity = max(1, capacity)
+    self.dictionaries = {column: _Dictionary() for column in CODED_COLUMNS}
+    self._codes = {
+        column: np.empty(self._capacity, dtype=np.int16 if column in CATEGORICAL_COLUMNS else np.int32)
+        for column in CODED_COLUMNS
+    }
+    self._ids = np.zeros(self._capacity, dtype=_ID_DTYPE)
+    self._amounts = np.empty(self._capacity)
+    self._amounts_usd = np.empty(self._capacity)
+    self._times = np.empty(self._capacity, dtype=np.int64)
+    # Sparse fallbacks for values that have no compact form.
+    self._other_ids: Dict[int, str] = {}
+    self._other_id_positions: Dict[str, int] = {}
+    self._raw_times: Dict[int, Any] = {}
+    # Duplicate detection: the UUID values sorted at the last merge, plus a
+    # set of those appended since.
+    self._sorted_ids = np.zeros(0, dtype=_ID_DTYPE)
+    self._recent_ids = set()
+
+  def __len__(self) -> int:
+    return self._size
+
+  @property
+  def nbytes(self) -> int:
+    """Bytes held by the column arrays (including spare capacity)."""
+    arrays = [self._ids, self._amounts, self._amounts_usd, self._times, self._sorted_ids]
+    return sum(array.nbytes for array in arrays) + sum(codes.nbytes for codes in self._codes.values())
+
+  def stats(self) -> Dict[str, Any]:
+    return {
+        "rows": self._size,
+        "row_bytes": ROW_BYTES,
+        "allocated_bytes": self.nbytes,
+        "distinct_values": {column: len(d) for column, d in self.dictionaries.items()},
+        "non_uuid_ids": len(self._other_ids),
+        "non_timestamp_times": len(self._raw_times),
+    }
+
+  def _reserve(self, size: int) -> None:
+    if size <= self._capacity:
+      return
+    capacity = max(size, 2 * self._capacity)
+
+    def grow(array: np.ndarray) -> np.ndarray:
+      grown = np.zeros(capacity, dtype=array.dtype)
+      grown[:self._size] = array[:self._size]
+      return grown
+
+    self._codes = {column: grow(codes) for column, codes in self._codes.items()}
+    self._ids = grow(self._ids)
+    self._amounts = grow(self._amounts)
+    self._amounts_usd = grow(self._amounts_usd)
+    self._times = grow(self._times)
+    self._capacity = capacity
+
+  def _is_known_uuid(self, value: int) -> bool:
+    if value in self._recent_ids:
+      return True
+    if not len(self._sorted_ids):
+      return False
+    key = np.array([(value >> 64, value & _LOW_MASK)], dtype=_ID_DTYPE)
+    slot = int(np.searchsorted(self._sorted_ids, key)[0])
+    return slot < len(self._sorted_ids) and self._sorted_ids[slot] == key[0]
+
+  def contains(self, transaction_id: Any) -> bool:
+    value = _uuid_int(transaction_id)
+    if value is None:
+      return transaction_id in self._other_id_positions
+    return self._is_known_uuid(value)
+
+  def _merge_ids(self) -> None:
+    self._sorted_ids = np.sort(self._ids[:self._size])
+    self._recent_ids = set()
+
+  def append(self, row: Dict[str, Any]) -> bool:
+    """Add one row; return False if it replaced the row with its transaction_id."""
+    return self.extend([row]) == 1
+
+  def extend(self, rows: Iterable[Dict[str, Any]]) -> int:
+    """Add rows; return how many were appended.
+
+    A row whose transaction_id is already stored overwrites that row in
+    place (within `rows` the last one wins, as with the stores' upserts).
+    Rows without a transaction_id are always appended.
+    """
+    added = 0
+    rows = iter(rows)
+    while True:
+      chunk = list(itertools.islice(rows, _EXTEND_CHUNK))
+      if not chunk:
+        break
+      added += self._extend_chunk(chunk)
+    if len(self._recent_ids) > max(_MERGE_MIN, len(self._sorted_ids) // _MERGE_FRACTION):
+      self._merge_ids()
+    return added
+
+  def _stored_positions(self, values: Sequence[int]) -> np.ndarray:
+    """Positions of already stored UUID transaction_ids."""
+    ids = self._ids[:self._size]
+    order = np.argsort(ids, kind="stable")
+    keys = np.array([(value >> 64, value & _LOW_MASK) for value in values], dtype=_ID_DTYPE)
+    return order[np.searchsorted(ids[order], keys)]
+
+  def _extend_chunk(self, chunk: List[Dict[str, Any]]) -> int:
+    # Last row per transaction_id (keyed by UUID value, else the raw ID), in
+    # order of first appearance; rows without one are kept as they come.
+    latest: Dict[Any, Dict[str, Any]] = {}
+    keys: List[Any] = []
+    for row in chunk:
+      transaction_id = row.get("transaction_id")
+      value = _uuid_int(transaction_id)
+      key = transaction_id if value is None else value
+      if key is None:
+        keys.append(row)
+      else:
+        if key not in latest:
+          keys.append(key)
+        latest[key] = row
+
+    fresh, uuids = [], []
+    replaced_uuids, uuid_replacements, other_positions, other_replacements = [], [], [], []
+    for key in keys:
+      if isinstance(key, dict):
+        fresh.append(key)
+        uuids.append(None)
+      elif isinstance(key, int) and self._is_known_uuid(key):
+        replaced_uuids.append(key)
+        uuid_replacements.append(latest[key])
+      elif not isinstance(key, int) and key in self._other_id_positions:
+        other_positions.append(self._other_id_positions[key])
+        other_replacements.append(latest[key])
+      else:
+        fresh.append(latest[key])
+        uuids.append(key if isinstance(key, int) else None)
+
+    if replaced_uuids:
+      self._store_values(self._stored_positions(replaced_uuids), uuid_replacements)
+    if other_positions:
+      self._store_values(np.asarray(other_positions, dtype=np.intp), other_replacements)
+    if not fresh:
+      return 0
+
+    start, count = self._size, len(fresh)
+    self._reserve(start + count)
+    end = start + count
+    high, low = [], []
+    for offset, (row, value) in enumerate(zip(fresh, uuids)):
+      if value is None:
+        value = 0
+        transaction_id = row.get("transaction_id")
+        if transaction_id is not None:
+          self._other_ids[start + offset] = transaction_id
+          self._other_id_positions[transaction_id] = start + offset
+      else:
+        self._recent_ids.add(value)
+      high.append(value >> 64)
+      low.append(value & _LOW_MASK)
+    self._ids["hi"][start:end] = np.array(high, dtype=np.uint64)
+    self._ids["lo"][start:end] = np.array(low, dtype=np.uint64)
+    self._store_values(np.arange(start, end), fresh)
+    self._size = end
+    return count
+
+  def _store_values(self, positions: np.ndarray, rows: Sequence[Dict[str, Any]]) -> None:
+    """Write every column but transaction_id of `rows` at `positions`."""
+    for column, dictionary in self.dictionaries.items():
+      codes = dictionary.encode([row.get(column) for row in rows])
+      if len(dictionary) > np.iinfo(self._codes[column].dtype).max:
+        self._codes[column] = self._codes[column].astype(np.int32)
+      self._codes[column][positions] = codes
+
+    amounts = [row.get("payment_amount") for row in rows]
+    self._amounts[positions] = np.array(amounts, dtype=float)
+    self._amounts_usd[positions] = get_fx_table().to_usd_array(
+        amounts, [row.get("payment_currency") for row in rows]
+    )
+
+    times = []
+    for position, row in zip(positions.tolist(), rows):
+      value = row.get("payment_time")
+      timestamp = parse_timestamp(value)
+      self._raw_times.pop(position, None)
+      if timestamp is None:
+        times.append(NULL_TIME)
+        if value is not None:
+          self._raw_times[position] = value
+      else:
+        times.append(round(timestamp * 1000))
+    self._times[positions] = np.array(times, dtype=np.int64)
+
+  def column(self, name: str) -> np.ndarray:
+    """Read-only view of a stored column: codes for coded columns, else values.
+
+    payment_time is epoch milliseconds (NULL_TIME when absent) and
+    transaction_id is the structured (hi, lo) UUID array.
+    """
+    if name in self._codes:
+      view = self._codes[name][:self._size]
+    elif name == "payment_amount":
+      view = self._amounts[:self._size]
+    elif name == "payment_amount_usd":
+      view = self._amounts_usd[:self._size]
+    elif name == "payment_time":
+      view = self._times[:self._size]
+    elif name == "transaction_id":
+      view = self._ids[:self._size]
+    else:
+      raise ValueError(f"Unknown column: {name}")
+    view = view.view()
+    view.flags.writeable = False
+    return view
+
+  def raw_time_ranks(self, positions: np.ndarray) -> np.ndarray:
+    """Rank, among `positions`, of each row's payment_time kept as text.
+
+    1 and up in text order for times that are not full timestamps, 0 for
+    full timestamps and NULL.
+    """
+    ranks = np.zeros(len(positions), dtype=np.int64)
+    if not self._raw_times:
+      return ranks
+    raw = [self._raw_times.get(position) for position in positions.tolist()]
+    kept = [offset for offset, value in enumerate(raw) if value is not None]
+    if kept:
+      _, inverse = np.unique(np.array([str(raw[offset]) for offset in kept]), return_inverse=True)
+      ranks[kept] = inverse + 1
+    return ranks
+
+  def find_code(self, column: str, value: Any) -> Optional[int]:
+    """Code of `value` in a coded column (-1 for None), or None if it never occurs."""
+    return self.dictionaries[column].find(value)
+
+  def _values(self, column: str, positions: np.ndarray) -> List[Any]:
+    if column in self.dictionaries:
+      return self.dictionaries[column].decoder()[self._codes[column][positions]].tolist()
+    if column == "payment_amount":
+      amounts = self._amounts[positions]
+      return np.where(np.isnan(amounts), None, amounts).tolist()
+    if column == "payment_time":
+      return [
+          self._raw_times.get(position) if milliseconds == NULL_TIME else _iso_from_ms(milliseconds)
+          for position, milliseconds in zip(positions.tolist(), self._times[positions].tolist())
+      ]
+    if column == "transaction_id":
+      ids = self._ids[positions]
+      return [
+          _uuid_str((hi << 64) | lo) if hi or lo else self._other_ids.get(position)
+          for position, hi, lo in zip(positions.tolist(), ids["hi"].tolist(), ids["lo"].tolist())
+      ]
+    raise ValueError(f"Unknown column: {column}")
+
+  def rows(self, positions: Sequence[int], columns: Iterable[str] = TRANSACTION_COLUMNS) -> List[Dict[str, Any]]:
+    """Materialize the rows at `positions` as dicts with the requested columns.
+
+    payment_time comes back as an ISO 8601 UTC string.
+    """
+    positions = np.asarray(positions, dtype=np.intp)
+    columns = list(columns)
+    values = [self._values(column, positions) for column in columns]
+    return [dict(zip(columns, row)) for row in zip(*values)]
+
+  def row(self, position: int, columns: Iterable[str] = TRANSACTION_COLUMNS) -> Dict[str, Any]:
+    return self.rows([position], columns)[0]
+
+
+class CompactTransactionIndex:
+  """Similarity index over a CompactRecordStore.
+
+  Same interface as `TransactionIndex`. Filters are vectorized comparisons
+  of code columns, so a lookup scans the matching columns rather than
+  following per-value bitmaps, and memory stays at ROW_BYTES per row
+  however many distinct payers, payees and vendors there are.
+  """
+
+  def __init__(self, rows: Iterable[Dict[str, Any]] = ()):
+    self._lock = threading.RLock()
+    self.records = CompactRecordStore()
+    self.records.extend(rows)
+
+  def __len__(self) -> int:
+    return len(self.records)
+
+  def add(self, row: Dict[str, Any]) -> None:
+    self.add_many([row])
+
+  def add_many(self, rows: Iterable[Dict[str, Any]]) -> int:
+    """Add rows, replacing indexed ones with the same transaction_id; return how many were appended."""
+    with self._lock:
+      return self.records.extend(rows)
+
+  def row_at(self, position: int, columns: Iterable[str] = TRANSACTION_COLUMNS) -> Dict[str, Any]:
+    return self.records.row(position, columns)
+
+  def match(self, filters: Dict[str, Any], payment_amount: Optional[float] = None) -> np.ndarray:
+    """Boolean mask of rows matching every equality filter and the amount band."""
+    records = self.records
+    mask = np.ones(len(records), dtype=bool)
+    for field, value in filters.items():
+      if field not in records.dictionaries:
+        raise ValueError(f"Unsupported filter field: {field}")
+      code = records.find_code(field, value)
+      if code is None:
+        return np.zeros(len(records), dtype=bool)
+      mask &= records.column(field) == code
+    if payment_amount is not None:
+      lower, upper = similar_amount_bounds(filters, payment_amount)
+      amounts = records.column("payment_amount_usd")
+      # NaN (NULL or unconvertible) amounts compare False.
+      mask &= (amounts >= lower) & (amounts <= upper)
+    return mask
+
+  def _newest(self, positions: np.ndarray, limit: int) -> np.ndarray:
+    """The `limit` newest of `positions`: payment_time (then raw time text), then insertion order, descending."""
+    records = self.records
+    times = records.column("payment_time")[positions]
+    if len(positions) > limit > 0:
+      # Keep only rows at least as new as the limit-th newest before sorting.
+      cutoff = np.partition(times, len(times) - limit)[len(times) - limit]
+      keep = times >= cutoff
+      positions, times = positions[keep], times[keep]
+    order = np.lexsort((positions, records.raw_time_ranks(positions), times))[::-1]
+    return positions[order[:max(limit, 0)]]
+
+  def search(
+      self,
+      filters: Dict[str, Any],
+      payment_amount: Optional[float] = None,
+      limit: int = 100,
+      columns: Iterable[str] = TRANSACTION_COLUMNS,
+  ) -> List[Dict[str, Any]]:
+    """Return up to `limit` matching rows, newest payment_time first."""
+    with self._lock:
+      positions = np.flatnonzero(self.match(filters, payment_amount))
+      return self.records.rows(self._newest(positions, limit), columns)
+
+  def summarize(
+      self,
+      filters: Dict[str, Any],
+      payment_amount: Optional[float] = None,
+      sample_size: int = 0,
+  ) -> Dict[str, Any]:
+    """Summarize all matching rows with code histograms instead of row scans."""
+    with self._lock:
+      records = self.records
+      mask = self.match(filters, payment_amount)
+      status_codes = records.column("approval_status")
+      status_counts = self._histogram("approval_status", status_codes[mask])
+      rejected_code = records.find_code("approval_status", "REJECTED")
+      reason_counts = {}
+      if rejected_code is not None:
+        rejected = mask & (status_codes == rejected_code)
+        reason_counts = self._histogram("reject_reason", records.column("reject_reason")[rejected])
+      amounts = records.column("payment_amount_usd")[mask]
+      stats = amount_stats(np.sort(amounts[~np.isnan(amounts)]).tolist())
+      sample = None
+      if sample_size > 0:
+        sample = self.search(filters, payment_amount, sample_size, SAMPLE_COLUMNS)
+      return build_summary(status_counts, reason_counts, stats, sample)
+
+  def _histogram(self, column: str, codes: np.ndarray) -> Dict[Any, int]:
+    decoder = self.records.dictionaries[column].decoder()
+    # Shift by one so the NULL code (-1) lands in bin 0, decoded via decoder[-1].
+    counts = np.bincount(codes.astype(np.intp) + 1, minlength=len(decoder))
+    return {decoder[code - 1]: int(count) for code, count in enumerate(counts.tolist()) if count}
@@ -0,0 +1,269 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Embedded SQLite transaction store loaded from the local dataset files."""
+
+import logging
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from ..fx import get_fx_table
+from ..tracing import get_tracer
+from .base import (
+    FEEDBACK_COLUMNS,
+    REJECTED_COLUMNS,
+    TRANSACTION_COLUMNS,
+    StoreError,
+    TransactionStore,
+)
+from .aggregation import SAMPLE_COLUMNS, amount_stats, build_summary
+from .query_builder import Query, amounts_query, columns_query, similarity_query, status_query, summary_query
+
+logger = logging.getLogger('google_adk.' + __name__)
+
+# transaction_ids per lookup of the rows an upsert replaces (SQLite allows 999
+# bound parameters in older builds).
+_LOOKUP_CHUNK = 500
+
+# Compiled statements kept per connection; query_builder emits one SQL text
+# per filter shape, so this comfortably covers every shape the tools use.
+_STATEMENT_CACHE_SIZE = 512
+
+# Transactions columns as stored: the table columns plus the USD equivalent
+# of payment_amount, materialized at write time for amount-band lookups.
+_STORED_COLUMNS = TRANSACTION_COLUMNS + ["payment_amount_usd"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS Transactions (
+  transaction_id TEXT PRIMARY KEY,
+  payment_time TEXT,
+  payer_id TEXT,
+  payee_id TEXT,
+  payment_amount REAL,
+  payment_currency TEXT,
+  payment_method TEXT,
+  payment_purpose TEXT,
+  vendor_id TEXT,
+  payee_country TEXT,
+  vendor_country TEXT,
+  vendor_industry TEXT,
+  approval_status TEXT,
+  reject_reason TEXT,
+  payment_amount_usd REAL
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_status ON Transactions (approval_status);
+CREATE INDEX IF NOT EXISTS idx_transactions_payer ON Transactions (payer_id);
+CREATE INDEX IF NOT EXISTS idx_transactions_payee ON Transactions (payee_id);
+CREATE INDEX IF NOT EXISTS idx_transactions_time ON Transactions (payment_time);
+
+CREATE TABLE IF NOT EXISTS Transaction_Feedback (
+  feedback_id TEXT PRIMARY KEY,
+  feedback_timestamp TEXT NOT NULL,
+  transaction_id TEXT,
+  payer_id TEXT,
+  payee_id TEXT,
+  payment_amount REAL,
+  payment_currency TEXT,
+  payment_method TEXT,
+  payment_purpose TEXT,
+  vendor_id TEXT,
+  payee_country TEXT,
+  vendor_country TEXT,
+  vendor_industry TEXT,
+  agent_decision TEXT NOT NULL,
+  agent_reasoning TEXT,
+  agent_confidence TEXT,
+  user_decision TEXT NOT NULL,
+  is_agent_correct INTEGER NOT NULL,
+  feedback_notes TEXT,
+  session_id TEXT,
+  agent_version TEXT
+);
+"""
+
+
+def _nullable(values: Iterable[float]) -> List[Optional[float]]:
+  return [None if value != value else float(value) for value in values]
+
+
+def _with_amount_usd(rows: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+  """Copy rows with payment_amount_usd converted for the whole batch at once."""
+  usd = get_fx_table().to_usd_array(
+      [row.get("payment_amount") for row in rows],
+      [row.get("payment_currency") for row in rows],
+  )
+  return [dict(row, payment_amount_usd=value) for row, value in zip(rows, _nullable(usd))]
+
+
+class SQLiteTransactionStore(TransactionStore):
+  """In-process transaction store for development, CI and low-latency use.
+
+  On first open of an empty database the Transactions table is populated
+  from the given CSV/XLSX dataset files through `ingest.ingest()`, so their
+  payment_times are repaired (from `time_reference_paths`) and validated the
+  same way as an explicit ingest.
+  """
+
+  name = "sqlite"
+
+  def __init__(
+      self,
+      path: str = ":memory:",
+      dataset_paths: Iterable[str] = (),
+      time_reference_paths: Sequence[str] = (),
+  ):
+    self.path = path
+    # Reentrant: an upsert reads the rows it replaces and writes under one hold.
+    self._lock = threading.RLock()
+    self._conn = sqlite3.connect(
+        path, check_same_thread=False, cached_statements=_STATEMENT_CACHE_SIZE
+    )
+    self._conn.row_factory = sqlite3.Row
+    self._conn.executescript(_SCHEMA)
+    self._migrate_amount_usd()
+    self._conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_transactions_amount_usd ON Transactions (payment_amount_usd)"
+    )
+    dataset_paths = list(dataset_paths)
+    if dataset_paths and self._count_transactions() == 0:
+      # Imported here: ingest imports the store package.
+      from ..ingest import ingest
+      report = ingest(dataset_paths, store=self, time_reference=time_reference_paths, skip_existing=False)
+      logger.info(f"Loaded {dataset_paths} into local store {path}: {report.as_dict()}")
+
+  def _migrate_amount_usd(self) -> None:
+    """Add and backfill payment_amount_usd in databases created before it existed."""
+    columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(Transactions)")}
+    if "payment_amount_usd" in columns:
+      return
+    rows = self._conn.execute("SELECT rowid, payment_amount, payment_currency FROM Transactions").fetchall()
+    usd = get_fx_table().to_usd_array([row[1] for row in rows], [row[2] for row in rows])
+    with self._conn:
+      self._conn.execute("ALTER TABLE Transactions ADD COLUMN payment_amount_usd REAL")
+      self._conn.executemany(
+          "UPDATE Transactions SET payment_amount_usd = ? WHERE rowid = ?",
+          zip(_nullable(usd), (row[0] for row in rows)),
+      )
+    logger.info(f"Backfilled payment_amount_usd for {len(rows)} transactions in {self.path}")
+
+  def _count_transactions(self) -> int:
+    with self._lock:
+      return self._conn.execute("SELECT COUNT(*) FROM Transactions").fetchone()[0]
+
+  def load_rows(self, rows: Iterable[Dict[str, Any]]) -> int:
+    """Bulk-insert Transactions rows in one transaction, replacing existing transaction_ids."""
+    rows = list(rows)
+    replaced = self._upsert_transactions(rows)
+    self._notify_written([{column: row.get(column) for column in TRANSACTION_COLUMNS} for row in rows], replaced)
+    return len(rows)
+
+  def _upsert_transactions(self, rows: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """INSERT OR REPLACE Transactions rows; return the stored rows they replaced."""
+    ids = list({row["transaction_id"] for row in rows if row.get("transaction_id") is not None})
+    columns = ", ".join(TRANSACTION_COLUMNS)
+    with self._lock:
+      replaced = []
+      for start in range(0, len(ids), _LOOKUP_CHUNK):
+        chunk = ids[start:start + _LOOKUP_CHUNK]
+        try:
+          replaced += self._fetch(
+              f"SELECT {columns} FROM Transactions WHERE transaction_id IN ({', '.join('?' for _ in chunk)})",
+              chunk,
+          )
+        except sqlite3.Error as e:
+          raise StoreError(str(e)) from e
+      self._insert_many("INSERT OR REPLACE", "Transactions", _STORED_COLUMNS, _with_amount_usd(rows))
+    return replaced
+
+  def _fetch(self, sql: str, params: Any = ()) -> List[Dict[str, Any]]:
+    with get_tracer().span("sqlite.query", "query") as span, self._lock:
+      rows = [dict(row) for row in self._conn.execute(sql, params)]
+      span.set(rows=len(rows))
+      return rows
+
+  def _run(self, query: Query) -> List[Dict[str, Any]]:
+    return self._fetch(query.sql, query.params)
+
+  def get_rejected_transactions(self) -> List[Dict[str, Any]]:
+    return self._run(status_query("sqlite", "Transactions", "REJECTED", REJECTED_COLUMNS))
+
+  def load_all_transactions(self) -> List[Dict[str, Any]]:
+    return self._fetch(f"SELECT {', '.join(TRANSACTION_COLUMNS)} FROM Transactions")
+
+  def load_transaction_columns(self, columns: Sequence[str]) -> List[Dict[str, Any]]:
+    return self._run(columns_query("sqlite", "Transactions", columns))
+
+  def find_similar_transactions(
+      self,
+      filters: Dict[str, str],
+      payment_amount: Optional[float] = None,
+      limit: int = 100,
+      columns: Sequence[str] = TRANSACTION_COLUMNS,
+  ) -> List[Dict[str, Any]]:
+    return self._run(
+        similarity_query("sqlite", "Transactions", filters, payment_amount, limit, columns)
+    )
+
+  def summarize_similar_transactions(
+      self,
+      filters: Dict[str, str],
+      payment_amount: Optional[float] = None,
+      sample_size: int = 0,
+  ) -> Dict[str, Any]:
+    status_counts: Dict[Optional[str], int] = {}
+    reason_counts: Dict[Optional[str], int] = {}
+    for group in self._run(summary_query("sqlite", "Transactions", filters, payment_amount)):
+      status = group["approval_status"]
+      status_counts[status] = status_counts.get(status, 0) + group["n"]
+      if status == "REJECTED":
+        reason_counts[group["reject_reason"]] = group["n"]
+    amounts = [row["amount_usd"] for row in self._run(amounts_query("sqlite", "Transactions", filters, payment_amount))]
+    sample = None
+    if sample_size > 0:
+      sample = self.find_similar_transactions(filters, payment_amount, sample_size, SAMPLE_COLUMNS)
+    return build_summary(status_counts, reason_counts, amount_stats(amounts), sample)
+
+  def _insert(self, table: str, columns: List[str], row: Dict[str, Any]) -> None:
+    present = [column for column in columns if column in row]
+    sql = f"INSERT INTO {table} ({', '.join(present)}) VALUES ({', '.join('?' for _ in present)})"
+    try:
+      with self._lock, self._conn:
+        self._conn.execute(sql, [row[column] for column in present])
+    except sqlite3.Error as e:
+      raise StoreError(str(e)) from e
+
+  def insert_feedback(self, feedback_row: Dict[str, Any]) -> None:
+    self._insert("Transaction_Feedback", FEEDBACK_COLUMNS, feedback_row)
+
+  def insert_transaction(self, transaction_row: Dict[str, Any]) -> None:
+    # Feedback on a stored transaction corrects it, as in the batch path.
+    replaced = self._upsert_transactions([transaction_row])
+    self._notify_written([transaction_row], replaced)
+
+  def _insert_many(self, verb: str, table: str, columns: List[str], rows: Sequence[Dict[str, Any]]) -> None:
+    sql = f"{verb} INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})"
+    try:
+      with self._lock, self._conn:
+        self._conn.executemany(sql, [tuple(row.get(column) for column in columns) for row in rows])
+    except sqlite3.Error as e:
+      raise StoreError(str(e)) from e
+
+  def insert_feedback_batch(self, feedback_rows: Sequence[Dict[str, Any]]) -> None:
+    # A replayed feedback_id is already stored, so it is skipped.
+    self._insert_many("INSERT OR IGNORE", "Transaction_Feedback", FEEDBACK_COLUMNS, feedback_rows)
+
+  def insert_transactions_batch(self, transaction_rows: Sequence[Dict[str, Any]]) -> None:
+    replaced = self._upsert_transactions(transaction_rows)
+    self._notify_written(transaction_rows, replaced)
@@ -0,0 +1,289 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Confidence-based model tiering for the decision path.
+
+A cheap stage -- the rule engine plus the history scorer, aggregated as in
+the review panel -- produces an `AnalysisResult`. Only when its confidence
+is below `config.escalation_threshold` is the expensive model involved:
+
+- Batch (`TieredEvaluator`): the LLM reviewer runs only for transactions the
+  cheap stage cannot settle, and its result is aggregated with the cheap
+  reviews.
+- Chat (`ModelRouter`): the agents run on `config.cheap_model`, and a
+  before-model callback switches a call to `config.escalation_model` when
+  the tool results of the current turn add up to a low-confidence
+  assessment. Steps that only extract fields or plan tool calls stay on
+  the cheap model; the analysis agent escalates after a tool error.
+
+Both record each decision's tier and latency in `TierStats`, which reports
+the escalation rate and the latency saved against escalating everything.
+In chat a decision is one invocation, timed on the model call that gives
+the final answer.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Mapping, Optional
+
+from data_models.transaction_models import AnalysisResult
+from .config import get_config
+from .prompts.assembly import user_message_indices
+from .rules import RuleEngine, default_engine
+from .scoring import aggregate_reviews, review_history_async, score_counts
+from .store import TransactionStore
+from .tracing import adk_callbacks, combine_callbacks
+
+logger = logging.getLogger('google_adk.' + __name__)
+
+CHEAP = "cheap"
+ESCALATED = "escalated"
+
+# Latency samples kept per tier.
+_SAMPLES_PER_TIER = 10000
+
+
+class TierStats:
+  """Thread-safe count and latency of decisions per tier."""
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._counts: Dict[str, int] = {CHEAP: 0, ESCALATED: 0}
+    self._latencies: Dict[str, Deque[float]] = {
+        CHEAP: deque(maxlen=_SAMPLES_PER_TIER),
+        ESCALATED: deque(maxlen=_SAMPLES_PER_TIER),
+    }
+
+  def record(self, tier: str, latency_ms: Optional[float] = None) -> None:
+    with self._lock:
+      self._counts[tier] += 1
+      if latency_ms is not None:
+        self._latencies[tier].append(latency_ms)
+
+  def reset(self) -> None:
+    with self._lock:
+      for tier in self._counts:
+        self._counts[tier] = 0
+        self._latencies[tier].clear()
+
+  def as_dict(self) -> Dict[str, Any]:
+    """Counts, escalation rate and latency per tier.
+
+    `estimated_saved_ms` is the cheap decisions times the difference in mean
+    latency between the tiers, i.e. the time saved against sending every
+    decision to the escalation model.
+    """
+    with self._lock:
+      counts = dict(self._counts)
+      latencies = {tier: sorted(values) for tier, values in self._latencies.items()}
+    total = sum(counts.values())
+    tiers = {}
+    for tier, values in latencies.items():
+      tiers[tier] = {"count": counts[tier]}
+      if values:
+        tiers[tier]["mean_ms"] = round(sum(values) / len(values), 2)
+        tiers[tier]["p50_ms"] = round(values[len(values) // 2], 2)
+    everything = sorted(value for values in latencies.values() for value in values)
+    saved = None
+    if latencies[CHEAP] and latencies[ESCALATED]:
+      saved = round(counts[CHEAP] * (tiers[ESCALATED]["mean_ms"] - tiers[CHEAP]["mean_ms"]), 1)
+    return {
+        "decisions": total,
+        "escalation_rate": round(counts[ESCALATED] / total, 4) if total else 0.0,
+        "p50_ms": round(everything[len(everything) // 2], 2) if everything else None,
+        "estimated_saved_ms": saved,
+        "tiers": tiers,
+    }
+
+
+_tier_stats: Optional[TierStats] = None
+_tier_stats_lock = threading.Lock()
+
+
+def get_tier_stats() -> TierStats:
+  """Return the process-wide tier statistics."""
+  global _tier_stats
+  if _tier_stats is None:
+    with _tier_stats_lock:
+      if _tier_stats is None:
+        _tier_stats = TierStats()
+  return _tier_stats
+
+
+# --- Batch --------------------------------------------------------------------
+
+class TieredEvaluator:
+  """Rules -> history, escalating to `escalate` (the LLM reviewer) below the threshold.
+
+  Attributes:
+      threshold: Cheap-stage confidence below which `escalate` is consulted.
+      stats: Where each decision's tier and latency is recorded.
+  """
+
+  def __init__(
+      self,
+      engine: RuleEngine = default_engine,
+      store: Optional[TransactionStore] = None,
+      escalate: Optional[Any] = None,
+      threshold: Optional[float] = None,
+      stats: Optional[TierStats] = None,
+  ):
+    self.engine = engine
+    self.store = store
+    self.escalate = escalate
+    self.threshold = get_config().escalation_threshold if threshold is None else threshold
+    self.stats = stats or get_tier_stats()
+
+  async def _cheap_reviews(self, record: Dict[str, Any]) -> List[AnalysisResult]:
+    screened = self.engine.evaluate(record)
+    if screened.confidence_score >= self.engine.decisive_threshold:
+      return [screened]
+    return [screened, await review_history_async(record, self.store)]
+
+  async def __call__(self, record: Dict[str, Any]) -> AnalysisResult:
+    start = time.perf_counter()
+    reviews = await self._cheap_reviews(record)
+    result = reviews[0] if len(reviews) == 1 else aggregate_reviews(reviews, agent_name="batch_evaluator")
+    tier = CHEAP
+    if self.escalate is not None and result.confidence_score < self.threshold:
+      reviews.append(await self.escalate(record))
+      result = aggregate_reviews(reviews, agent_name="batch_evaluator")
+      tier = ESCALATED
+    self.stats.record(tier, (time.perf_counter() - start) * 1000)
+    return result
+
+
+# --- Chat ---------------------------------------------------------------------
+
+def _turn_results(llm_request: Any) -> Dict[str, List[Dict[str, Any]]]:
+  """Tool results since the user's last message, by tool name."""
+  contents = getattr(llm_request, "contents", None) or []
+  messages = user_message_indices(contents)
+  start = messages[-1] + 1 if messages else 0
+  results: Dict[str, List[Dict[str, Any]]] = {}
+  for content in contents[start:]:
+    for part in content.parts or ():
+      if not part.function_response:
+        continue
+      response = part.function_response.response
+      if isinstance(response, dict) and isinstance(response.get("result"), str):
+        try:
+          response = json.loads(response["result"])
+        except ValueError:
+          response = {}
+      results.setdefault(part.function_response.name, []).append(response if isinstance(response, dict) else {})
+  return results
+
+
+def assess_decision(results: Mapping[str, List[Dict[str, Any]]]) -> Optional[AnalysisResult]:
+  """Cheap-stage assessment from screen_transaction and the history summaries.
+
+  None until the screen and, for a non-decisive screen, at least one
+  summary are in -- before that the model is still gathering data.
+  Summary counts are pooled across the turn's summarize calls.
+  """
+  screens = results.get("screen_transaction")
+  if not screens or "decision" not in screens[-1]:
+    return None
+  screened = AnalysisResult.model_validate(screens[-1])
+  if screens[-1].get("decisive"):
+    return screened
+  summaries = [s for s in results.get("summarize_similar_transactions", ()) if "error" not in s]
+  if not summaries:
+    return None
+  history = score_counts(
+      sum(s.get("approved") or 0 for s in summaries),
+      sum(s.get("rejected") or 0 for s in summaries),
+      sum(s.get("marked_for_review") or 0 for s in summaries),
+  )
+  return aggregate_reviews([screened, history], agent_name="cheap_stage")
+
+
+def assess_analysis(results: Mapping[str, List[Dict[str, Any]]]) -> Optional[AnalysisResult]:
+  """Low confidence once any tool of the turn has failed (e.g. a bad query)."""
+  if any("error" in response for responses in results.values() for response in responses):
+    return AnalysisResult(
+        agent_name="cheap_stage", decision="Review", reason="Tool error in this turn", confidence_score=0.0
+    )
+  return None
+
+
+_ASSESSORS = {"decision": assess_decision, "analysis": assess_analysis}
+
+
+class ModelRouter:
+  """Before/after-model callbacks that pick the model per call and time it."""
+
+  def __init__(
+      self,
+      assess: str,
+      cheap_model: Optional[str] = None,
+      escalation_model: Optional[str] = None,
+      threshold: Optional[float] = None,
+      stats: Optional[TierStats] = None,
+  ):
+    config = get_config()
+    self.assess = _ASSESSORS[assess]
+    self.cheap_model = cheap_model or config.cheap_model
+    self.escalation_model = escalation_model or config.escalation_model
+    self.threshold = config.escalation_threshold if threshold is None else threshold
+    self.stats = stats or get_tier_stats()
+    self._lock = threading.Lock()
+    # Tier and start time of each invocation's latest call made with an assessment.
+    self._started: Dict[str, tuple] = {}
+
+  def before_model(self, callback_context: Any, llm_request: Any) -> None:
+    assessment = self.assess(_turn_results(llm_request))
+    escalate = assessment is not None and assessment.confidence_score < self.threshold
+    llm_request.model = self.escalation_model if escalate else self.cheap_model
+    with self._lock:
+      if assessment is None:
+        self._started.pop(callback_context.invocation_id, None)
+      else:
+        self._started[callback_context.invocation_id] = (ESCALATED if escalate else CHEAP, time.perf_counter())
+
+  def after_model(self, callback_context: Any, llm_response: Any) -> None:
+    """Record the decision's tier once, on the call that answers without calling a tool.
+
+    Calls that request more tools are steps toward the decision, not
+    decisions; a failed call records nothing.
+    """
+    if getattr(llm_response, "partial", False):
+      return
+    parts = (llm_response.content.parts or ()) if llm_response.content else ()
+    if any(part.function_call for part in parts):
+      return
+    with self._lock:
+      started = self._started.pop(callback_context.invocation_id, None)
+    if started is not None and not getattr(llm_response, "error_code", None):
+      tier, start = started
+      self.stats.record(tier, (time.perf_counter() - start) * 1000)
+
+
+def tiered_callbacks(assess: str) -> Dict[str, Any]:
+  """Keyword arguments adding model tiering and tracing to an LlmAgent.
+
+  Usage: `Agent(model=config.cheap_model, ..., **tiered_callbacks("decision"))`.
+  The router runs before the tracing callback so model spans are named
+  after the model actually called.
+  """
+  router = ModelRouter(assess)
+  return combine_callbacks(
+      {"before_model_callback": router.before_model},
+      adk_callbacks(),
+      {"after_model_callback": router.after_model},
+  )
@@ -15,18 +15,22 @@
 import logging
 import json
 import uuid
+from collections import Counter
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
-from google.cloud import bigquery
-from .config import config
+from .config import get_config
+from .encoding import encode_response
+from .knn import get_neighbour_index
+from .payee_registry import get_payee_registry
+from .profiles import ENTITY_COLUMNS, get_profile_store
+from .rules import default_engine
+from .store import TRANSACTION_COLUMNS, StoreError, get_feedback_writer, get_transaction_store
+from .store.dataset import parse_timestamp
+from .velocity import get_velocity_tracker
 
 logger = logging.getLogger('google_adk.' + __name__)
 
-def get_bigquery_client() -> bigquery.Client:
-  """Get a configured BigQuery client."""
-  return bigquery.Client(project=config.project_id)
-
 
 def get_approval_status() -> str:
   """Get all rejected transactions with reasons from ccibt-hack25ww7-746.Tri_Netra.Transactions.
@@ -51,19 +55,8 @@ def get_approval_status() -> str:
            - payment_currency: Currency used (USD, EUR, GBP, etc.)
            - reject_reason: The reason why the transaction was rejected
   """
-  client = get_bigquery_client()
-
-  query = f"""
-        SELECT transaction_id, payment_time, payer_id, payee_id,
-               payment_amount, payment_currency, reject_reason
-        FROM `ccibt-hack25ww7-746.Tri_Netra.Transactions`
-        WHERE approval_status='REJECTED'
-     """
-
   try:
-    query_job = client.query(query)
-    results = query_job.result()
-    routine_info_list = [dict(row.items()) for row in results]
+    routine_info_list = get_transaction_store().get_rejected_transactions()
 
     if not routine_info_list:
       return json.dumps(
@@ -76,7 +69,7 @@ def get_approval_status() -> str:
           indent=2,
       )
 
-    return json.dumps(routine_info_list, indent=2, default=str)
+    return encode_response(routine_info_list, tool="get_approval_status")
 
   except Exception as e:
     return json.dumps(
@@ -99,7 +92,8 @@ def get_similar_transactions(
     vendor_country: Optional[str] = None,
     vendor_industry: Optional[str] = None,
     payment_amount: Optional[float] = None,
-    limit: int = 100
+    limit: int = 100,
+    fields: Optional[List[str]] = None
 ) -> str:
   """Get similar transactions based on transaction characteristics.
 
@@ -115,8 +109,11 @@ def get_similar_transactions(
       payee_country: Country of the payee (optional)
       vendor_country: Country of the vendor (optional)
       vendor_industry: Industry of the vendor (optional)
-      payment_amount: Amount of the payment (optional) - if provided, will find transactions within +/- 20% range
+      payment_amount: Amount of the payment (optional) - if provided, will find transactions within +/- 20%
+          of its USD equivalent; read as payment_currency if given, otherwise USD
       limit: Maximum number of transactions to return (default 100)
+      fields: Columns to return for each transaction (optional, default all columns below).
+          Request only what you need, e.g. ["payment_amount", "approval_status", "reject_reason"]
 
   Returns:
       str: JSON string containing similar transaction details with:
@@ -135,67 +132,43 @@ def get_similar_transactions(
            - approval_status: Status (APPROVED, REJECTED, MARKED FOR REVIEW)
            - reject_reason: Reason for rejection (if rejected)
   """
-  client = get_bigquery_client()
-
-  # Build WHERE clauses dynamically based on provided parameters
-  where_clauses = []
-
-  if payer_id:
-    where_clauses.append(f"payer_id = '{payer_id}'")
-  if payee_id:
-    where_clauses.append(f"payee_id = '{payee_id}'")
-  if payment_currency:
-    where_clauses.append(f"payment_currency = '{payment_currency}'")
-  if payment_method:
-    where_clauses.append(f"payment_method = '{payment_method}'")
-  if vendor_id:
-    where_clauses.append(f"vendor_id = '{vendor_id}'")
-  if payee_country:
-    where_clauses.append(f"payee_country = '{payee_country}'")
-  if vendor_country:
-    where_clauses.append(f"vendor_country = '{vendor_country}'")
-  if vendor_industry:
-    where_clauses.append(f"vendor_industry = '{vendor_industry}'")
-  if payment_amount is not None:
-    # Find transactions within +/- 20% of the amount
-    lower_bound = payment_amount * 0.8
-    upper_bound = payment_amount * 1.2
-    where_clauses.append(f"payment_amount BETWEEN {lower_bound} AND {upper_bound}")
-
-  # Construct the WHERE clause
-  where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
-
-  query = f"""
-        SELECT
-            transaction_id,
-            payment_time,
-            payer_id,
-            payee_id,
-            payment_amount,
-            payment_currency,
-            payment_method,
-            payment_purpose,
-            vendor_id,
-            payee_country,
-            vendor_country,
-            vendor_industry,
-            approval_status,
-            reject_reason
-        FROM `ccibt-hack25ww7-746.Tri_Netra.Transactions`
-        WHERE {where_sql}
-        ORDER BY payment_time DESC
-        LIMIT {limit}
-     """
+  candidate_filters = {
+      "payer_id": payer_id,
+      "payee_id": payee_id,
+      "payment_currency": payment_currency,
+      "payment_method": payment_method,
+      "vendor_id": vendor_id,
+      "payee_country": payee_country,
+      "vendor_country": vendor_country,
+      "vendor_industry": vendor_industry,
+  }
+  filters = {field: value for field, value in candidate_filters.items() if value}
+
+  columns = TRANSACTION_COLUMNS
+  if fields:
+    unknown = [field for field in fields if field not in TRANSACTION_COLUMNS]
+    if unknown:
+      return json.dumps(
+          {
+              "error": f"Unknown fields {unknown}; choose from {TRANSACTION_COLUMNS}"
+          },
+          indent=2,
+      )
+    # approval_status is always needed for the summary counts.
+    columns = [c for c in TRANSACTION_COLUMNS if c in fields or c == "approval_status"]
 
   try:
-    query_job = client.query(query)
-    results = query_job.result()
-    transaction_list = [dict(row.items()) for row in results]
+    transaction_list = get_transaction_store().find_similar_transactions(
+        filters, payment_amount=payment_amount, limit=limit, columns=columns
+    )
 
     if not transaction_list:
       return json.dumps(
           {
-              "message": "No similar transactions found in the dataset.",
+              "message": (
+                  "No similar transactions found in the dataset. Use find_nearest_transactions"
+                  " to get the closest transactions without requiring exact matches."
+              ),
               "query_parameters": {
                   "payer_id": payer_id,
                   "payee_id": payee_id,
@@ -211,22 +184,20 @@ def get_similar_transactions(
           indent=2,
       )
 
-    # Add summary statistics
-    approved_count = sum(1 for t in transaction_list if t.get('approval_status') == 'APPROVED')
-    rejected_count = sum(1 for t in transaction_list if t.get('approval_status') == 'REJECTED')
-    review_count = sum(1 for t in transaction_list if t.get('approval_status') == 'MARKED FOR REVIEW')
+    # Add summary statistics (over the returned rows only)
+    status_counts = Counter(t.get('approval_status') for t in transaction_list)
 
     response = {
         "summary": {
             "total_similar_transactions": len(transaction_list),
-            "approved": approved_count,
-            "rejected": rejected_count,
-            "marked_for_review": review_count
+            "approved": status_counts['APPROVED'],
+            "rejected": status_counts['REJECTED'],
+            "marked_for_review": status_counts['MARKED FOR REVIEW']
         },
         "transactions": transaction_list
     }
 
-    return json.dumps(response, indent=2, default=str)
+    return encode_response(response, tool="get_similar_transactions")
 
   except Exception as e:
     return json.dumps(
@@ -237,6 +208,265 @@ def get_similar_transactions(
     )
 
 
+def find_nearest_transactions(
+    payer_id: Optional[str] = None,
+    payee_id: Optional[str] = None,
+    payment_currency: Optional[str] = None,
+    payment_method: Optional[str] = None,
+    vendor_id: Optional[str] = None,
+    payee_country: Optional[str] = None,
+    vendor_country: Optional[str] = None,
+    vendor_industry: Optional[str] = None,
+    payment_amount: Optional[float] = None,
+    payment_time: Optional[str] = None,
+    k: int = 10
+) -> str:
+  """Find the historical transactions closest to a transaction, even without exact matches.
+
+  USE THIS TOOL when exact-match searches return nothing or too little. Transactions are
+  ranked by a weighted distance over all the fields you give (a differing payer or payee
+  costs more than a differing payment method; amounts are compared on a log scale of their
+  USD equivalent, times by time of day), so one call always returns the k best matches.
+
+  Args:
+      payer_id: ID of the payer (optional)
+      payee_id: ID of the payee (optional)
+      payment_currency: Currency used (optional); also the currency of payment_amount
+      payment_method: Payment method (optional)
+      vendor_id: ID of the vendor (optional)
+      payee_country: Country of the payee (optional)
+      vendor_country: Country of the vendor (optional)
+      vendor_industry: Industry of the vendor (optional)
+      payment_amount: Amount of the payment (optional), in payment_currency or USD
+      payment_time: ISO 8601 time of the transaction (optional)
+      k: Number of neighbours to return (default 10)
+
+  Returns:
+      str: JSON string with:
+           - neighbours: the k nearest transactions, each with distance, similarity (0-1)
+             and matched_fields (the given fields it matches exactly)
+           - decision_distribution: share of APPROVED / REJECTED / MARKED FOR REVIEW,
+             weighted by similarity
+           - reject_reasons: similarity-weighted share of each reject reason
+  """
+  probe = {
+      "payer_id": payer_id,
+      "payee_id": payee_id,
+      "payment_currency": payment_currency,
+      "payment_method": payment_method,
+      "vendor_id": vendor_id,
+      "payee_country": payee_country,
+      "vendor_country": vendor_country,
+      "vendor_industry": vendor_industry,
+      "payment_amount": payment_amount,
+      "payment_time": payment_time,
+  }
+  try:
+    result = get_neighbour_index().search(probe, k=max(1, min(k, 100)))
+    return encode_response(result, tool="find_nearest_transactions")
+
+  except Exception as e:
+    return json.dumps(
+        {
+            "error": f"Error finding nearest transactions: {e}"
+        },
+        indent=2,
+    )
+
+
+def summarize_similar_transactions(
+    payer_id: Optional[str] = None,
+    payee_id: Optional[str] = None,
+    payment_currency: Optional[str] = None,
+    payment_method: Optional[str] = None,
+    vendor_id: Optional[str] = None,
+    payee_country: Optional[str] = None,
+    vendor_country: Optional[str] = None,
+    vendor_industry: Optional[str] = None,
+    payment_amount: Optional[float] = None,
+    sample_size: int = 3
+) -> str:
+  """Get approval statistics over ALL historical transactions similar to a transaction.
+
+  USE THIS TOOL to measure how similar transactions were decided. The statistics
+  are computed inside the database over every matching transaction (not only the
+  most recent 100), and only the compact result is returned.
+
+  Args:
+      payer_id: ID of the payer (optional)
+      payee_id: ID of the payee (optional)
+      payment_currency: Currency used (USD, EUR, GBP, JPY, CAD) (optional)
+      payment_method: Payment method (Credit Card, Wire, ACH, Check, Bank Transfer) (optional)
+      vendor_id: ID of the vendor (optional)
+      payee_country: Country of the payee (optional)
+      vendor_country: Country of the vendor (optional)
+      vendor_industry: Industry of the vendor (optional)
+      payment_amount: Amount of the payment (optional) - if provided, only transactions within +/- 20%
+          of its USD equivalent are counted; read as payment_currency if given, otherwise USD
+      sample_size: Number of the most recent matching transactions to include as examples (default 3)
+
+  Returns:
+      str: JSON string with:
+           - total_similar_transactions, approved, rejected, marked_for_review
+           - approval_rate, rejection_rate, review_rate (0-1)
+           - reject_reasons: most frequent rejection reasons with counts
+           - payment_amount_usd: count, min, max, mean and p5/p25/p50/p75/p95 of the
+             USD-equivalent amounts
+           - sample: the most recent matching transactions (if sample_size > 0)
+  """
+  candidate_filters = {
+      "payer_id": payer_id,
+      "payee_id": payee_id,
+      "payment_currency": payment_currency,
+      "payment_method": payment_method,
+      "vendor_id": vendor_id,
+      "payee_country": payee_country,
+      "vendor_country": vendor_country,
+      "vendor_industry": vendor_industry,
+  }
+  filters = {field: value for field, value in candidate_filters.items() if value}
+
+  try:
+    summary = get_transaction_store().summarize_similar_transactions(
+        filters, payment_amount=payment_amount, sample_size=max(0, sample_size)
+    )
+    summary["query_parameters"] = dict(filters, payment_amount=payment_amount)
+    return encode_response(summary, tool="summarize_similar_transactions")
+
+  except Exception as e:
+    return json.dumps(
+        {
+            "error": f"Error summarizing similar transactions: {e}"
+        },
+        indent=2,
+    )
+
+
+def get_entity_profile(
+    entity_id: str,
+    entity_type: Optional[str] = None,
+    payment_amount: Optional[float] = None,
+    payment_currency: Optional[str] = None
+) -> str:
+  """Look up the precomputed history profile of a payer, payee or vendor.
+
+  USE THIS TOOL to check whether a transaction is normal for the parties involved,
+  e.g. whether the amount is more than 25% above the payer's average in that currency
+  ("Higher than avg amount"), or whether the payee has been seen before.
+
+  Args:
+      entity_id: The payer_id, payee_id or vendor_id to look up
+      entity_type: 'payer', 'payee' or 'vendor' (optional, default: all that match)
+      payment_amount: Amount of the transaction being evaluated (optional)
+      payment_currency: Currency of that amount (optional, required for the comparison)
+
+  Returns:
+      str: JSON string with, per matching entity type:
+           - transaction_count, first_seen, last_seen, typical_currencies
+           - amounts_by_currency: count, mean, std, min, max, recent_mean
+           - approval_history: counts by approval_status
+           - comparison (if amount and currency given): pct_vs_mean, z_score,
+             above_max_seen, above_average_threshold (> 25% above the mean), new_currency
+  """
+  try:
+    entity_types = [entity_type.lower()] if entity_type else list(ENTITY_COLUMNS)
+    profiles = get_profile_store().lookup(
+        entity_id,
+        entity_types=entity_types,
+        payment_amount=payment_amount,
+        payment_currency=payment_currency,
+    )
+    if not profiles:
+      return encode_response(
+          {
+              "message": f"No history found for {entity_id}; treat it as a new entity.",
+              "entity_id": entity_id,
+          },
+          tool="get_entity_profile",
+      )
+    return encode_response(profiles, tool="get_entity_profile")
+
+  except Exception as e:
+    return json.dumps(
+        {
+            "error": f"Error looking up entity profile: {e}"
+        },
+        indent=2,
+    )
+
+
+def get_payment_velocity(
+    payer_id: Optional[str] = None,
+    payee_id: Optional[str] = None,
+    payment_time: Optional[str] = None
+) -> str:
+  """Count recent payments by a payer, to a payee and between the two.
+
+  USE THIS TOOL to check the "Multiple Payments in 24h" and "Off-cycle Payment" patterns.
+  Answers in constant time from sliding-window counters kept up to date as transactions arrive.
+
+  Args:
+      payer_id: ID of the payer (optional)
+      payee_id: ID of the payee (optional)
+      payment_time: ISO 8601 time of the transaction being evaluated (optional, default now)
+
+  Returns:
+      str: JSON string with, for the payer, the payee and the payer->payee pair,
+           payment count and amount_sum over the last 1h, 24h and 7d, plus
+           payer_hour_of_day.off_cycle (true if the payer rarely pays at this hour).
+           A "warning" means no stored payment has a usable time, so the
+           counts say nothing about velocity.
+  """
+  if not payer_id and not payee_id:
+    return json.dumps(
+        {
+            "error": "Provide payer_id, payee_id or both"
+        },
+        indent=2,
+    )
+  try:
+    as_of = parse_timestamp(payment_time) if payment_time else None
+    velocity = get_velocity_tracker().velocity(payer_id, payee_id, as_of=as_of)
+    return encode_response(velocity, tool="get_payment_velocity")
+
+  except Exception as e:
+    return json.dumps(
+        {
+            "error": f"Error computing payment velocity: {e}"
+        },
+        indent=2,
+    )
+
+
+def check_payee(
+    payee_id: str,
+    payer_id: Optional[str] = None
+) -> str:
+  """Check whether a payee, and the payer->payee relationship, has been seen before.
+
+  USE THIS TOOL to check the "New Payee" pattern. Answers from an in-memory registry
+  of every payee in the Transactions table, kept current as transactions and feedback arrive.
+
+  Args:
+      payee_id: ID of the payee
+      payer_id: ID of the payer (optional, adds the relationship check)
+
+  Returns:
+      str: JSON string with new_payee (true if the payee has never been paid),
+           payee_first_seen, and new_relationship (true if this payer has never paid this payee)
+  """
+  try:
+    return encode_response(get_payee_registry().check(payee_id, payer_id), tool="check_payee")
+
+  except Exception as e:
+    return json.dumps(
+        {
+            "error": f"Error checking payee registry: {e}"
+        },
+        indent=2,
+    )
+
+
 def insert_transaction_feedback(
     agent_decision: str,
     user_decision: str,
@@ -291,8 +521,6 @@ def insert_transaction_feedback(
   Returns:
       str: JSON string confirming the feedback and transaction were stored or an error message
   """
-  client = get_bigquery_client()
-
   # Generate unique feedback ID and transaction ID if not provided
   feedback_id = str(uuid.uuid4())
   if not transaction_id:
@@ -352,57 +580,61 @@ def insert_transaction_feedback(
   feedback_row_clean = {k: v for k, v in feedback_row.items() if v is not None}
   transaction_row_clean = {k: v for k, v in transaction_row.items() if v is not None}
 
-  feedback_table_id = "ccibt-hack25ww7-746.Tri_Netra.Transaction_Feedback"
-  transactions_table_id = "ccibt-hack25ww7-746.Tri_Netra.Transactions"
+  feedback_summary = {
+      "agent_decision": agent_decision.upper(),
+      "user_decision": user_decision.upper(),
+      "is_agent_correct": is_agent_correct,
+      "feedback_timestamp": feedback_timestamp
+  }
+
+  if get_config().feedback_buffered:
+    # Written by the background writer in the next batch; feedback_id makes
+    # the write idempotent if the batch has to be retried.
+    try:
+      get_feedback_writer().submit(feedback_row_clean, transaction_row_clean)
+    except Exception as e:
+      return json.dumps(
+          {
+              "error": f"Error queueing feedback: {e}"
+          },
+          indent=2,
+      )
+    return encode_response(
+        {
+            "success": True,
+            "message": "Feedback and transaction queued for storage",
+            "feedback_id": feedback_id,
+            "transaction_id": transaction_id,
+            "details": {
+                "feedback_stored": "queued",
+                "transaction_stored": "queued",
+                "can_be_used_for_future_analysis": True
+            },
+            "feedback_summary": feedback_summary
+        },
+        tool="insert_transaction_feedback",
+    )
 
   try:
+    store = get_transaction_store()
+
     # 1. Insert into Transaction_Feedback table
-    # Check if feedback table exists, if not create it
     try:
-      client.get_table(feedback_table_id)
-    except Exception:
-      # Table doesn't exist, create it
-      feedback_schema = [
-          bigquery.SchemaField("feedback_id", "STRING", mode="REQUIRED"),
-          bigquery.SchemaField("feedback_timestamp", "TIMESTAMP", mode="REQUIRED"),
-          bigquery.SchemaField("transaction_id", "STRING", mode="NULLABLE"),
-          bigquery.SchemaField("payer_id", "STRING", mode="NULLABLE"),
-          bigquery.SchemaField("payee_id", "STRING", mode="NULLABLE"),
-          bigquery.SchemaField("payment_amount", "FLOAT64", mode="NULLABLE"),
-          bigquery.SchemaField("payment_currency", "STRING", mode="NULLABLE"),
-          bigquery.SchemaField("payment_method", "STRING", mode="NULLABLE"),
-          bigquery.SchemaField("payment_purpose", "STRING", mode="NULLABLE"),
-          bigquery.SchemaField("vendor_id", "STRING", mode="NULLABLE"),
-          bigquery.SchemaField("payee_country", "STRING", mode="NULLABLE"),
-          bigquery.SchemaField("vendor_country", "STRING", mode="NULLABLE"),
-          bigquery.SchemaField("vendor_industry", "STRING", mode="NULLABLE"),
-          bigquery.SchemaField("agent_decision", "STRING", mode="REQUIRED"),
-          bigquery.SchemaField("agent_reasoning", "STRING", mode="NULLABLE"),
-          bigquery.SchemaField("agent_confidence", "STRING", mode="NULLABLE"),
-          bigquery.SchemaField("user_decision", "STRING", mode="REQUIRED"),
-          bigquery.SchemaField("is_agent_correct", "BOOLEAN", mode="REQUIRED"),
-          bigquery.SchemaField("feedback_notes", "STRING", mode="NULLABLE"),
-          bigquery.SchemaField("session_id", "STRING", mode="NULLABLE"),
-          bigquery.SchemaField("agent_version", "STRING", mode="NULLABLE"),
-      ]
-      feedback_table = bigquery.Table(feedback_table_id, schema=feedback_schema)
-      feedback_table.description = "Stores user feedback on transaction approval decisions"
-      client.create_table(feedback_table)
-      logger.info(f"Created table {feedback_table_id}")
-
-    # Insert feedback
-    feedback_errors = client.insert_rows_json(feedback_table_id, [feedback_row_clean])
-
-    if feedback_errors:
+      store.insert_feedback(feedback_row_clean)
+    except StoreError as feedback_errors:
       return json.dumps(
           {
-              "error": f"Error inserting feedback into BigQuery: {feedback_errors}"
+              "error": f"Error inserting feedback into {store.name}: {feedback_errors}"
           },
           indent=2,
       )
 
     # 2. Insert into Transactions table (for future learning)
-    transaction_errors = client.insert_rows_json(transactions_table_id, [transaction_row_clean])
+    transaction_errors = None
+    try:
+      store.insert_transaction(transaction_row_clean)
+    except StoreError as e:
+      transaction_errors = e
 
     if transaction_errors:
       # Even if transaction insert fails, feedback was stored
@@ -414,12 +646,7 @@ def insert_transaction_feedback(
               "feedback_id": feedback_id,
               "transaction_id": transaction_id,
               "warning": f"Transaction table insert errors: {transaction_errors}",
-              "feedback_summary": {
-                  "agent_decision": agent_decision.upper(),
-                  "user_decision": user_decision.upper(),
-                  "is_agent_correct": is_agent_correct,
-                  "feedback_timestamp": feedback_timestamp
-              }
+              "feedback_summary": feedback_summary
           },
           indent=2,
       )
@@ -435,15 +662,10 @@ def insert_transaction_feedback(
             "transaction_stored": True,
             "can_be_used_for_future_analysis": True
         },
-        "feedback_summary": {
-            "agent_decision": agent_decision.upper(),
-            "user_decision": user_decision.upper(),
-            "is_agent_correct": is_agent_correct,
-            "feedback_timestamp": feedback_timestamp
-        }
+        "feedback_summary": feedback_summary
     }
 
-    return json.dumps(response, indent=2)
+    return encode_response(response, tool="insert_transaction_feedback")
 
   except Exception as e:
     return json.dumps(
@@ -453,3 +675,75 @@ def insert_transaction_feedback(
         indent=2,
     )
 
+
+
+def screen_transaction(
+    payment_amount: Optional[float] = None,
+    payment_currency: Optional[str] = None,
+    payment_method: Optional[str] = None,
+    payment_purpose: Optional[str] = None,
+    payer_id: Optional[str] = None,
+    payee_id: Optional[str] = None,
+    vendor_id: Optional[str] = None,
+    payee_country: Optional[str] = None,
+    vendor_country: Optional[str] = None,
+    vendor_industry: Optional[str] = None,
+) -> str:
+  """Screen a transaction against the known rejection rules in microseconds.
+
+  USE THIS TOOL FIRST when evaluating a transaction. It deterministically checks:
+  - High Value Transaction: amount above the 15,000 USD equivalent
+  - High-Risk Industry: Cannabis, Shell Corporations, Precious Metals, Art & Antiques, Arms Dealing
+  - Mismatched Currency: payment currency differs from the payee country's currency
+  - Unusual Transfer: payment purpose marked "Unusual Transfer"
+  - New Payee: the payee has never been paid before
+
+  If the result is `decisive`, the rules alone settle the case and you can report
+  that decision without further similarity queries.
+
+  Args:
+      payment_amount: Amount of the payment (optional)
+      payment_currency: Currency used (USD, EUR, GBP, JPY, CAD) (optional)
+      payment_method: Payment method (optional)
+      payment_purpose: Purpose of payment (optional)
+      payer_id: ID of the payer (optional)
+      payee_id: ID of the payee (optional)
+      vendor_id: Vendor ID (optional)
+      payee_country: Country of payee (optional)
+      vendor_country: Country of vendor (optional)
+      vendor_industry: Industry of vendor (optional)
+
+  Returns:
+      str: JSON string with decision (Approve/Reject/Review), reason,
+           confidence_score and whether the result is decisive
+  """
+  record = {
+      "payment_amount": payment_amount,
+      "payment_currency": payment_currency,
+      "payment_method": payment_method,
+      "payment_purpose": payment_purpose,
+      "payer_id": payer_id,
+      "payee_id": payee_id,
+      "vendor_id": vendor_id,
+      "payee_country": payee_country,
+      "vendor_country": vendor_country,
+      "vendor_industry": vendor_industry,
+  }
+
+  try:
+    try:
+      get_payee_registry().annotate(record)
+    except Exception as e:
+      logger.warning(f"Payee registry unavailable, skipping New Payee check: {e}")
+    result = default_engine.evaluate(record)
+    response = result.model_dump()
+    response["decisive"] = result.confidence_score >= default_engine.decisive_threshold
+    return encode_response(response, tool="screen_transaction")
+
+  except Exception as e:
+    return json.dumps(
+        {
+            "error": f"Error screening transaction: {e}"
+        },
+        indent=2,
+    )
@@ -0,0 +1,98 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""ADK toolsets built on first use.
+
+The BigQuery toolset needs credentials, and looking them up is slow and
+fails on machines without any. `LazyToolset` defers building a toolset to
+the first model request that lists its tools, so importing the package and
+constructing the agents touch no auth. A factory may return None when the
+toolset cannot be served (a local store, no credentials); the agents then
+simply have no such tools.
+"""
+
+import logging
+import threading
+from typing import Callable, List, Optional
+
+from google.adk.agents.readonly_context import ReadonlyContext
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.base_toolset import BaseToolset
+from google.adk.tools.bigquery import BigQueryCredentialsConfig, BigQueryToolset
+from google.adk.tools.bigquery.config import BigQueryToolConfig, WriteMode
+from google.auth.exceptions import DefaultCredentialsError
+
+from .async_tools import run_blocking
+from .bigquery_client import get_credentials
+from .config import get_config
+
+logger = logging.getLogger('google_adk.' + __name__)
+
+
+class LazyToolset(BaseToolset):
+  """Delegates to the toolset returned by `factory`, called once on first use.
+
+  If the factory returns None, the toolset provides no tools.
+  """
+
+  def __init__(self, factory: Callable[[], Optional[BaseToolset]]):
+    super().__init__()
+    self._factory = factory
+    self._toolset: Optional[BaseToolset] = None
+    self._built = False
+    self._lock = threading.Lock()
+
+  @property
+  def toolset(self) -> Optional[BaseToolset]:
+    """Return the wrapped toolset, building it on first access."""
+    if self._built:
+      return self._toolset
+    with self._lock:
+      if not self._built:
+        self._toolset = self._factory()
+        self._built = True
+      return self._toolset
+
+  async def get_tools(self, readonly_context: Optional[ReadonlyContext] = None) -> List[BaseTool]:
+    # The factory may block on credential discovery; keep it off the event loop.
+    toolset = self._toolset if self._built else await run_blocking(lambda: self.toolset)
+    if toolset is None:
+      return []
+    return await toolset.get_tools(readonly_context)
+
+  async def close(self) -> None:
+    if self._toolset is not None:
+      await self._toolset.close()
+
+
+def build_bigquery_toolset() -> Optional[BigQueryToolset]:
+  """Read-only BigQuery toolset on the shared application default credentials.
+
+  Returns None, so the agents get no BigQuery tools, when the store backend
+  is not BigQuery or no credentials are found.
+  """
+  backend = get_config().store_backend
+  if backend != "bigquery":
+    logger.warning(f"Store backend is {backend!r}; agents get no BigQuery toolset")
+    return None
+  try:
+    credentials, _ = get_credentials()
+  except DefaultCredentialsError as e:
+    logger.warning(f"No application default credentials; agents get no BigQuery toolset: {e}")
+    return None
+  logger.info("Building BigQuery toolset")
+  return BigQueryToolset(
+      credentials_config=BigQueryCredentialsConfig(credentials=credentials),
+      bigquery_tool_config=BigQueryToolConfig(write_mode=WriteMode.BLOCKED),
+  )
@@ -0,0 +1,523 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Latency tracing across agent turns, model calls, tool calls, store
+queries and response serialization.
+
+Spans nest through a context variable, so a BigQuery job started by a tool
+becomes a child of that tool call, which is a child of the agent turn that
+issued it. ADK agents are instrumented through the callbacks returned by
+`adk_callbacks()` (agent turns, model calls with token counts, tool calls);
+store queries and serialization open their own spans with
+`get_tracer().span(...)`.
+
+Finished spans are kept in memory for `summary()` -- count, errors and
+p50/p95/p99 latency per stage -- and, when configured, exported from a
+background thread in OTLP/JSON form: one `resourceSpans` batch per line to
+`config.trace_file` (TRINETRA_TRACE_FILE) and/or POSTed to an OTLP/HTTP
+collector at `config.otlp_endpoint` (TRINETRA_OTLP_ENDPOINT). Tracing is
+disabled with TRINETRA_TRACING=False.
+"""
+
+import atexit
+import contextvars
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import urllib.request
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional
+
+from .config import get_config
+
+logger = logging.getLogger('google_adk.' + __name__)
+
+# Span kinds; a stage in the summary is "<kind>:<name>".
+KINDS = ("agent", "model", "tool", "query", "serialization")
+
+_SUMMARY_PERCENTILES = (50, 95, 99)
+
+# Durations kept per stage for the percentile summary.
+_DURATIONS_PER_STAGE = 10000
+
+_EXPORT_BATCH_SIZE = 100
+_EXPORT_INTERVAL_SECONDS = 2.0
+
+_SCOPE = {"name": "trinetra.orchestrator_agent"}
+_RESOURCE = {"attributes": [{"key": "service.name", "value": {"stringValue": "trinetra"}}]}
+
+
+def _random_id(size: int) -> str:
+  return os.urandom(size).hex()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+  if isinstance(value, bool):
+    return {"boolValue": value}
+  if isinstance(value, int):
+    return {"intValue": str(value)}
+  if isinstance(value, float):
+    return {"doubleValue": value}
+  return {"stringValue": str(value)}
+
+
+@dataclass
+class Span:
+  """One timed operation."""
+  name: str
+  kind: str
+  trace_id: str
+  span_id: str
+  parent_id: Optional[str] = None
+  start_ns: int = field(default_factory=time.time_ns)
+  end_ns: int = 0
+  attributes: Dict[str, Any] = field(default_factory=dict)
+  error: Optional[str] = None
+
+  @property
+  def stage(self) -> str:
+    return f"{self.kind}:{self.name}"
+
+  @property
+  def duration_ms(self) -> float:
+    return (self.end_ns - self.start_ns) / 1e6 if self.end_ns else 0.0
+
+  def set(self, **attributes: Any) -> "Span":
+    """Add attributes; None values are dropped."""
+    self.attributes.update((key, value) for key, value in attributes.items() if value is not None)
+    return self
+
+  def to_otlp(self) -> Dict[str, Any]:
+    span = {
+        "traceId": self.trace_id,
+        "spanId": self.span_id,
+        "name": self.stage,
+        "kind": 1,  # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(self.start_ns),
+        "endTimeUnixNano": str(self.end_ns),
+        "attributes": [
+            {"key": key, "value": _otlp_value(value)}
+            for key, value in dict(self.attributes, **{"trinetra.kind": self.kind}).items()
+        ],
+        "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+    }
+    if self.parent_id:
+      span["parentSpanId"] = self.parent_id
+    return span
+
+
+def otlp_batch(spans: Iterable[Span]) -> Dict[str, Any]:
+  """Wrap spans in an OTLP/JSON ExportTraceServiceRequest."""
+  return {
+      "resourceSpans": [{
+          "resource": _RESOURCE,
+          "scopeSpans": [{"scope": _SCOPE, "spans": [span.to_otlp() for span in spans]}],
+      }]
+  }
+
+
+class JsonlExporter:
+  """Appends OTLP/JSON batches, one per line, to a local file."""
+
+  def __init__(self, path: str):
+    self.path = path
+
+  def export(self, spans: List[Span]) -> None:
+    with open(self.path, "a", encoding="utf-8") as f:
+      f.write(json.dumps(otlp_batch(spans), separators=(",", ":")) + "\n")
+
+
+class OtlpHttpExporter:
+  """POSTs OTLP/JSON batches to a collector's /v1/traces endpoint."""
+
+  def __init__(self, endpoint: str, timeout: float = 5.0):
+    self.url = endpoint.rstrip("/") + ("" if endpoint.rstrip("/").endswith("/v1/traces") else "/v1/traces")
+    self.timeout = timeout
+
+  def export(self, spans: List[Span]) -> None:
+    request = urllib.request.Request(
+        self.url,
+        data=json.dumps(otlp_batch(spans)).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(request, timeout=self.timeout):
+      pass
+
+
+class _ExportWorker:
+  """Hands finished spans to the exporters in batches on a daemon thread."""
+
+  _STOP = object()
+
+  def __init__(self, exporters: List[Any]):
+    self.exporters = exporters
+    self._queue: "queue.Queue[Any]" = queue.Queue()
+    self._thread = threading.Thread(target=self._run, name="trinetra-trace-export", daemon=True)
+    self._thread.start()
+
+  def submit(self, span: Span) -> None:
+    self._queue.put(span)
+
+  def _run(self) -> None:
+    batch: List[Span] = []
+    deadline = time.monotonic() + _EXPORT_INTERVAL_SECONDS
+    while True:
+      try:
+        item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+      except queue.Empty:
+        item = None
+      if item is self._STOP:
+        self._export(batch)
+        return
+      if item is not None:
+        batch.append(item)
+      if len(batch) >= _EXPORT_BATCH_SIZE or time.monotonic() >= deadline:
+        self._export(batch)
+        batch = []
+        deadline = time.monotonic() + _EXPORT_INTERVAL_SECONDS
+
+  def _export(self, batch: List[Span]) -> None:
+    if not batch:
+      return
+    for exporter in self.exporters:
+      try:
+        exporter.export(batch)
+      except Exception as e:
+        logger.warning(f"Trace export to {type(exporter).__name__} failed: {e}")
+
+  def close(self) -> None:
+    self._queue.put(self._STOP)
+    self._thread.join(timeout=10)
+
+
+def _percentile(sorted_values: List[float], p: float) -> float:
+  rank = (len(sorted_values) - 1) * p / 100
+  lower = int(rank)
+  upper = min(lower + 1, len(sorted_values) - 1)
+  return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (rank - lower)
+
+
+def summarize_durations(
+    durations: Dict[str, Iterable[float]],
+    errors: Optional[Dict[str, int]] = None,
+) -> Dict[str, Dict[str, Any]]:
+  """Count, error count, mean, max and p50/p95/p99 (ms) per stage, slowest p95 first."""
+  summary = {}
+  for stage, values in durations.items():
+    values = sorted(values)
+    if not values:
+      continue
+    stats = {"count": len(values), "errors": (errors or {}).get(stage, 0)}
+    stats["mean_ms"] = round(sum(values) / len(values), 2)
+    for p in _SUMMARY_PERCENTILES:
+      stats[f"p{p}_ms"] = round(_percentile(values, p), 2)
+    stats["max_ms"] = round(values[-1], 2)
+    summary[stage] = stats
+  return dict(sorted(summary.items(), key=lambda item: -item[1]["p95_ms"]))
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("trinetra_span", default=None)
+
+
+class Tracer:
+  """Creates spans, keeps per-stage latencies and forwards spans to exporters."""
+
+  def __init__(self, exporters: Iterable[Any] = (), enabled: bool = True):
+    self.enabled = enabled
+    exporters = list(exporters)
+    self._worker = _ExportWorker(exporters) if exporters and enabled else None
+    self._lock = threading.Lock()
+    self._durations: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=_DURATIONS_PER_STAGE))
+    self._errors: Dict[str, int] = defaultdict(int)
+
+  def current(self) -> Optional[Span]:
+    return _current_span.get()
+
+  def start_span(
+      self,
+      name: str,
+      kind: str,
+      parent: Optional[Span] = None,
+      trace_id: Optional[str] = None,
+      **attributes: Any,
+  ) -> Span:
+    """Start a span without making it current; finish it with end_span()."""
+    parent = parent if parent is not None else _current_span.get()
+    return Span(
+        name=name,
+        kind=kind,
+        trace_id=trace_id or (parent.trace_id if parent else _random_id(16)),
+        span_id=_random_id(8),
+        parent_id=parent.span_id if parent else None,
+    ).set(**attributes)
+
+  def end_span(self, span: Span, error: Optional[BaseException] = None) -> None:
+    if span.end_ns:
+      return
+    span.end_ns = time.time_ns()
+    if error is not None:
+      span.error = f"{type(error).__name__}: {error}"
+    with self._lock:
+      self._durations[span.stage].append(span.duration_ms)
+      if span.error:
+        self._errors[span.stage] += 1
+    if self._worker is not None:
+      self._worker.submit(span)
+
+  @contextmanager
+  def span(self, name: str, kind: str, **attributes: Any) -> Iterator[Span]:
+    """Time the enclosed block as a child of the current span."""
+    span = self.start_span(name, kind, **attributes)
+    if not self.enabled:
+      yield span
+      return
+    token = _current_span.set(span)
+    try:
+      yield span
+    except BaseException as e:
+      self.end_span(span, e)
+      raise
+    finally:
+      _current_span.reset(token)
+      self.end_span(span)
+
+  def traced(self, kind: str, name: Optional[str] = None) -> Callable[[Callable], Callable]:
+    """Decorator timing every call of a sync or async function."""
+
+    def decorate(func: Callable) -> Callable:
+      span_name = name or func.__name__
+      if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+          with self.span(span_name, kind):
+            return await func(*args, **kwargs)
+
+        return async_wrapper
+
+      @functools.wraps(func)
+      def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with self.span(span_name, kind):
+          return func(*args, **kwargs)
+
+      return wrapper
+
+    return decorate
+
+  def summary(self) -> Dict[str, Dict[str, Any]]:
+    """p50/p95/p99 latency per stage over the most recent spans."""
+    with self._lock:
+      durations = {stage: list(values) for stage, values in self._durations.items()}
+      errors = dict(self._errors)
+    return summarize_durations(durations, errors)
+
+  def reset(self) -> None:
+    with self._lock:
+      self._durations.clear()
+      self._errors.clear()
+
+  def close(self) -> None:
+    if self._worker is not None:
+      self._worker.close()
+      self._worker = None
+
+
+def summarize_trace_file(path: str) -> Dict[str, Dict[str, Any]]:
+  """Per-stage latency summary of a JSONL file written by JsonlExporter."""
+  durations: Dict[str, List[float]] = defaultdict(list)
+  errors: Dict[str, int] = defaultdict(int)
+  with open(path, encoding="utf-8") as f:
+    for line in f:
+      if not line.strip():
+        continue
+      for resource in json.loads(line).get("resourceSpans", []):
+        for scope in resource.get("scopeSpans", []):
+          for span in scope.get("spans", []):
+            stage = span["name"]
+            durations[stage].append((int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e6)
+            errors[stage] += span.get("status", {}).get("code") == 2
+  return summarize_durations(durations, errors)
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+  """Return the process-wide tracer, with the exporters from the config."""
+  global _tracer
+  if _tracer is None:
+    with _tracer_lock:
+      if _tracer is None:
+        config = get_config()
+        exporters: List[Any] = []
+        if config.trace_file:
+          exporters.append(JsonlExporter(config.trace_file))
+        if config.otlp_endpoint:
+          exporters.append(OtlpHttpExporter(config.otlp_endpoint))
+        tracer = Tracer(exporters, enabled=config.tracing)
+        atexit.register(tracer.close)
+        _tracer = tracer
+  return _tracer
+
+
+# --- ADK callbacks -----------------------------------------------------------
+
+def _trace_id(invocation_id: str) -> str:
+  # All spans of one invocation share a trace, even across sub-agents.
+  return hashlib.md5(invocation_id.encode("utf-8")).hexdigest()
+
+
+class _AdkSpans:
+  """Opens and closes spans from ADK's before/after callback pairs.
+
+  Callbacks of one pair run in the same task, so the span opened by the
+  "before" callback is made current until the matching "after" callback;
+  the previous current span is restored there. A model or tool call that
+  raises gets the matching "on error" callback instead, which closes its
+  span as failed.
+  """
+
+  def __init__(self, tracer: Tracer):
+    self.tracer = tracer
+    self._open: Dict[Any, tuple] = {}
+    self._lock = threading.Lock()
+
+  def _begin(self, key: Any, name: str, kind: str, invocation_id: str, **attributes: Any) -> None:
+    if not self.tracer.enabled:
+      return
+    span = self.tracer.start_span(name, kind, trace_id=_trace_id(invocation_id), **attributes)
+    previous = _current_span.get()
+    _current_span.set(span)
+    with self._lock:
+      self._open[key] = (span, previous)
+
+  def _end(self, key: Any, error: Optional[str] = None, **attributes: Any) -> None:
+    with self._lock:
+      entry = self._open.pop(key, None)
+    if entry is None:
+      return
+    span, previous = entry
+    span.set(**attributes)
+    if error:
+      span.error = error
+    self.tracer.end_span(span)
+    if _current_span.get() is span:
+      _current_span.set(previous)
+
+  def before_agent(self, callback_context: Any) -> None:
+    self._begin(
+        ("agent", callback_context.invocation_id, callback_context.agent_name),
+        callback_context.agent_name, "agent", callback_context.invocation_id,
+    )
+
+  def after_agent(self, callback_context: Any) -> None:
+    self._end(("agent", callback_context.invocation_id, callback_context.agent_name))
+
+  def before_model(self, callback_context: Any, llm_request: Any) -> None:
+    self._begin(
+        ("model", callback_context.invocation_id, callback_context.agent_name),
+        getattr(llm_request, "model", None) or "llm", "model", callback_context.invocation_id,
+        agent=callback_context.agent_name,
+        contents=len(getattr(llm_request, "contents", None) or []),
+    )
+
+  def after_model(self, callback_context: Any, llm_response: Any) -> None:
+    if getattr(llm_response, "partial", False):
+      return
+    usage = getattr(llm_response, "usage_metadata", None)
+    error_code = getattr(llm_response, "error_code", None)
+    error = None
+    if error_code:
+      error = f"{error_code}: {getattr(llm_response, 'error_message', None) or ''}".rstrip(": ")
+    self._end(
+        ("model", callback_context.invocation_id, callback_context.agent_name),
+        prompt_tokens=getattr(usage, "prompt_token_count", None),
+        cached_tokens=getattr(usage, "cached_content_token_count", None),
+        output_tokens=getattr(usage, "candidates_token_count", None),
+        thinking_tokens=getattr(usage, "thoughts_token_count", None),
+        total_tokens=getattr(usage, "total_token_count", None),
+        error=error,
+    )
+
+  def on_model_error(self, callback_context: Any, llm_request: Any, error: Exception) -> None:
+    self._end(
+        ("model", callback_context.invocation_id, callback_context.agent_name),
+        error=str(error) or type(error).__name__,
+    )
+
+  def _tool_key(self, tool_context: Any) -> tuple:
+    return ("tool", getattr(tool_context, "function_call_id", None) or id(tool_context))
+
+  def before_tool(self, tool: Any, args: Dict[str, Any], tool_context: Any) -> None:
+    self._begin(
+        self._tool_key(tool_context), tool.name, "tool", tool_context.invocation_id,
+        agent=tool_context.agent_name,
+        args=",".join(sorted(key for key, value in args.items() if value is not None)),
+    )
+
+  def after_tool(self, tool: Any, args: Dict[str, Any], tool_context: Any, tool_response: Any) -> None:
+    text = tool_response if isinstance(tool_response, str) else json.dumps(tool_response, default=str)
+    self._end(self._tool_key(tool_context), response_bytes=len(text.encode("utf-8")))
+
+  def on_tool_error(self, tool: Any, args: Dict[str, Any], tool_context: Any, error: Exception) -> None:
+    self._end(self._tool_key(tool_context), error=str(error) or type(error).__name__)
+
+
+def adk_callbacks(tracer: Optional[Tracer] = None, llm: bool = True) -> Dict[str, Callable]:
+  """Keyword arguments attaching tracing callbacks to an ADK agent.
+
+  Usage: `Agent(..., **adk_callbacks())`, or `adk_callbacks(llm=False)` for
+  agents without a model (workflow and custom agents), which only accept the
+  agent callbacks. The callbacks only observe; they never replace a model or
+  tool response.
+  """
+  spans = _AdkSpans(tracer or get_tracer())
+  callbacks = {
+      "before_agent_callback": spans.before_agent,
+      "after_agent_callback": spans.after_agent,
+  }
+  if llm:
+    callbacks.update(
+        before_model_callback=spans.before_model,
+        after_model_callback=spans.after_model,
+        on_model_error_callback=spans.on_model_error,
+        before_tool_callback=spans.before_tool,
+        after_tool_callback=spans.after_tool,
+        on_tool_error_callback=spans.on_tool_error,
+    )
+  return callbacks
+
+
+def combine_callbacks(*callback_sets: Dict[str, Any]) -> Dict[str, Any]:
+  """Merge agent callback keyword arguments, running each hook's callbacks in order.
+
+  Usage: `Agent(..., **combine_callbacks(adk_callbacks(), other_callbacks))`.
+  ADK stops at the first callback of a list that returns a value, so
+  callbacks that may replace a request or response belong first.
+  """
+  combined: Dict[str, List[Callable]] = {}
+  for callbacks in callback_sets:
+    for hook, callback in callbacks.items():
+      combined.setdefault(hook, []).extend(callback if isinstance(callback, list) else [callback])
+  return {hook: chain[0] if len(chain) == 1 else chain for hook, chain in combined.items()}
@@ -0,0 +1,356 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Sliding-window payment velocity for the "Multiple Payments in 24h" and
+"Off-cycle Payment" patterns.
+
+Every payer, payee and payer->payee pair gets, per window, a fixed ring of
+time buckets holding a payment count and amount sum. Recording a payment
+touches one bucket; a window query sums a fixed number of buckets, so both
+are O(1) in the amount of history, and memory per key is bounded by the
+bucket count. Window edges are accurate to one bucket (1/`buckets` of the
+window). The number of tracked keys is capped with LRU eviction.
+
+Each payer also keeps an hour-of-day histogram, so a payment at an hour the
+payer has rarely used before can be flagged as off-cycle.
+
+The tracker is seeded from stored transactions whose payment_time is a full
+timestamp, repairing truncated ones (the CSV's clock fragments) from
+`config.time_reference_paths` as ingest does. If none has a usable time,
+`velocity()` says so instead of reporting zero counts as if they were real.
+A corrected transaction (same transaction_id) written through the store is
+retracted from the buckets it was counted in before the correction is
+recorded.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from .config import get_config
+from .ingest import load_time_reference, repair_timestamp
+from .store import TransactionStore, get_transaction_store, replacement_pairs
+from .store.dataset import parse_timestamp
+
+logger = logging.getLogger('google_adk.' + __name__)
+
+DEFAULT_WINDOWS = {
+    "1h": 3600,
+    "24h": 24 * 3600,
+    "7d": 7 * 24 * 3600,
+}
+
+# Payments a payer needs before the hour-of-day histogram is trusted.
+OFF_CYCLE_MIN_HISTORY = 20
+
+# Share of a payer's payments below which an hour of day is "off-cycle".
+OFF_CYCLE_MAX_SHARE = 0.02
+
+# Transactions columns the tracker is seeded from (transaction_id to repair times).
+VELOCITY_COLUMNS = ["transaction_id", "payer_id", "payee_id", "payment_amount", "payment_time"]
+
+NO_HISTORY_WARNING = "no timestamped history: velocity is unknown, not zero"
+
+
+class _WindowRing:
+  """Fixed ring of (bucket number, count, amount sum) slots for one window."""
+
+  __slots__ = ("bucket_seconds", "buckets", "ids", "counts", "sums")
+
+  def __init__(self, seconds: float, buckets: int):
+    self.bucket_seconds = seconds / buckets
+    self.buckets = buckets
+    self.ids = [-1] * buckets
+    self.counts = [0] * buckets
+    self.sums = [0.0] * buckets
+
+  def add(self, timestamp: float, amount: float) -> None:
+    bucket = int(timestamp // self.bucket_seconds)
+    slot = bucket % self.buckets
+    if self.ids[slot] != bucket:
+      if self.ids[slot] > bucket:
+        return  # older than everything the ring still covers
+      self.ids[slot] = bucket
+      self.counts[slot] = 0
+      self.sums[slot] = 0.0
+    self.counts[slot] += 1
+    self.sums[slot] += amount
+
+  def remove(self, timestamp: float, amount: float) -> None:
+    bucket = int(timestamp // self.bucket_seconds)
+    slot = bucket % self.buckets
+    if self.ids[slot] == bucket and self.counts[slot]:
+      self.counts[slot] -= 1
+      self.sums[slot] -= amount
+
+  def total(self, as_of: float) -> Tuple[int, float]:
+    newest = int(as_of // self.bucket_seconds)
+    oldest = newest - self.buckets
+    count, amount = 0, 0.0
+    for bucket, bucket_count, bucket_sum in zip(self.ids, self.counts, self.sums):
+      if oldest < bucket <= newest:
+        count += bucket_count
+        amount += bucket_sum
+    return count, amount
+
+
+class _KeyState:
+  __slots__ = ("rings", "last_seen")
+
+  def __init__(self, windows: Mapping[str, float], buckets: int):
+    self.rings = {name: _WindowRing(seconds, buckets) for name, seconds in windows.items()}
+    self.last_seen = 0.0
+
+
+class VelocityTracker:
+  """Per-payer, per-payee and per-pair payment counts over sliding windows.
+
+  Attributes:
+      windows: Window name -> length in seconds.
+      buckets: Buckets per window (its time resolution).
+      max_keys: Maximum tracked keys before least recently used ones are evicted.
+  """
+
+  def __init__(
+      self,
+      windows: Optional[Mapping[str, float]] = None,
+      buckets: int = 24,
+      max_keys: int = 200000,
+  ):
+    self.windows = dict(windows or DEFAULT_WINDOWS)
+    self.buckets = buckets
+    self.max_keys = max_keys
+    self._lock = threading.Lock()
+    self._keys: "OrderedDict[Tuple[str, ...], _KeyState]" = OrderedDict()
+    self._hours: Dict[str, List[int]] = {}
+    self.observed = 0
+    self.skipped = 0
+    self.evicted = 0
+
+  def __len__(self) -> int:
+    return len(self._keys)
+
+  def _state(self, key: Tuple[str, ...]) -> _KeyState:
+    state = self._keys.get(key)
+    if state is None:
+      state = self._keys[key] = _KeyState(self.windows, self.buckets)
+      if len(self._keys) > self.max_keys:
+        evicted, _ = self._keys.popitem(last=False)
+        self.evicted += 1
+        if len(evicted) == 2 and evicted[0] == "payer":
+          self._hours.pop(evicted[1], None)
+    else:
+      self._keys.move_to_end(key)
+    return state
+
+  def observe(self, row: Mapping[str, Any], default_time: Optional[float] = None) -> bool:
+    """Record one payment; returns False if it has no usable payment_time.
+
+    Args:
+        row: Transactions row with payer_id/payee_id/payment_amount/payment_time.
+        default_time: Epoch seconds used when payment_time is missing or
+            partial, e.g. the current time for a payment happening now.
+    """
+    timestamp = parse_timestamp(row.get("payment_time"))
+    if timestamp is None:
+      timestamp = default_time
+    keys = _keys_for(row)
+    if timestamp is None or not keys:
+      self.skipped += 1
+      return False
+    amount = float(row.get("payment_amount") or 0.0)
+    payer = row.get("payer_id")
+    with self._lock:
+      for key in keys:
+        state = self._state(key)
+        state.last_seen = max(state.last_seen, timestamp)
+        for ring in state.rings.values():
+          ring.add(timestamp, amount)
+      if payer:
+        hour = datetime.fromtimestamp(timestamp, timezone.utc).hour
+        self._hours.setdefault(payer, [0] * 24)[hour] += 1
+      self.observed += 1
+    return True
+
+  def retract(self, row: Mapping[str, Any]) -> bool:
+    """Undo observe(row); returns False if the row has no usable payment_time.
+
+    Buckets that have since rotated out of a window are left alone.
+    """
+    timestamp = parse_timestamp(row.get("payment_time"))
+    keys = _keys_for(row)
+    if timestamp is None or not keys:
+      return False
+    amount = float(row.get("payment_amount") or 0.0)
+    payer = row.get("payer_id")
+    with self._lock:
+      for key in keys:
+        state = self._keys.get(key)
+        if state is not None:
+          for ring in state.rings.values():
+            ring.remove(timestamp, amount)
+      hours = self._hours.get(payer) if payer else None
+      hour = datetime.fromtimestamp(timestamp, timezone.utc).hour
+      if hours and hours[hour]:
+        hours[hour] -= 1
+      self.observed = max(self.observed - 1, 0)
+    return True
+
+  def follow(self, rows: Sequence[Mapping[str, Any]], replaced: Sequence[Mapping[str, Any]] = ()) -> int:
+    """Write listener: record rows written now, retracting the rows they replace.
+
+    A correction without a usable payment_time keeps the replaced row's time;
+    otherwise rows without one are recorded at the current time.
+    """
+    now = time.time()
+    observed = 0
+    for old, row in replacement_pairs(rows, replaced):
+      if old is not None and self.retract(old) and parse_timestamp(row.get("payment_time")) is None:
+        row = dict(row, payment_time=old["payment_time"])
+      observed += self.observe(row, default_time=now)
+    return observed
+
+  def observe_many(self, rows: Iterable[Mapping[str, Any]], default_time: Optional[float] = None) -> int:
+    """Record payments; returns how many had a usable payment_time."""
+    return sum(self.observe(row, default_time) for row in rows)
+
+  def _windows_for(self, key: Tuple[str, ...], as_of: float) -> Optional[Dict[str, Dict[str, Any]]]:
+    state = self._keys.get(key)
+    if state is None:
+      return None
+    result = {}
+    for name, ring in state.rings.items():
+      count, amount = ring.total(as_of)
+      result[name] = {"count": count, "amount_sum": round(amount, 2)}
+    return result
+
+  def velocity(
+      self,
+      payer_id: Optional[str] = None,
+      payee_id: Optional[str] = None,
+      as_of: Optional[float] = None,
+  ) -> Dict[str, Any]:
+    """Payment counts and amount sums per window, ending at `as_of` (default now).
+
+    Amount sums add raw payment_amounts and are only meaningful per currency
+    when an entity pays in a single currency. When no payment with a usable
+    time has been observed at all, "warning" is NO_HISTORY_WARNING.
+    """
+    as_of = time.time() if as_of is None else as_of
+    result: Dict[str, Any] = {
+        "as_of": datetime.fromtimestamp(as_of, timezone.utc).isoformat(),
+        "windows_seconds": self.windows,
+    }
+    if not self.observed:
+      result["warning"] = NO_HISTORY_WARNING
+    with self._lock:
+      for label, key in (
+          ("payer", ("payer", payer_id) if payer_id else None),
+          ("payee", ("payee", payee_id) if payee_id else None),
+          ("pair", ("pair", payer_id, payee_id) if payer_id and payee_id else None),
+      ):
+        if key is not None:
+          result[label] = self._windows_for(key, as_of) or "no history"
+      if payer_id:
+        result["payer_hour_of_day"] = self._hour_profile(payer_id, as_of)
+    return result
+
+  def _hour_profile(self, payer_id: str, as_of: float) -> Dict[str, Any]:
+    hours = self._hours.get(payer_id)
+    total = sum(hours) if hours else 0
+    hour = datetime.fromtimestamp(as_of, timezone.utc).hour
+    if total < OFF_CYCLE_MIN_HISTORY:
+      return {"hour_utc": hour, "history": total, "off_cycle": None}
+    share = hours[hour] / total
+    return {
+        "hour_utc": hour,
+        "history": total,
+        "share_at_hour": round(share, 4),
+        "off_cycle": share < OFF_CYCLE_MAX_SHARE,
+    }
+
+  def stats(self) -> Dict[str, Any]:
+    return {
+        "keys": len(self._keys),
+        "observed": self.observed,
+        "skipped_without_time": self.skipped,
+        "evicted_keys": self.evicted,
+    }
+
+
+def _keys_for(row: Mapping[str, Any]) -> List[Tuple[str, ...]]:
+  payer, payee = row.get("payer_id"), row.get("payee_id")
+  keys: List[Tuple[str, ...]] = []
+  if payer:
+    keys.append(("payer", payer))
+  if payee:
+    keys.append(("payee", payee))
+  if payer and payee:
+    keys.append(("pair", payer, payee))
+  return keys
+
+
+def timestamped_rows(rows: Sequence[Dict[str, Any]], reference_paths: Sequence[str]) -> List[Dict[str, Any]]:
+  """`rows` with payment_times that are not full timestamps repaired where possible.
+
+  Repairs come from the full times in `reference_paths` for the same
+  transaction_id, as in ingest; the reference is only read if a row needs it.
+  """
+  if all(parse_timestamp(row.get("payment_time")) is not None for row in rows):
+    return list(rows)
+  try:
+    reference = load_time_reference(reference_paths)
+  except (ImportError, OSError) as e:
+    logger.warning(f"Cannot read time reference {list(reference_paths)}: {e}")
+    reference = {}
+  repaired = []
+  for row in rows:
+    if parse_timestamp(row.get("payment_time")) is None:
+      payment_time, _ = repair_timestamp(row.get("payment_time"), reference.get(row.get("transaction_id")))
+      if payment_time is not None:
+        row = dict(row, payment_time=payment_time)
+    repaired.append(row)
+  return repaired
+
+
+_tracker: Optional[VelocityTracker] = None
+_tracker_lock = threading.Lock()
+
+
+def get_velocity_tracker(store: Optional[TransactionStore] = None) -> VelocityTracker:
+  """Return the process-wide tracker, seeded from the store on first use.
+
+  The tracker then follows every Transactions write made through the store,
+  including bulk loads.
+  """
+  global _tracker
+  if _tracker is None:
+    with _tracker_lock:
+      if _tracker is None:
+        store = store or get_transaction_store()
+        tracker = VelocityTracker()
+        tracker.observe_many(timestamped_rows(
+            store.load_transaction_columns(VELOCITY_COLUMNS), get_config().time_reference_paths
+        ))
+        # Rows written through the store are happening now unless they carry a time.
+        store.add_write_listener(tracker.follow)
+        _tracker = tracker
+        if tracker.observed:
+          logger.info(f"Seeded payment velocity from {store.name}: {tracker.stats()}")
+        else:
+          logger.warning(f"No transaction in {store.name} has a usable payment_time: {tracker.stats()}")
+  return _tracker